@@ -1,42 +1,262 @@
 import os
+import sys
+import time
+import random
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 import faiss
 import numpy as np
-from openai import OpenAI
 from dotenv import load_dotenv
 
+# Add the project root to sys.path for absolute imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.storage.embedding_cache import EmbeddingCache
+
 load_dotenv()
-client = OpenAI()
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+# OpenAI accepts up to 2048 inputs per embeddings request
+DEFAULT_BATCH_SIZE = 512
+DEFAULT_CONCURRENCY = 4
+
+_client = None
+
+def get_client():
+    """Lazily create the OpenAI client so offline callers never need an API key."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI()
+    return _client
+
+class FakeEmbeddingClient:
+    """
+    Offline stand-in for the OpenAI client's embeddings API.
+
+    Returns deterministic unit vectors derived from a hash of each input, so the
+    whole embed/index path can be tested and benchmarked without network access.
+    """
+
+    def __init__(self, dim: int = 1536, fail_first: int = 0):
+        self.dim = dim
+        self.requests = 0
+        self.inputs = 0
+        # Simulate this many rate-limit errors before succeeding
+        self.fail_first = fail_first
+        self.embeddings = self
+
+    def create(self, model, input):
+        self.requests += 1
+        if self.fail_first > 0:
+            self.fail_first -= 1
+            error = RuntimeError("Rate limit reached")
+            error.status_code = 429
+            raise error
+        inputs = [input] if isinstance(input, str) else list(input)
+        self.inputs += len(inputs)
+        data = []
+        for i, text in enumerate(inputs):
+            seed = int.from_bytes(hashlib.sha256(f"{model}\0{text}".encode("utf-8")).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dim).astype("float32")
+            data.append(SimpleNamespace(index=i, embedding=(vector / np.linalg.norm(vector)).tolist()))
+        return SimpleNamespace(data=data)
 
 # Example: replace with your actual chunks
 def load_chunks(path="chunks.txt"):
     with open(path, "r") as f:
         return [line.strip() for line in f if line.strip()]
 
-def embed_texts(chunks):
-    vectors = []
-    for chunk in chunks:
-        resp = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=chunk
-        )
-        vectors.append(resp.data[0].embedding)
+def _is_rate_limit(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+def _embed_batch(client, batch, model, max_retries):
+    """Embed one batch, backing off exponentially (with jitter) on rate-limit errors."""
+    for attempt in range(max_retries + 1):
+        try:
+            resp = client.embeddings.create(model=model, input=batch)
+            return [item.embedding for item in sorted(resp.data, key=lambda item: item.index)]
+        except Exception as e:
+            if not _is_rate_limit(e) or attempt == max_retries:
+                raise
+            delay = min(60.0, 2 ** attempt) * (0.5 + random.random())
+            print(f"[WARNING] Rate limited; retrying batch of {len(batch)} in {delay:.1f}s")
+            time.sleep(delay)
+
+def embedding_model_id(client, model):
+    """Cache namespace for vectors from this client and model, so fake vectors never pass for real ones."""
+    if isinstance(client, FakeEmbeddingClient):
+        return f"fake/{client.dim}/{model}"
+    return f"openai/{model}"
+
+def embed_texts(chunks, client=None, model=EMBEDDING_MODEL, batch_size=DEFAULT_BATCH_SIZE,
+                max_concurrency=DEFAULT_CONCURRENCY, cache=None, max_retries=6):
+    """
+    Embed chunks with batched, concurrent requests.
+
+    Args:
+        chunks: Texts to embed
+        client: Object exposing embeddings.create (defaults to the OpenAI client)
+        model: Embedding model name
+        batch_size: Inputs per request
+        max_concurrency: Requests in flight at once
+        cache: Optional EmbeddingCache; only texts missing from it are requested
+        max_retries: Retries per batch on rate-limit errors
+
+    Returns:
+        float32 array of shape (len(chunks), dim)
+    """
+    if not chunks:
+        return np.zeros((0, 0), dtype="float32")
+    model_id = embedding_model_id(client, model)
+    vectors = cache.get_many(chunks, model_id) if cache is not None else [None] * len(chunks)
+
+    # Each distinct missing text is requested once, however often it repeats
+    missing = list(dict.fromkeys(chunk for chunk, vector in zip(chunks, vectors) if vector is None))
+    if missing:
+        client = client or get_client()
+        batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            results = list(pool.map(lambda batch: _embed_batch(client, batch, model, max_retries), batches))
+        computed = {}
+        for batch, embeddings in zip(batches, results):
+            computed.update(zip(batch, embeddings))
+            if cache is not None:
+                cache.put_many(batch, model_id, embeddings)
+        vectors = [vector if vector is not None else computed[chunk] for chunk, vector in zip(chunks, vectors)]
+        print(f"Embedded {len(missing)} new chunks in {len(batches)} requests")
+    if cache is not None:
+        stats = cache.stats()
+        print(f"[EMBED CACHE] hits={stats['hits']} misses={stats['misses']}")
     return np.array(vectors).astype("float32")
 
-def build_faiss_index(vectors):
-    dim = vectors.shape[1]
-    index = faiss.IndexFlatL2(dim)
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq", "sq16")
+
+def _index_spec(index_type, num_vectors, dim, nlist=None, hnsw_m=32, pq_m=None):
+    """Translate an index type into a faiss.index_factory string sized for num_vectors."""
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "hnsw":
+        return f"HNSW{hnsw_m}"
+    if index_type == "sq16":
+        return "SQfp16"
+    # k-means wants roughly 39 training points per centroid
+    nlist = nlist or max(1, min(int(4 * np.sqrt(num_vectors)), num_vectors // 39))
+    if index_type == "ivf":
+        return f"IVF{nlist},Flat"
+    if index_type == "ivfpq":
+        pq_m = pq_m or max(m for m in (1, 2, 4, 8, 16, 32, 64) if dim % m == 0 and m <= max(1, dim // 4))
+        # 8-bit codes need 256 training points per sub-quantizer; shrink codebooks for small corpora
+        nbits = max(1, min(8, int(np.log2(max(num_vectors, 2)))))
+        return f"IVF{nlist},PQ{pq_m}x{nbits}"
+    raise ValueError(f"Unknown index type '{index_type}'. Choose from: {', '.join(INDEX_TYPES)}")
+
+def build_faiss_index(vectors, index_type="flat", nlist=None, nprobe=8, hnsw_m=32, ef_search=64,
+                      pq_m=None, train_size=50_000):
+    """
+    Build a FAISS index over the given vectors.
+
+    Args:
+        vectors: float32 array of shape (n, dim)
+        index_type: One of INDEX_TYPES; "flat" is exact, the others trade recall for speed/memory
+        nlist: IVF cells (defaults to ~4*sqrt(n))
+        nprobe: IVF cells scanned per query (stored with the index)
+        hnsw_m: HNSW graph degree
+        ef_search: HNSW search depth (stored with the index)
+        pq_m: Product-quantizer sub-vectors for "ivfpq"
+        train_size: Maximum number of vectors sampled to train IVF/PQ quantizers
+
+    Returns:
+        Populated faiss index
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    num_vectors, dim = vectors.shape
+    index = faiss.index_factory(dim, _index_spec(index_type, num_vectors, dim, nlist, hnsw_m, pq_m))
+    if hasattr(faiss.downcast_index(index), "do_polysemous_training"):
+        # Only needed for polysemous (Hamming-filtered) search, and it dominates training time
+        faiss.downcast_index(index).do_polysemous_training = False
+    if not index.is_trained:
+        sample = vectors
+        if num_vectors > train_size:
+            rows = np.random.default_rng(0).choice(num_vectors, train_size, replace=False)
+            sample = vectors[np.sort(rows)]
+        index.train(sample)
     index.add(vectors)
+    set_search_params(index, nprobe=nprobe, ef_search=ef_search)
     return index
 
+def set_search_params(index, nprobe=None, ef_search=None):
+    """Set the recall/latency knobs of an IVF or HNSW index; a no-op for other types."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and nprobe:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+    if ef_search and hasattr(faiss.downcast_index(index), "hnsw"):
+        faiss.downcast_index(index).hnsw.efSearch = ef_search
+
 def save_index(index, chunks, path="rag_index"):
     faiss.write_index(index, f"{path}.index")
     with open(f"{path}.txt", "w") as f:
         for chunk in chunks:
             f.write(chunk + "\n")
 
+def load_index(path="rag_index", mmap=False):
+    """
+    Load an index written by save_index.
+
+    Args:
+        path: Path prefix used when saving
+        mmap: Memory-map the index read-only instead of copying it into RAM, so
+              several processes share one copy through the page cache
+
+    Returns:
+        Tuple of (index, chunks)
+    """
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+    index = faiss.read_index(f"{path}.index", flags)
+    return index, load_chunks(f"{path}.txt")
+
+def append_to_index(new_chunks, vectors, path="rag_index"):
+    """
+    Add new chunks to a saved index without rebuilding it.
+
+    Trained quantizers (IVF/PQ) are reused as-is, so recall degrades slowly if the
+    new data drifts far from the training sample; rebuild periodically in that case.
+
+    Returns:
+        Total number of vectors in the index
+    """
+    index = faiss.read_index(f"{path}.index")
+    index.add(np.ascontiguousarray(vectors, dtype="float32"))
+    faiss.write_index(index, f"{path}.index")
+    with open(f"{path}.txt", "a") as f:
+        for chunk in new_chunks:
+            f.write(chunk + "\n")
+    return index.ntotal
+
 if __name__ == "__main__":
-    chunks = load_chunks()  # One chunk per line
-    vectors = embed_texts(chunks)
-    index = build_faiss_index(vectors)
-    save_index(index, chunks)
-    print("✅ Index built and saved.")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Embed chunks and build a FAISS index.")
+    parser.add_argument('--chunks', default='chunks.txt', help='Input file, one chunk per line')
+    parser.add_argument('--output', default='rag_index', help='Output path prefix')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--cache-path', default=os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3"))
+    parser.add_argument('--no-cache', action='store_true', help='Re-embed every chunk')
+    parser.add_argument('--fake', action='store_true', help='Use deterministic offline embeddings')
+    parser.add_argument('--index-type', choices=INDEX_TYPES, default='flat')
+    parser.add_argument('--nlist', type=int, default=None, help='IVF cells (default ~4*sqrt(n))')
+    parser.add_argument('--nprobe', type=int, default=8, help='IVF cells scanned per query')
+    parser.add_argument('--append', action='store_true', help='Add the chunks to an existing index at --output')
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.chunks)  # One chunk per line
+    cache = None if args.no_cache else EmbeddingCache(args.cache_path)
+    vectors = embed_texts(chunks, client=FakeEmbeddingClient() if args.fake else None,
+                          batch_size=args.batch_size, max_concurrency=args.concurrency, cache=cache)
+    if args.append and os.path.exists(f"{args.output}.index"):
+        total = append_to_index(chunks, vectors, args.output)
+        print(f"✅ Added {len(chunks)} chunks ({total} total).")
+    else:
+        index = build_faiss_index(vectors, index_type=args.index_type, nlist=args.nlist, nprobe=args.nprobe)
+        save_index(index, chunks, args.output)
+        print("✅ Index built and saved.")
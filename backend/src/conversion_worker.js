@@ -0,0 +1,11 @@
+const path = require('path');
+const { createPythonWorker } = require('./python_worker');
+
+// Resident LibreOffice conversion pool (src/parsers/conversion_pool.py).
+// Office instances stay warm between uploads and converted PDFs are cached by content hash.
+module.exports = createPythonWorker({
+    label: 'ConversionWorker',
+    script: path.join(__dirname, '..', '..', 'src', 'parsers', 'conversion_pool.py'),
+    args: ['--stdio'],
+    timeoutMs: 5 * 60 * 1000
+});
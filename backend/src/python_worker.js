@@ -0,0 +1,75 @@
+const readline = require('readline');
+const { spawn } = require('child_process');
+
+// Client for a resident Python worker speaking NDJSON over stdin/stdout
+// (see src/utils/ndjson_server.py). The process is spawned lazily on first
+// use and respawned on the next request if it exits.
+function createPythonWorker({ label, script, args = [], timeoutMs = 30000 }) {
+    let worker = null;
+    let nextId = 1;
+    const pending = new Map();
+
+    function startWorker() {
+        console.log(`[${label}] Starting resident worker:`, script, args.join(' '));
+        const proc = spawn('python3', [script, ...args], { stdio: ['pipe', 'pipe', 'pipe'] });
+
+        readline.createInterface({ input: proc.stdout }).on('line', (line) => {
+            let response;
+            try {
+                response = JSON.parse(line);
+            } catch (e) {
+                console.error(`[${label}] Unparseable worker output:`, line);
+                return;
+            }
+            const entry = pending.get(response.id);
+            if (!entry) return;
+            pending.delete(response.id);
+            clearTimeout(entry.timer);
+            if (response.error) {
+                entry.reject(new Error(`${response.error}: ${response.details || ''}`));
+            } else {
+                entry.resolve(response);
+            }
+        });
+
+        proc.stderr.on('data', (data) => {
+            console.error(`[${label}] stderr:`, data.toString());
+        });
+
+        proc.on('exit', (code) => {
+            console.warn(`[${label}] Worker exited with code ${code}`);
+            if (worker === proc) worker = null;
+            for (const [id, entry] of pending) {
+                clearTimeout(entry.timer);
+                entry.reject(new Error(`${label} worker exited with code ${code}`));
+                pending.delete(id);
+            }
+        });
+
+        proc.on('error', (err) => {
+            console.error(`[${label}] Failed to start worker:`, err);
+        });
+
+        return proc;
+    }
+
+    function request(payload) {
+        if (!worker) {
+            worker = startWorker();
+        }
+        const id = nextId++;
+        return new Promise((resolve, reject) => {
+            // timeoutMs of 0 disables the timeout (e.g. for long transcriptions)
+            const timer = timeoutMs ? setTimeout(() => {
+                pending.delete(id);
+                reject(new Error(`${label} request timed out`));
+            }, timeoutMs) : null;
+            pending.set(id, { resolve, reject, timer });
+            worker.stdin.write(JSON.stringify({ id, ...payload }) + '\n');
+        });
+    }
+
+    return { request };
+}
+
+module.exports = { createPythonWorker };
@@ -0,0 +1,42 @@
+const path = require('path');
+const { createPythonWorker } = require('./python_worker');
+
+// Resident Python search worker (src/parsers/search_service.py).
+const worker = createPythonWorker({
+    label: 'SearchWorker',
+    script: path.join(__dirname, '..', '..', 'src', 'parsers', 'search_service.py')
+});
+
+async function search({ query, collection, nResults = 5, topic, mode }) {
+    const response = await worker.request({
+        op: 'search',
+        query,
+        collection,
+        n_results: nResults,
+        topic: topic || null,
+        mode: mode || 'vector'
+    });
+    return response.results;
+}
+
+// queries: strings or { query, collection, topic, n_results } objects; one worker round trip for all
+async function batchSearch({ queries, collection, nResults = 5, topic, mode }) {
+    const response = await worker.request({
+        op: 'batch_search',
+        queries,
+        collection,
+        n_results: nResults,
+        topic: topic || null,
+        mode: mode || 'vector'
+    });
+    if (response.error) {
+        throw new Error(response.error);
+    }
+    return { results: response.results, union: response.union };
+}
+
+function health() {
+    return worker.request({ op: 'health' });
+}
+
+module.exports = { search, batchSearch, health, request: worker.request };
@@ -9,6 +9,9 @@ const cors = require('cors');
 const fs = require('fs');
 const AWS = require('aws-sdk');
 const { v4: uuidv4 } = require('uuid');
+const searchWorker = require('./search_worker');
+const transcriptionWorker = require('./transcription_worker');
+const conversionWorker = require('./conversion_worker');
 require('dotenv').config({ path: path.join(__dirname, '..', '..', '.env') });
 
 // Configure AWS
@@ -156,19 +159,29 @@ app.get('/api/collections', async (req, res) => {
 });
 
 // ChromaDB collection dump endpoint for debugging
+// Query params: limit, offset, where (JSON), fields (comma-separated: text,metadata), format (json|ndjson)
 app.get('/api/collection/:collectionName', async (req, res) => {
     const { collectionName } = req.params;
+    const { limit, offset, where, fields, format } = req.query;
     const pythonScript = path.resolve(__dirname, '../../src/parsers/dump_collection.py');
-    const command = `python3 ${pythonScript} ${collectionName}`;
+    const args = [pythonScript, collectionName];
+    if (limit) args.push('--limit', String(parseInt(limit, 10)));
+    if (offset) args.push('--offset', String(parseInt(offset, 10)));
+    if (where) args.push('--where', where);
+    if (fields !== undefined) args.push('--fields', ...String(fields).split(',').filter(Boolean));
+    if (format === 'ndjson') args.push('--format', 'ndjson');
     console.log(`[COLLECTION DEBUG] Requested collection: ${collectionName}`);
-    console.log(`[COLLECTION DEBUG] Python script path: ${pythonScript}`);
-    console.log(`[COLLECTION DEBUG] Running command: ${command}`);
-    const python = spawn('python3', [pythonScript, collectionName]);
-    let data = '';
+    console.log(`[COLLECTION DEBUG] Running command: python3 ${args.join(' ')}`);
+    const python = spawn('python3', args);
     let errData = '';
+    let streaming = false;
+    // Rows are piped straight through; failures are reported on stderr and by the exit status
     python.stdout.on('data', chunk => {
-        data += chunk;
-        console.log(`[COLLECTION DEBUG] stdout: ${chunk}`);
+        if (!streaming) {
+            streaming = true;
+            res.type(format === 'ndjson' ? 'application/x-ndjson' : 'application/json');
+        }
+        res.write(chunk);
     });
     python.stderr.on('data', err => {
         errData += err.toString();
@@ -176,17 +189,28 @@ app.get('/api/collection/:collectionName', async (req, res) => {
     });
     python.on('close', code => {
         console.log(`[COLLECTION DEBUG] Python process exited with code: ${code}`);
-        try {
-            const parsed = JSON.parse(data);
-            if (parsed.error) {
-                console.warn(`[COLLECTION DEBUG] Collection error: ${parsed.error}`);
-                res.status(404).json(parsed);
+        if (streaming) {
+            if (code === 0) {
+                res.end();
             } else {
-                res.json(parsed);
+                // Headers are sent; abort so the client sees a failed transfer, not a complete body
+                console.error('[COLLECTION DEBUG] Export failed mid-stream');
+                res.destroy();
             }
+            return;
+        }
+        if (code === 0) {
+            res.type(format === 'ndjson' ? 'application/x-ndjson' : 'application/json').end();
+            return;
+        }
+        const errorLine = errData.trim().split('\n').reverse().find(line => line.startsWith('{"error"'));
+        try {
+            const parsed = JSON.parse(errorLine);
+            console.warn(`[COLLECTION DEBUG] Collection error: ${parsed.error}`);
+            res.status(404).json(parsed);
         } catch (e) {
-            console.error('[COLLECTION DEBUG] Failed to parse Python output:', e);
-            res.status(500).json({ error: 'Failed to parse Python output', details: data, stderr: errData });
+            console.error('[COLLECTION DEBUG] Failed to parse Python error output:', e);
+            res.status(500).json({ error: 'Collection export failed', stderr: errData });
         }
     });
     python.on('error', err => {
@@ -200,6 +224,16 @@ app.get('/api/health', (req, res) => {
     res.json({ status: 'ok', port: port });
 });
 
+// Readiness probe for the resident search worker
+app.get('/api/search/health', async (req, res) => {
+    try {
+        const workerHealth = await searchWorker.health();
+        res.status(workerHealth.ready ? 200 : 503).json(workerHealth);
+    } catch (err) {
+        res.status(503).json({ status: 'unavailable', details: err.message });
+    }
+});
+
 // File upload endpoint
 app.post('/api/upload', upload.single('file'), async (req, res) => {
     try {
@@ -336,6 +370,42 @@ app.post('/api/upload', upload.single('file'), async (req, res) => {
     }
 });
 
+// Run a parser on a local file. Audio goes to the resident transcription pool
+// (Whisper stays loaded between uploads); other parsers run as one-shot scripts.
+// Extensions with a direct text extractor (src/parsers/office_parser.py, text_parser.py)
+const nativeParsers = {
+    '.docx': 'office_parser.py',
+    '.pptx': 'office_parser.py',
+    '.txt': 'text_parser.py',
+    '.md': 'text_parser.py'
+};
+
+function runParser(parserScript, filePath) {
+    if (parserScript === 'audio_parser.py') {
+        return transcriptionWorker.request({ op: 'transcribe', path: filePath })
+            .then(
+                (response) => ({ code: 0, stdout: JSON.stringify(response.result), stderr: '' }),
+                (err) => ({ code: 1, stdout: '', stderr: err.message })
+            );
+    }
+    return new Promise((resolve) => {
+        const pythonProcess = spawn('python3', [
+            path.join(__dirname, '..', '..', 'src', 'parsers', parserScript),
+            filePath
+        ]);
+        let stdout = '';
+        let stderr = '';
+        pythonProcess.stdout.on('data', (data) => {
+            stdout += data.toString();
+        });
+        pythonProcess.stderr.on('data', (data) => {
+            stderr += data.toString();
+        });
+        pythonProcess.on('close', (code) => resolve({ code, stdout, stderr }));
+        pythonProcess.on('error', (err) => resolve({ code: 1, stdout, stderr: err.message }));
+    });
+}
+
 // File processing endpoint
 app.post('/api/process', upload.array('files'), async (req, res) => {
     try {
@@ -374,7 +444,9 @@ app.post('/api/process', upload.array('files'), async (req, res) => {
             // Process file
             const fileExt = path.extname(file.originalname).toLowerCase();
             const isAudio = ['.mp3', '.wav', '.m4a'].includes(fileExt);
-            const parserScript = isAudio ? 'audio_parser.py' : 'pdf_parser.py';
+            // DOCX/PPTX/TXT/MD are read directly; PDF conversion is only the fallback
+            const nativeParser = nativeParsers[fileExt];
+            let parserScript = isAudio ? 'audio_parser.py' : (nativeParser || 'pdf_parser.py');
             console.log(`[DEBUG] Starting parsing for file: ${file.originalname} (${fileId}) using script: ${parserScript}`);
 
             // Save buffer to a temporary file
@@ -391,85 +463,74 @@ app.post('/api/process', upload.array('files'), async (req, res) => {
 
             let pdfPath = tmpFilePath;
             let tempPdfToDelete = null;
-            if (!isAudio && fileExt !== '.pdf' && supportedFiletypes.includes(fileExt)) {
-                // Convert to PDF using convert_to_pdf.py
-                const { spawnSync } = require('child_process');
+            let nativeResult = null;
+            if (nativeParser) {
+                nativeResult = await runParser(nativeParser, tmpFilePath);
+                if (nativeResult.code !== 0) {
+                    console.warn(`[PROCESS WARNING] ${nativeParser} failed for ${file.originalname}, falling back to PDF conversion: ${nativeResult.stderr}`);
+                    nativeResult = null;
+                    parserScript = 'pdf_parser.py';
+                }
+            }
+            if (!nativeResult && !isAudio && fileExt !== '.pdf' && supportedFiletypes.includes(fileExt)) {
+                // Convert to PDF with the resident conversion pool (warm office instances + PDF cache)
                 const pdfOutputPath = pathTmp.join(tmpDir, `${fileId}.pdf`);
                 console.log(`[PROCESS DEBUG] Converting ${tmpFilePath} to PDF at ${pdfOutputPath}`);
-                const convertResult = spawnSync('python3', [
-                    path.join(__dirname, '..', '..', 'src', 'parsers', 'convert_to_pdf.py'),
-                    tmpFilePath,
-                    tmpDir
-                ], { encoding: 'utf-8' });
-                if (convertResult.status === 0 && fs.existsSync(pdfOutputPath)) {
+                const { results: [converted] } = await conversionWorker.request({
+                    op: 'convert',
+                    files: [tmpFilePath],
+                    output_dir: tmpDir
+                });
+                if (converted && !converted.error && fs.existsSync(pdfOutputPath)) {
                     pdfPath = pdfOutputPath;
                     tempPdfToDelete = pdfOutputPath;
-                    console.log(`[PROCESS DEBUG] File converted to PDF: ${pdfOutputPath}`);
+                    console.log(`[PROCESS DEBUG] File converted to PDF: ${pdfOutputPath}${converted.cached ? ' (cached)' : ''}`);
                 } else {
-                    const errMsg = convertResult.stderr || (convertResult.stdout ? convertResult.stdout : 'Unknown error during PDF conversion');
+                    const errMsg = (converted && converted.error) || 'Unknown error during PDF conversion';
                     throw new Error(`[PROCESS ERROR] PDF conversion failed for ${tmpFilePath}: ${errMsg}`);
                 }
             }
 
-            let outputData = '';
-            let errorData = '';
-            let pythonProcess;
-            // NOTE: No processed results are written to disk. All persistent storage is handled by ChromaDB and DynamoDB/S3.
+            // NOTE: No processed results are written to disk (the parse cache is off unless PARSE_CACHE_PATH is set).
+            // All persistent storage is handled by ChromaDB and DynamoDB/S3.
             try {
                 // Run parser, passing the PDF temp file path (converted or original)
-                pythonProcess = spawn('python3', [
-                    path.join(__dirname, '..', '..', 'src', 'parsers', parserScript),
-                    pdfPath
-                ]);
-
-                pythonProcess.stdout.on('data', (data) => {
-                    outputData += data.toString();
-                });
-
-                pythonProcess.stderr.on('data', (data) => {
-                    errorData += data.toString();
+                const { code, stdout: outputData, stderr: errorData } = nativeResult || await runParser(parserScript, pdfPath);
+                // Clean up temp file after the parser finishes
+                fs.unlink(tmpFilePath, (err) => {
+                    if (err) {
+                        console.error('Failed to delete temp file:', tmpFilePath, err);
+                    }
                 });
-
-                await new Promise((resolve, reject) => {
-                    pythonProcess.on('close', (code) => {
-                        // Clean up temp file after process ends
-                        fs.unlink(tmpFilePath, (err) => {
-                            if (err) {
-                                console.error('Failed to delete temp file:', tmpFilePath, err);
-                            }
-                        });
-                        // Clean up PDF conversion temp file if needed
-                        if (tempPdfToDelete) {
-                            fs.unlink(tempPdfToDelete, (err) => {
-                                if (err) {
-                                    console.error('Failed to delete temp PDF:', tempPdfToDelete, err);
-                                }
-                            });
-                        }
-                        if (code === 0) {
-                            try {
-                                const result = JSON.parse(outputData);
-                                // Ensure all required fields are present for frontend display
-                                result.filename = result.filename || file.originalname;
-                                result.class = typeof result.class !== 'undefined' ? result.class : (className || '');
-                                result.topic = typeof result.topic !== 'undefined' ? result.topic : (note || '');
-                                result.text = typeof result.text !== 'undefined' ? result.text : '';
-                                result.s3_key = s3Key;
-                                result.file_id = fileId; // Ensure file_id is always present
-                                let userId = req.body.user_id || 'default_user';
-                                result.user_id = userId; 
-                                console.log(`[PROCESS DEBUG] Used user_id for file ${result.filename}:`, userId);
-                                results.push(result);
-                                console.log(`[PROCESS DEBUG] Parsed file: ${result.filename}`);
-                                resolve();
-                            } catch (e) {
-                                reject(new Error('Failed to parse Python script output'));
-                            }
-                        } else {
-                            reject(new Error(`Python script failed: ${errorData}`));
+                // Clean up PDF conversion temp file if needed
+                if (tempPdfToDelete) {
+                    fs.unlink(tempPdfToDelete, (err) => {
+                        if (err) {
+                            console.error('Failed to delete temp PDF:', tempPdfToDelete, err);
                         }
                     });
-                });
+                }
+                if (code !== 0) {
+                    throw new Error(`Python script failed: ${errorData}`);
+                }
+                let result;
+                try {
+                    result = JSON.parse(outputData);
+                } catch (e) {
+                    throw new Error('Failed to parse Python script output');
+                }
+                // Ensure all required fields are present for frontend display
+                result.filename = result.filename || file.originalname;
+                result.class = typeof result.class !== 'undefined' ? result.class : (className || '');
+                result.topic = typeof result.topic !== 'undefined' ? result.topic : (note || '');
+                result.text = typeof result.text !== 'undefined' ? result.text : '';
+                result.s3_key = s3Key;
+                result.file_id = fileId; // Ensure file_id is always present
+                let userId = req.body.user_id || 'default_user';
+                result.user_id = userId; 
+                console.log(`[PROCESS DEBUG] Used user_id for file ${result.filename}:`, userId);
+                results.push(result);
+                console.log(`[PROCESS DEBUG] Parsed file: ${result.filename}`);
             } catch (err) {
                 // Ensure temp file is cleaned up on error
                 try { fs.unlinkSync(tmpFilePath); } catch (e) {}
@@ -573,66 +634,60 @@ app.post('/api/search', async (req, res) => {
         if (!collection.startsWith('user_')) {
             collection = `user_${collection}`;
         }
-        const args = [
-            path.join(__dirname, '..', '..', 'src', 'parsers', 'test_embeddings.py'),
-            '--query', query,
-            '--collection', collection,
-            '--n-results', '5'
-        ];
         if (req.body.topic) {
             console.log('[API/Search] Passing topic as metadata filter:', req.body.topic);
-            args.push('--topic', req.body.topic);
         }
-        console.log('[API/Search] Spawning Python search process with args:', args);
-        const searchProcess = spawn('python3', args);
-
-        let searchOutput = '';
-        let searchError = '';
-
-        searchProcess.stdout.on('data', (data) => {
-            console.log('[API/Search] Python stdout:', data.toString());
-            searchOutput += data.toString();
+        // Queries go to the resident search worker instead of spawning a fresh
+        // Python process (and reloading ChromaDB + the embedding model) per request.
+        const results = await searchWorker.search({
+            query,
+            collection,
+            nResults: 5,
+            topic: req.body.topic,
+            // 'hybrid' also matches exact terms (course codes, acronyms) via BM25
+            mode: req.body.mode
         });
-
-        searchProcess.stderr.on('data', (data) => {
-            console.error('[API/Search] Python stderr:', data.toString());
-            searchError += data.toString();
-        });
-
-        await new Promise((resolve, reject) => {
-            searchProcess.on('close', (code) => {
-                console.log(`[API/Search] Python process exited with code ${code}`);
-                if (code === 0) {
-                    resolve();
-                } else {
-                    // Log the full Python error output for debugging
-                    console.error('Search script error output:', searchError);
-                    reject(new Error(`Search failed: ${searchError}`));
-                }
-            });
+        console.log('[API/Search] Final results sent to client:', results);
+        res.json(results || []);
+    } catch (error) {
+        console.error('Search error:', error);
+        res.status(500).json({ 
+            error: 'Server error',
+            details: error.message
         });
+    }
+});
 
-        try {
-            console.log('[API/Search] Parsing Python output...');
-            // Split output into lines and find the first non-empty one
-            const lines = searchOutput.split('\n').map(line => line.trim()).filter(line => line);
-            if (lines.length === 0) {
-                console.warn('[API/Search] No output from Python search script.');
-                return res.status(200).json([]);
-            }
-            const results = JSON.parse(lines[0]);
-            console.log('[API/Search] Final results sent to client:', results);
-            res.json(results);
-        } catch (parseError) {
-            console.error('Failed to parse search results:', searchOutput);
-            res.status(500).json({ 
-                error: 'Failed to parse search results',
-                details: searchOutput
-            });
+// Batch search endpoint: several queries (rewrites, sub-questions, per-topic lookups) in one call
+app.post('/api/search/batch', async (req, res) => {
+    try {
+        const { queries, user_id } = req.body;
+        if (!Array.isArray(queries) || queries.length === 0) {
+            return res.status(400).json({ error: 'Missing search queries' });
+        }
+        if (!user_id) {
+            return res.status(400).json({ error: 'No user_id provided' });
         }
+        const collection = user_id.startsWith('user_') ? user_id : `user_${user_id}`;
+        // Entries may only tune their own search; a per-entry "collection" would let a caller
+        // read another user's collection, so every entry is pinned to the caller's
+        const sanitized = queries.map(item => {
+            if (typeof item === 'string') return item;
+            const { query, n_results, topic, mode } = item || {};
+            return { query, n_results, topic, mode };
+        });
+        console.log(`[API/Search] Batch of ${queries.length} queries for collection:`, collection);
+        const response = await searchWorker.batchSearch({
+            queries: sanitized,
+            collection,
+            nResults: req.body.n_results || 5,
+            topic: req.body.topic,
+            mode: req.body.mode
+        });
+        res.json(response);
     } catch (error) {
-        console.error('Search error:', error);
-        res.status(500).json({ 
+        console.error('Batch search error:', error);
+        res.status(500).json({
             error: 'Server error',
             details: error.message
         });
@@ -0,0 +1,11 @@
+const path = require('path');
+const { createPythonWorker } = require('./python_worker');
+
+// Resident Whisper transcription pool (src/parsers/transcription_pool.py).
+// Models stay loaded between uploads; transcriptions can take minutes, so no timeout.
+module.exports = createPythonWorker({
+    label: 'TranscriptionWorker',
+    script: path.join(__dirname, '..', '..', 'src', 'parsers', 'transcription_pool.py'),
+    args: ['--stdio'],
+    timeoutMs: 0
+});
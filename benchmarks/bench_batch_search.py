@@ -0,0 +1,101 @@
+"""
+Throughput of one batch_search call against the same queries issued one at a time.
+
+Usage:
+    python benchmarks/bench_batch_search.py [--docs 5000] [--queries 1 4 16 64] [--collections 2]
+    python benchmarks/bench_batch_search.py --real-model   # Chroma's default ONNX model (needs it downloaded)
+
+By default the embedding function is a stand-in with a fixed per-call cost
+plus a small per-text cost (--call-ms, --per-text-ms), which is the shape of a
+transformer forward pass: batching amortizes the per-call part. Queries are
+spread over several collections, as a chat agent's per-topic lookups would be.
+Caches are disabled so every run pays for embedding and querying.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import chromadb
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.parsers.search_service import SearchService
+
+DIM = 384
+
+
+class SimulatedModel(chromadb.EmbeddingFunction):
+    def __init__(self, call_ms, per_text_ms):
+        self.call_ms = call_ms
+        self.per_text_ms = per_text_ms
+
+    def __call__(self, input):
+        time.sleep((self.call_ms + self.per_text_ms * len(input)) / 1000)
+        return [np.random.default_rng(int(hashlib.sha256(t.encode()).hexdigest()[:8], 16)).standard_normal(DIM)
+                .astype(np.float32) for t in input]
+
+
+def make_service(client, ef):
+    return SearchService(client=client, embedding_function=ef, result_cache_size=0, query_cache_size=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=5000)
+    parser.add_argument('--queries', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--collections', type=int, default=2)
+    parser.add_argument('--call-ms', type=float, default=8.0)
+    parser.add_argument('--per-text-ms', type=float, default=0.5)
+    parser.add_argument('--real-model', action='store_true')
+    args = parser.parse_args()
+
+    if args.real_model:
+        from chromadb.utils import embedding_functions
+        ef = embedding_functions.DefaultEmbeddingFunction()
+    else:
+        ef = SimulatedModel(args.call_ms, args.per_text_ms)
+    client = chromadb.EphemeralClient()
+    rng = np.random.default_rng(0)
+    names = [f"user_batch_bench_{c}" for c in range(args.collections)]
+    loader = make_service(client, ef)
+    for name in names:
+        collection = loader.get_collection(name)
+        per_collection = args.docs // args.collections
+        for start in range(0, per_collection, 1000):
+            count = min(1000, per_collection - start)
+            collection.add(ids=[f"d{i}" for i in range(start, start + count)],
+                           embeddings=rng.standard_normal((count, DIM)).astype(np.float32),
+                           documents=[f"chunk {i}" for i in range(start, start + count)])
+
+    # Untimed pass so neither mode pays Chroma's first-query warm-up
+    loader.batch_search([{"query": "warm up", "collection": name} for name in names])
+
+    report = []
+    for num_queries in args.queries:
+        queries = [{"query": f"question {i} about topic {i % 7}", "collection": names[i % len(names)]}
+                   for i in range(num_queries)]
+        single = make_service(client, ef)
+        start = time.perf_counter()
+        for q in queries:
+            single.search_similar_chunks(q["query"], q["collection"], n_results=5)
+        single_seconds = time.perf_counter() - start
+
+        batched = make_service(client, ef)
+        start = time.perf_counter()
+        batched.batch_search(queries, n_results=5)
+        batch_seconds = time.perf_counter() - start
+        report.append({
+            "queries": num_queries,
+            "single_qps": round(num_queries / single_seconds, 1),
+            "batch_qps": round(num_queries / batch_seconds, 1),
+            "speedup": round(single_seconds / batch_seconds, 2)
+        })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
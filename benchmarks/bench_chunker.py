@@ -0,0 +1,86 @@
+"""
+Throughput and peak memory of the offset-based chunker against the original chunk_text.
+
+Usage:
+    python benchmarks/bench_chunker.py [--megabytes 1 4 16]
+
+The legacy implementation copies every 1000-character window into a new
+string; chunk_spans only records (start, end) offsets. Each mode is run on a
+synthetic lecture transcript at several sizes so linear scaling is visible.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.chunking import chunk_spans
+
+WORDS = ("the", "gradient", "of", "a", "function", "points", "toward", "steepest", "ascent",
+         "we", "will", "prove", "this", "using", "lagrange", "multipliers", "next", "week")
+
+
+def legacy_chunk_text(text, chunk_size=1000, overlap=200):
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + chunk_size
+        chunks.append(text[start:end])
+        start = end - overlap
+    return chunks
+
+
+def synth_transcript(num_chars, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < num_chars:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 24))).capitalize() + "."
+        if rng.random() < 0.1:
+            sentence += "\n\n"
+        parts.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(parts)[:num_chars]
+
+
+def measure(fn, text):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(text)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "chunks": len(result),
+        "seconds": round(elapsed, 4),
+        "mb_per_s": round(len(text) / elapsed / 1e6, 2),
+        "peak_mb": round(peak / 1e6, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--megabytes', type=float, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args()
+
+    modes = {
+        "legacy_chunk_text": legacy_chunk_text,
+        "spans_none": lambda t: chunk_spans(t, boundary="none"),
+        "spans_sentence": lambda t: chunk_spans(t, boundary="sentence"),
+        "spans_paragraph": lambda t: chunk_spans(t, boundary="paragraph"),
+        "spans_sentence_256_tokens": lambda t: chunk_spans(t, boundary="sentence", max_tokens=256),
+    }
+    report = []
+    for megabytes in args.megabytes:
+        text = synth_transcript(int(megabytes * 1e6))
+        for name, fn in modes.items():
+            report.append({"mode": name, "megabytes": megabytes, **measure(fn, text)})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Throughput of one-off soffice conversions versus the warm conversion pool.
+
+Usage:
+    python benchmarks/bench_conversion.py [--files 8] [--instances 2] [--repeat 2]
+
+Generates small DOCX files (distinct content, so the cache cannot help on the
+first pass) and converts them three ways:
+
+  cold:        a fresh soffice process and a fresh profile per file (convert_to_pdf.py)
+  pool:        ConversionPool with warm instances and the PDF cache disabled
+  pool+cache:  ConversionPool re-converting the same files --repeat times with the cache on
+
+Requires LibreOffice (soffice) on PATH; reports an error otherwise.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.parsers.conversion_pool import SOFFICE, ConversionPool
+from src.storage.conversion_cache import ConversionCache
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+
+def write_docx(path, paragraphs):
+    body = "".join(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>" for text in paragraphs)
+    document = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{body}</w:body></w:document>'
+    )
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("[Content_Types].xml", CONTENT_TYPES)
+        z.writestr("_rels/.rels", RELS)
+        z.writestr("word/document.xml", document)
+
+
+def cold_convert(path, output_dir):
+    with tempfile.TemporaryDirectory(prefix="lo_profile_") as profile:
+        subprocess.run([SOFFICE, f"-env:UserInstallation={Path(profile).as_uri()}", "--headless",
+                        "--convert-to", "pdf", "--outdir", str(output_dir), str(path)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=8)
+    parser.add_argument('--instances', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=2)
+    args = parser.parse_args()
+
+    if shutil.which(SOFFICE) is None:
+        print(json.dumps({"error": f"LibreOffice not found ({SOFFICE}); set SOFFICE_PATH"}))
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory(prefix="bench_conversion_") as tmp:
+        tmp = Path(tmp)
+        sources = []
+        for i in range(args.files):
+            path = tmp / f"handout_{i}.docx"
+            write_docx(path, [f"Handout {i}, paragraph {j}: lecture notes for week {i % 12}." for j in range(20)])
+            sources.append(path)
+
+        report = []
+        start = time.perf_counter()
+        for path in sources:
+            cold_convert(path, tmp / "cold")
+        elapsed = time.perf_counter() - start
+        report.append({"mode": "cold", "seconds": round(elapsed, 3), "files_per_s": round(args.files / elapsed, 2)})
+
+        with ConversionPool(args.instances) as pool:
+            start = time.perf_counter()
+            results = pool.convert_many(sources, tmp / "pool")
+            elapsed = time.perf_counter() - start
+            report.append({"mode": "pool", "seconds": round(elapsed, 3),
+                           "files_per_s": round(args.files / elapsed, 2),
+                           "errors": sum("error" in r for r in results)})
+
+        with ConversionPool(args.instances, ConversionCache(tmp / "cache")) as pool:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                results = pool.convert_many(sources, tmp / "cached")
+            elapsed = time.perf_counter() - start
+            total = args.files * args.repeat
+            report.append({"mode": "pool+cache", "seconds": round(elapsed, 3),
+                           "files_per_s": round(total / elapsed, 2), "metrics": pool.metrics()})
+
+    print(json.dumps({"files": args.files, "instances": args.instances, "results": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
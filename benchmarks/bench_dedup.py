@@ -0,0 +1,112 @@
+"""
+Near-duplicate chunk detection: banded MinHash LSH versus exact pairwise Jaccard.
+
+Usage:
+    python benchmarks/bench_dedup.py [--chunks 50000] [--dup-rate 0.3] [--threshold 0.9] [--exact-sample 2000]
+
+A synthetic corpus of chunk-sized texts is generated in which dup-rate of the
+chunks are copies of an earlier chunk with a few words edited (exported
+build-up slides, re-uploaded handouts). Reported:
+
+  lsh:   NearDuplicateIndex over the whole corpus: chunks/s, chunks dropped,
+         and recall of the planted duplicates
+  exact: all-pairs Jaccard on word 3-gram shingles over the first
+         exact-sample chunks (quadratic, hence the sample), extrapolated to
+         the full corpus, plus LSH precision/recall against it on that sample
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.dedup import NearDuplicateIndex
+
+VOCABULARY = [f"w{i}" for i in range(5000)]
+
+
+def make_corpus(count: int, dup_rate: float, words: int, edits: int, seed: int = 0):
+    """Return (texts, origin) where origin[i] is the chunk text i was copied from, or None."""
+    rng = random.Random(seed)
+    texts, origin = [], []
+    for i in range(count):
+        if texts and rng.random() < dup_rate:
+            source = rng.randrange(len(texts))
+            tokens = texts[source].split()
+            for _ in range(edits):
+                tokens[rng.randrange(len(tokens))] = rng.choice(VOCABULARY)
+            texts.append(" ".join(tokens))
+            origin.append(source)
+        else:
+            texts.append(" ".join(rng.choice(VOCABULARY) for _ in range(words)))
+            origin.append(None)
+    return texts, origin
+
+
+def shingle_set(text: str):
+    tokens = re.findall(r'\w+', text.lower())
+    return {" ".join(tokens[i:i + 3]) for i in range(len(tokens) - 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chunks', type=int, default=50000)
+    parser.add_argument('--dup-rate', type=float, default=0.3)
+    parser.add_argument('--threshold', type=float, default=0.9)
+    parser.add_argument('--words', type=int, default=150, help='Words per chunk (~1000 characters)')
+    parser.add_argument('--edits', type=int, default=2, help='Words changed in each planted duplicate')
+    parser.add_argument('--exact-sample', type=int, default=2000)
+    args = parser.parse_args()
+
+    texts, origin = make_corpus(args.chunks, args.dup_rate, args.words, args.edits)
+
+    index = NearDuplicateIndex(args.threshold)
+    start = time.perf_counter()
+    dropped = {i for i, text in enumerate(texts) if index.add(str(i), text) is not None}
+    lsh_seconds = time.perf_counter() - start
+    planted = {i for i, source in enumerate(origin) if source is not None}
+
+    # Exact ground truth on a prefix: chunk i is a duplicate if some earlier chunk reaches the threshold
+    n = min(args.exact_sample, len(texts))
+    sets = [shingle_set(text) for text in texts[:n]]
+    start = time.perf_counter()
+    exact = set()
+    for i in range(n):
+        for j in range(i):
+            union = len(sets[i] | sets[j])
+            if union and len(sets[i] & sets[j]) / union >= args.threshold:
+                exact.add(i)
+                break
+    exact_seconds = time.perf_counter() - start
+    sample_dropped = {i for i in dropped if i < n}
+    true_positives = len(sample_dropped & exact)
+
+    print(json.dumps({
+        "chunks": args.chunks,
+        "threshold": args.threshold,
+        "bands": index.bands,
+        "rows": index.rows,
+        "lsh": {
+            "seconds": round(lsh_seconds, 2),
+            "chunks_per_sec": round(args.chunks / lsh_seconds),
+            "dropped": len(dropped),
+            "planted_duplicates": len(planted),
+            "planted_recall": round(len(dropped & planted) / len(planted), 4) if planted else None
+        },
+        "exact": {
+            "sample": n,
+            "seconds": round(exact_seconds, 2),
+            "extrapolated_full_seconds": round(exact_seconds * (args.chunks / n) ** 2, 1),
+            "duplicates": len(exact),
+            "lsh_precision": round(true_positives / len(sample_dropped), 4) if sample_dropped else None,
+            "lsh_recall": round(true_positives / len(exact), 4) if exact else None
+        }
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Listing one user's files: filtered full-table scan versus keyed, projected query, on a moto table.
+
+Usage:
+    python benchmarks/bench_dynamodb_listing.py [--users 200] [--files-per-user 40] [--segments 4]
+
+The table is filled with many users whose items carry a bulky attribute (as
+metadata rows with long notes do). Reported per method:
+
+  scan_filter:    the old list_user_files_dynamodb.py (scan + FilterExpression, following pagination)
+  query:          key-condition query on user_id, all attributes
+  query_projected: the same query fetching only the listing attributes
+  scan_parallel:  AWSManager.scan_files over the whole table (admin audit), vs a serial scan
+
+"items_read" is what DynamoDB evaluates (and bills) to answer the request:
+ScannedCount summed over pages. moto runs in-process, so latencies show
+relative cost, not real network times; in particular the parallel scan
+cannot beat a serial one here, since moto serves every segment under one
+GIL, whereas real DynamoDB serves segments from separate partitions.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+
+import boto3
+from moto import mock_aws
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.aws_utils import AWSManager
+
+TABLE = "bench-files"
+FIELDS = ["file_id", "filename", "class", "topic"]
+
+
+def timed_pages(call, **kwargs):
+    """Run a paginated query/scan to completion; return (items, items_read, seconds)."""
+    start = time.perf_counter()
+    items, read = [], 0
+    while True:
+        response = call(**kwargs)
+        items.extend(response.get("Items", []))
+        read += response.get("ScannedCount", 0)
+        if "LastEvaluatedKey" not in response:
+            return items, read, time.perf_counter() - start
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--files-per-user', type=int, default=40)
+    parser.add_argument('--segments', type=int, default=4)
+    args = parser.parse_args()
+
+    for var in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        os.environ.setdefault(var, "testing")
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        dynamodb.create_table(
+            TableName=TABLE,
+            KeySchema=[{"AttributeName": "user_id", "KeyType": "HASH"}, {"AttributeName": "file_id", "KeyType": "RANGE"}],
+            AttributeDefinitions=[{"AttributeName": "user_id", "AttributeType": "S"},
+                                  {"AttributeName": "file_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        # AWSManager logs its configuration on stdout; keep stdout for the JSON report
+        with contextlib.redirect_stdout(sys.stderr):
+            manager = AWSManager(boto3.client("s3", region_name="us-east-1"), dynamodb, "unused", TABLE)
+        rng = random.Random(0)
+        manager.save_metadata_batch({
+            "user_id": f"user_{u}", "file_id": f"file_{u}_{f}", "filename": f"lecture_{f}.pdf",
+            "class": f"CLASS{rng.randrange(10)}", "topic": f"week {rng.randrange(14)}",
+            "notes": "x" * 2000
+        } for u in range(args.users) for f in range(args.files_per_user))
+
+        table = manager.table
+        user = f"user_{args.users // 2}"
+        names = {f"#a{i}": name for i, name in enumerate(FIELDS)}
+        runs = {
+            "scan_filter": (table.scan, {"FilterExpression": "user_id = :uid",
+                                         "ExpressionAttributeValues": {":uid": user}}),
+            "query": (table.query, {"KeyConditionExpression": "user_id = :uid",
+                                    "ExpressionAttributeValues": {":uid": user}}),
+            "query_projected": (table.query, {"KeyConditionExpression": "user_id = :uid",
+                                              "ExpressionAttributeValues": {":uid": user},
+                                              "ProjectionExpression": ", ".join(names),
+                                              "ExpressionAttributeNames": names}),
+        }
+        report = []
+        for method, (call, kwargs) in runs.items():
+            items, read, seconds = timed_pages(call, **kwargs)
+            report.append({"method": method, "items": len(items), "items_read": read,
+                           "bytes_returned": len(json.dumps(items, default=str)), "ms": round(seconds * 1000, 1)})
+
+        _, read, serial_seconds = timed_pages(table.scan, ProjectionExpression=", ".join(names),
+                                              ExpressionAttributeNames=names)
+        start = time.perf_counter()
+        audited = sum(1 for _ in manager.scan_files(args.segments, projection=FIELDS))
+        report.append({"method": "scan_parallel", "items": audited, "segments": args.segments,
+                       "ms": round((time.perf_counter() - start) * 1000, 1),
+                       "serial_scan_ms": round(serial_seconds * 1000, 1)})
+
+    print(json.dumps({"users": args.users, "files_per_user": args.files_per_user, "results": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
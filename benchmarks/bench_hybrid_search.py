@@ -0,0 +1,148 @@
+"""
+Quality and latency of vector, BM25-only and hybrid (RRF) retrieval on a synthetic corpus.
+
+Usage:
+    python benchmarks/bench_hybrid_search.py [--docs 3000] [--queries 200] [--k 5]
+
+Each synthetic chunk belongs to one of many topics and may mention a course
+code. A stand-in "semantic" embedding maps a topic's words *and their
+synonyms* near the topic centroid but knows nothing about course codes, which
+is how a real sentence-embedding model behaves on rare identifiers. Two query
+sets are scored:
+
+  concept: synonyms of a topic's words (no shared surface terms); relevant = chunks of that topic
+  code:    a course code plus one topic word; relevant = the chunk that mentions the code
+
+Reported per mode: precision@k for concept queries, recall@k and MRR for code
+queries, and p50/p95 search latency through SearchService.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import zlib
+
+import chromadb
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.parsers.embed_parser import prepare_chunks, save_to_chroma
+from src.parsers.search_service import SearchService
+from src.storage.bm25_index import BM25Index
+from src.storage.metadata_index import MetadataIndex
+from src.utils.text_utils import normalize_text
+
+DIM = 128
+TOPICS = 60
+WORDS_PER_TOPIC = 12
+COMMON = ("the", "we", "show", "that", "this", "lecture", "week", "notes", "example", "today")
+USER = "hybrid_bench"
+
+
+class ConceptEmbeddingFunction(chromadb.EmbeddingFunction):
+    """Embeds text as the mean of its known words' concept vectors; unknown tokens are ignored."""
+
+    def __init__(self, vocabulary):
+        rng = np.random.default_rng(0)
+        centroids = rng.standard_normal((TOPICS, DIM))
+        self.vectors = {}
+        for word, topic in vocabulary.items():
+            noise = np.random.default_rng(zlib.crc32(word.encode())).standard_normal(DIM)
+            self.vectors[word] = centroids[topic] + 0.3 * noise
+
+    def __call__(self, input):
+        embeddings = []
+        for text in input:
+            known = [self.vectors[w] for w in normalize_text(text).split() if w in self.vectors]
+            vector = np.mean(known, axis=0) if known else np.full(DIM, 1e-3)
+            embeddings.append((vector / np.linalg.norm(vector)).astype(np.float32))
+        return embeddings
+
+
+def build_corpus(num_docs, seed=0):
+    rng = random.Random(seed)
+    doc_words = [[f"term{t}x{j}" for j in range(WORDS_PER_TOPIC)] for t in range(TOPICS)]
+    synonyms = [[f"syn{t}x{j}" for j in range(WORDS_PER_TOPIC)] for t in range(TOPICS)]
+    vocabulary = {w: t for t in range(TOPICS) for w in doc_words[t] + synonyms[t]}
+    parsed, codes = [], {}
+    for i in range(num_docs):
+        topic = rng.randrange(TOPICS)
+        words = [rng.choice(doc_words[topic]) if rng.random() < 0.6 else rng.choice(COMMON) for _ in range(40)]
+        if rng.random() < 0.5:
+            code = f"{rng.choice(['MATH', 'CS', 'BIO', 'PHYS', 'ECON'])}-{100 + i}"
+            words.insert(rng.randrange(len(words)), code)
+            codes[code] = (f"d{i}_0", topic)
+        parsed.append({"text": " ".join(words) + ".", "filename": f"d{i}.pdf", "file_id": f"d{i}",
+                       "user_id": USER, "class": "BENCH", "topic": f"topic{topic}"})
+    return parsed, codes, doc_words, synonyms, vocabulary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=3000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=5)
+    args = parser.parse_args()
+
+    parsed, codes, doc_words, synonyms, vocabulary = build_corpus(args.docs)
+    ef = ConceptEmbeddingFunction(vocabulary)
+    client = chromadb.EphemeralClient()
+    bm25 = BM25Index()
+    save_to_chroma(prepare_chunks(parsed), embedding_function=ef, client=client,
+                   metadata_index=MetadataIndex(), bm25_index=bm25)
+    # Result caching would hide the query cost being measured
+    service = SearchService(client=client, embedding_function=ef, bm25_index=bm25, result_cache_size=0)
+    collection = service.get_collection(USER)
+
+    rng = random.Random(1)
+    concept_queries = []
+    for _ in range(args.queries):
+        topic = rng.randrange(TOPICS)
+        concept_queries.append((" ".join(rng.sample(synonyms[topic], 3)), f"topic{topic}"))
+    code_queries = []
+    for code in rng.sample(sorted(codes), min(args.queries, len(codes))):
+        doc_id, topic = codes[code]
+        code_queries.append((f"{code} {rng.choice(doc_words[topic])}", doc_id))
+
+    def run(mode, query):
+        start = time.perf_counter()
+        if mode == "bm25":
+            ids = [doc_id for doc_id, _ in bm25.search(f"user_{USER}", query, args.k)]
+            results = collection.get(ids=ids, include=["metadatas"]) if ids else {"ids": [], "metadatas": []}
+            order = {doc_id: i for i, doc_id in enumerate(ids)}
+            ranked = sorted(zip(results["ids"], results["metadatas"]), key=lambda item: order[item[0]])
+            hits = [(doc_id, metadata["topic"]) for doc_id, metadata in ranked]
+        else:
+            found = service.search_similar_chunks(query, USER, n_results=args.k, mode=mode)
+            hits = [(f"{r['filename'][:-4]}_0", r["topic"]) for r in found]
+        return hits, time.perf_counter() - start
+
+    report = []
+    for mode in ("vector", "bm25", "hybrid"):
+        latencies, precision, recall, reciprocal_ranks = [], [], [], []
+        for query, topic in concept_queries:
+            hits, elapsed = run(mode, query)
+            latencies.append(elapsed)
+            precision.append(sum(t == topic for _, t in hits) / args.k)
+        for query, doc_id in code_queries:
+            hits, elapsed = run(mode, query)
+            latencies.append(elapsed)
+            ranks = [i for i, (found, _) in enumerate(hits, start=1) if found == doc_id]
+            recall.append(1.0 if ranks else 0.0)
+            reciprocal_ranks.append(1 / ranks[0] if ranks else 0.0)
+        report.append({
+            "mode": mode,
+            f"concept_precision@{args.k}": round(float(np.mean(precision)), 3),
+            f"code_recall@{args.k}": round(float(np.mean(recall)), 3),
+            "code_mrr": round(float(np.mean(reciprocal_ranks)), 3),
+            "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 2)
+        })
+    print(json.dumps({"docs": args.docs, "results": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
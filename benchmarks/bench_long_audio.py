@@ -0,0 +1,88 @@
+"""
+Wall-clock comparison of single-call transcription against long-audio mode.
+
+Usage:
+    python benchmarks/bench_long_audio.py [--minutes 10] [--model tiny] [--workers N]
+
+Synthesises a multi-minute WAV of tone "utterances" separated by short pauses,
+then transcribes it once with AudioParser.transcribe() and once with
+long_audio=True (silence-split pieces decoded in parallel), also recording how
+soon the first segment arrives from iter_segments(). Requires ffmpeg and the
+chosen Whisper model.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.parsers.audio_parser import SAMPLE_RATE, AudioParser
+
+
+def synth_lecture(path, minutes, seed=0):
+    """Write a mono 16 kHz WAV alternating 2-8 s voiced bursts with 0.3-1.5 s pauses."""
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * SAMPLE_RATE)
+    audio = np.zeros(total, dtype=np.float32)
+    pos = 0
+    while pos < total:
+        burst = int(rng.uniform(2, 8) * SAMPLE_RATE)
+        t = np.arange(min(burst, total - pos)) / SAMPLE_RATE
+        pitch = rng.uniform(120, 260)
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(2, 5) * t)
+        audio[pos:pos + len(t)] = 0.3 * envelope * np.sin(2 * np.pi * pitch * t)
+        pos += len(t) + int(rng.uniform(0.3, 1.5) * SAMPLE_RATE)
+    with wave.open(path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(SAMPLE_RATE)
+        out.writeframes((audio * 32767).astype(np.int16).tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--minutes', type=float, default=10)
+    parser.add_argument('--model', default='tiny')
+    parser.add_argument('--chunk-seconds', type=float, default=120)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "lecture.wav")
+        synth_lecture(path, args.minutes)
+        audio_parser = AudioParser(args.model)
+
+        start = time.perf_counter()
+        single = audio_parser.transcribe(path)
+        single_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        first_segment_s = None
+        segments = 0
+        for _ in audio_parser.iter_segments(path, chunk_seconds=args.chunk_seconds, max_workers=args.workers):
+            if first_segment_s is None:
+                first_segment_s = time.perf_counter() - start
+            segments += 1
+        long_s = time.perf_counter() - start
+
+    print(json.dumps({
+        "audio_minutes": args.minutes,
+        "model": args.model,
+        "single_call": {"wall_s": round(single_s, 2), "segments": len(single["segments"])},
+        "long_audio": {
+            "wall_s": round(long_s, 2),
+            "first_segment_s": round(first_segment_s, 2) if first_segment_s is not None else None,
+            "segments": segments
+        },
+        "speedup": round(single_s / long_s, 2) if long_s else None
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
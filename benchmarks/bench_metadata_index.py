@@ -0,0 +1,101 @@
+"""
+Compare the metadata sidecar index with the equivalent ChromaDB `where` queries.
+
+Usage:
+    python benchmarks/bench_metadata_index.py [--files 400] [--chunks-per-file 50] [--repeats 20]
+
+A throwaway persistent ChromaDB directory is filled with synthetic chunks spread
+over classes, topics and files (random embeddings, so no model is needed), with
+the metadata index maintained alongside as save_to_chroma would. Each operation
+is then timed both ways: listing a class's topics, resolving one file's chunk
+ids, a topic-filtered vector query and deleting one file's chunks.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.storage.metadata_index import MetadataIndex, chunk_id
+
+COLLECTION = "user_bench"
+DIM = 384
+
+
+def populate(collection, index, num_files, chunks_per_file):
+    rng = np.random.default_rng(0)
+    for f in range(num_files):
+        file_id = f"file{f}"
+        class_name, topic = f"CLASS {f % 8}", f"topic {f % 40}"
+        collection.add(
+            ids=[chunk_id(file_id, i) for i in range(chunks_per_file)],
+            embeddings=rng.standard_normal((chunks_per_file, DIM)).astype("float32"),
+            documents=[f"chunk {i} of {file_id}" for i in range(chunks_per_file)],
+            metadatas=[{"file_id": file_id, "class": class_name, "topic": topic, "chunk_index": i}
+                       for i in range(chunks_per_file)]
+        )
+        index.record_file(COLLECTION, file_id, chunks_per_file, class_name, topic, f"{file_id}.pdf")
+
+
+def timed(fn, repeats):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return round(statistics.median(latencies) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=400)
+    parser.add_argument('--chunks-per-file', type=int, default=50)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        client = chromadb.PersistentClient(path=os.path.join(workdir, "chroma"))
+        collection = client.get_or_create_collection(COLLECTION)
+        index = MetadataIndex(os.path.join(workdir, "metadata_index.sqlite3"))
+        populate(collection, index, args.files, args.chunks_per_file)
+        query = np.random.default_rng(1).standard_normal(DIM).astype("float32").tolist()
+
+        def chroma_topics():
+            metadatas = collection.get(where={"class": "CLASS 3"}, include=["metadatas"])["metadatas"]
+            return sorted({m["topic"] for m in metadatas})
+
+        operations = {
+            "list_topics_of_class": (lambda: index.topics(COLLECTION, "CLASS 3"), chroma_topics),
+            "file_chunk_ids": (lambda: index.chunk_ids(COLLECTION, file_id="file7"),
+                               lambda: collection.get(where={"file_id": "file7"}, include=[])["ids"]),
+            "topic_filtered_query": (
+                lambda: collection.query(query_embeddings=[query], n_results=5,
+                                         ids=index.chunk_ids(COLLECTION, topic="topic 5")),
+                lambda: collection.query(query_embeddings=[query], n_results=5, where={"topic": "topic 5"})
+            ),
+        }
+        report = []
+        for name, (indexed, scanned) in operations.items():
+            report.append({"operation": name, "index_ms": timed(indexed, args.repeats),
+                           "chroma_where_ms": timed(scanned, args.repeats)})
+
+        # Deletes are destructive, so each repeat removes a different file
+        files = iter(range(args.files))
+        report.append({
+            "operation": "delete_file",
+            "index_ms": timed(lambda: collection.delete(ids=index.remove_file(COLLECTION, f"file{next(files)}")),
+                              args.repeats),
+            "chroma_where_ms": timed(lambda: collection.delete(where={"file_id": f"file{next(files)}"}), args.repeats)
+        })
+        print(json.dumps({"chunks": args.files * args.chunks_per_file, "results": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Compare per-request spawning of test_embeddings.py with the resident search worker.
+
+Usage:
+    python benchmarks/bench_search_service.py [--docs 2000] [--queries 20] [--concurrency 4]
+
+A throwaway ChromaDB directory is populated with synthetic chunks, then the same
+queries are issued (a) by spawning one test_embeddings.py process per query, as
+/api/search used to, and (b) over NDJSON to a single search_service.py process.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from src.parsers.search_service import SearchService
+
+WORDS = ("lecture", "matrix", "vector", "entropy", "theorem", "proof", "lemma", "graph",
+         "neuron", "gradient", "protein", "enzyme", "market", "supply", "demand", "torque")
+COLLECTION = "user_bench"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(name, latencies, wall):
+    return {
+        "mode": name,
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "wall_s": round(wall, 3),
+        "qps": round(len(latencies) / wall, 2)
+    }
+
+
+def populate(chroma_path, num_docs):
+    rng = random.Random(0)
+    service = SearchService(chroma_db_path=chroma_path)
+    collection = service.get_collection(COLLECTION)
+    batch = 500
+    for start in range(0, num_docs, batch):
+        ids = [f"doc_{i}" for i in range(start, min(start + batch, num_docs))]
+        collection.upsert(
+            ids=ids,
+            documents=[" ".join(rng.choice(WORDS) for _ in range(60)) for _ in ids],
+            metadatas=[{"filename": "bench.pdf", "class": "BENCH 101", "topic": "bench"} for _ in ids]
+        )
+
+
+def run_spawn(env, queries, concurrency):
+    script = os.path.join(ROOT, 'src', 'parsers', 'test_embeddings.py')
+
+    def one(query):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script, '--query', query, '--collection', COLLECTION],
+                       env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, queries))
+    return summarize("spawn_per_request", latencies, time.perf_counter() - start)
+
+
+def run_resident(env, queries, concurrency):
+    script = os.path.join(ROOT, 'src', 'parsers', 'search_service.py')
+    proc = subprocess.Popen([sys.executable, script, '--workers', str(concurrency), '--preload', COLLECTION],
+                            env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True, bufsize=1)
+
+    def call(payload):
+        proc.stdin.write(json.dumps(payload) + "\n")
+        proc.stdin.flush()
+        return json.loads(proc.stdout.readline())
+
+    # Wait for readiness so startup cost is excluded, as it is paid once per server lifetime
+    startup = time.perf_counter()
+    while not call({"id": 0, "op": "health"})["ready"]:
+        time.sleep(0.05)
+    startup = time.perf_counter() - startup
+
+    latencies = []
+    start = time.perf_counter()
+    for offset in range(0, len(queries), concurrency):
+        burst = queries[offset:offset + concurrency]
+        sent = time.perf_counter()
+        for i, query in enumerate(burst):
+            proc.stdin.write(json.dumps({"id": offset + i + 1, "op": "search",
+                                         "query": query, "collection": COLLECTION}) + "\n")
+        proc.stdin.flush()
+        for _ in burst:
+            json.loads(proc.stdout.readline())
+            latencies.append(time.perf_counter() - sent)
+    wall = time.perf_counter() - start
+    proc.stdin.close()
+    proc.wait()
+    result = summarize("resident_worker", latencies, wall)
+    result["startup_s"] = round(startup, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=2000)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    queries = [" ".join(rng.choice(WORDS) for _ in range(4)) for _ in range(args.queries)]
+    with tempfile.TemporaryDirectory() as chroma_path:
+        populate(chroma_path, args.docs)
+        env = {**os.environ, "CHROMA_DB_PATH": chroma_path}
+        report = [run_spawn(env, queries, args.concurrency), run_resident(env, queries, args.concurrency)]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Disk use, write time and per-class scan time of the segment store versus one JSON file per document.
+
+Usage:
+    python benchmarks/bench_segment_store.py [--docs 5000] [--classes 20] [--text-chars 8000]
+
+The "json_files" layout is what FileStore.save_processed_content used to
+write: a pretty-printed JSON file per document in a per-class directory, so
+reading a class means listing the directory and parsing every file. The
+"segments" layout is the SegmentStore now behind save_processed_content.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.storage.segment_store import SegmentStore
+
+WORDS = ("matrix", "eigenvalue", "vector", "proof", "lemma", "theorem", "basis", "span",
+         "kernel", "rank", "the", "we", "show", "that", "is", "a", "of", "and", "in")
+
+
+def make_documents(num_docs, num_classes, text_chars, seed=0):
+    rng = random.Random(seed)
+    for i in range(num_docs):
+        words, length = [], 0
+        while length < text_chars:
+            word = rng.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        yield f"CLASS{i % num_classes}", {
+            "file_id": f"user_{i}", "filename": f"lecture_{i}.pdf", "file_type": "pdf",
+            "num_pages": rng.randint(1, 40), "text": " ".join(words)
+        }
+
+
+def directory_bytes(path):
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=5000)
+    parser.add_argument('--classes', type=int, default=20)
+    parser.add_argument('--text-chars', type=int, default=8000)
+    args = parser.parse_args()
+
+    report = []
+    with tempfile.TemporaryDirectory(prefix="bench_segments_") as tmp:
+        json_root = Path(tmp) / "json_files"
+        start = time.perf_counter()
+        for class_name, content in make_documents(args.docs, args.classes, args.text_chars):
+            class_dir = json_root / class_name
+            class_dir.mkdir(parents=True, exist_ok=True)
+            with open(class_dir / f"{content['filename']}.json", 'w', encoding='utf-8') as f:
+                json.dump(content, f, ensure_ascii=False, indent=2)
+        write_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        scanned = [json.loads(p.read_text(encoding='utf-8')) for p in (json_root / "CLASS0").glob("*.json")]
+        scan_seconds = time.perf_counter() - start
+        report.append({"layout": "json_files", "files": sum(1 for p in json_root.rglob("*") if p.is_file()),
+                       "bytes": directory_bytes(json_root), "write_s": round(write_seconds, 3),
+                       "class_scan_ms": round(scan_seconds * 1000, 2), "class_docs": len(scanned)})
+
+        store = SegmentStore(Path(tmp) / "segments")
+        start = time.perf_counter()
+        batch = []
+        for class_name, content in make_documents(args.docs, args.classes, args.text_chars):
+            batch.append((content["file_id"], content, class_name))
+            if len(batch) == 256:
+                store.put_many(batch)
+                batch = []
+        store.put_many(batch)
+        write_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        scanned = [document for _, document in store.iter_class("CLASS0")]
+        scan_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        store.get(f"user_{args.docs // 2}")
+        get_seconds = time.perf_counter() - start
+        report.append({"layout": "segments", "files": sum(1 for p in store.directory.iterdir() if p.is_file()),
+                       "bytes": directory_bytes(store.directory), "write_s": round(write_seconds, 3),
+                       "class_scan_ms": round(scan_seconds * 1000, 2), "class_docs": len(scanned),
+                       "random_get_ms": round(get_seconds * 1000, 3)})
+        store.close()
+
+    print(json.dumps({"docs": args.docs, "classes": args.classes, "results": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Regression suite for the parse -> chunk -> embed -> search hot paths.
+
+Usage:
+    python benchmarks/bench_suite.py [--scale 1.0] [--stages pdf_extract,search]
+    python benchmarks/bench_suite.py --save             # record benchmarks/baselines/suite.json
+    python benchmarks/bench_suite.py --check            # exit 1 if a stage regressed past --threshold
+
+Every input is generated locally (synthetic PDFs with running headers, a
+Markdown corpus, short WAV clips) and embedding uses the deterministic
+HashEmbedder against an in-memory Chroma client, so the suite runs offline.
+Stages, each timed per operation after one warm-up call (at least --repeat
+passes, and at least half a second of them):
+
+  pdf_extract:    PDFParser.extract_text per PDF              (pages/s)
+  text_extract:   TextParser.extract_text per Markdown file   (files/s)
+  clean:          clean_parsed per parsed PDF                 (docs/s)
+  chunk_text:     chunk_text per document, sentence boundaries (chunks/s)
+  prepare_chunks: prepare_chunks per document                 (chunks/s)
+  save_to_chroma: save_to_chroma per document                 (chunks/s)
+  search:         SearchService.search_similar_chunks, caches off (queries/s)
+  audio_split:    WAV decode + find_silence_splits per clip    (audio seconds/s)
+  transcribe:     AudioParser.transcribe per clip, only with --whisper-model
+                  (needs ffmpeg and the model)
+
+Reported per stage: throughput of the fastest pass, p50/p95/p99 latency per
+operation over all passes, and the peak Python heap (tracemalloc, measured
+in a separate pass so it does not slow the timed ones; native allocations
+such as MuPDF's are not included). Baselines are machine-specific: record
+one on the machine that will run --check. A stage regresses when its
+throughput falls, or its median latency or peak memory rises, by more than
+--threshold relative to the baseline, and still does after being measured
+again (--confirm times); tail percentiles are reported but not gated, as
+they are too noisy on shared machines.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+from pathlib import Path
+
+import numpy as np
+import pymupdf
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'suite.json')
+SAMPLE_RATE = 16000
+TOPICS = {
+    "linear algebra": "matrix eigenvalue eigenvector determinant basis span rank orthogonal projection".split(),
+    "machine learning": "gradient loss regularization overfitting kernel margin classifier feature".split(),
+    "biology": "enzyme protein membrane mitochondria transcription ribosome cell receptor".split(),
+    "economics": "supply demand elasticity equilibrium marginal utility market surplus".split(),
+}
+FILLER = "the of a to and is in that for with as by this we can be".split()
+
+
+def sentences(rng, topic, count):
+    words = TOPICS[topic]
+    return " ".join(
+        " ".join(rng.choice(words if rng.random() < 0.4 else FILLER) for _ in range(rng.randint(8, 18))).capitalize() + "."
+        for _ in range(count)
+    )
+
+
+def make_pdfs(directory: Path, count: int, pages: int, rng) -> list:
+    paths = []
+    for i in range(count):
+        topic = rng.choice(list(TOPICS))
+        doc = pymupdf.open()
+        for p in range(pages):
+            page = doc.new_page()
+            page.insert_text((50, 40), f"{topic.upper()} 101 - Lecture {i}", fontsize=9)
+            page.insert_textbox(pymupdf.Rect(50, 70, 545, 770), sentences(rng, topic, 25), fontsize=10)
+            page.insert_text((50, 810), f"Course notes | page {p + 1}", fontsize=8)
+        path = directory / f"lecture_{i:03d}.pdf"
+        doc.save(path)
+        doc.close()
+        paths.append(path)
+    return paths
+
+
+def make_markdown(directory: Path, count: int, rng) -> list:
+    paths = []
+    for i in range(count):
+        topic = rng.choice(list(TOPICS))
+        body = "\n\n".join(f"## Part {s}\n\n{sentences(rng, topic, 12)}" for s in range(10))
+        path = directory / f"notes_{i:03d}.md"
+        path.write_text(f"# {topic.title()} notes {i}\n\n{body}\n")
+        paths.append(path)
+    return paths
+
+
+def make_clips(directory: Path, count: int, seconds: float, rng) -> list:
+    """Mono 16 kHz WAVs of tone bursts separated by pauses, like bench_long_audio.py."""
+    paths = []
+    for i in range(count):
+        total = int(seconds * SAMPLE_RATE)
+        audio = np.zeros(total, dtype=np.float32)
+        pos = 0
+        while pos < total:
+            t = np.arange(min(int(rng.uniform(1, 4) * SAMPLE_RATE), total - pos)) / SAMPLE_RATE
+            audio[pos:pos + len(t)] = 0.3 * np.sin(2 * np.pi * rng.uniform(120, 260) * t)
+            pos += len(t) + int(rng.uniform(0.2, 0.8) * SAMPLE_RATE)
+        path = directory / f"clip_{i:03d}.wav"
+        with wave.open(str(path), "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(SAMPLE_RATE)
+            out.writeframes((audio * 32767).astype(np.int16).tobytes())
+        paths.append(path)
+    return paths
+
+
+def read_wav(path) -> np.ndarray:
+    with wave.open(str(path), "rb") as f:
+        return np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16).astype(np.float32) / 32768
+
+
+def build_stages(workdir: Path, scale: float, whisper_model: str = None) -> dict:
+    """Generate inputs and return {stage: (ops, items per op, unit)}, built lazily per stage."""
+    from src.parsers.audio_parser import find_silence_splits
+    from src.parsers.embed_parser import chunk_text, clean_parsed, prepare_chunks, save_to_chroma
+    from src.parsers.pdf_parser import PDFParser
+    from src.parsers.text_parser import TextParser
+    from src.storage.metadata_index import MetadataIndex
+    from src.utils.embedders import HashEmbedder
+
+    rng = random.Random(0)
+    n = lambda base: max(2, int(base * scale))
+    pdfs = make_pdfs(workdir, n(12), 10, rng)
+    markdown = make_markdown(workdir, n(40), rng)
+    parsed = []
+    for i, path in enumerate(pdfs):
+        doc = PDFParser().extract_text(path)
+        doc.update({"file_id": f"doc{i}", "user_id": "bench_suite", "class": "BENCH 101", "topic": "bench"})
+        parsed.append(doc)
+    cleaned = clean_parsed(parsed)
+    embedder = HashEmbedder()
+    client = None
+
+    def chroma():
+        nonlocal client
+        if client is None:
+            import chromadb
+            client = chromadb.EphemeralClient()
+            save_to_chroma(prepare_chunks(cleaned), embedding_function=embedder, client=client,
+                           metadata_index=MetadataIndex())
+        return client
+
+    def stage_pdf_extract():
+        return [lambda p=p: PDFParser().extract_text(p) for p in pdfs], [10] * len(pdfs), "pages"
+
+    def stage_text_extract():
+        return [lambda p=p: TextParser().extract_text(p) for p in markdown], [1] * len(markdown), "files"
+
+    def stage_clean():
+        return [lambda d=d: clean_parsed([d]) for d in parsed], [1] * len(parsed), "docs"
+
+    def stage_chunk_text():
+        counts = [len(chunk_text(d["text"], boundary="sentence")) for d in cleaned]
+        return [lambda d=d: chunk_text(d["text"], boundary="sentence") for d in cleaned], counts, "chunks"
+
+    def stage_prepare_chunks():
+        counts = [len(prepare_chunks([d])["bench_suite"]) for d in cleaned]
+        return [lambda d=d: prepare_chunks([d]) for d in cleaned], counts, "chunks"
+
+    def stage_save_to_chroma():
+        target = chroma()
+        user_chunks = [prepare_chunks([d]) for d in cleaned]
+        ops = [lambda c=c: save_to_chroma(c, embedding_function=embedder, client=target,
+                                          metadata_index=MetadataIndex()) for c in user_chunks]
+        return ops, [len(c["bench_suite"]) for c in user_chunks], "chunks"
+
+    def stage_search():
+        from src.parsers.search_service import SearchService
+        service = SearchService(client=chroma(), embedding_function=embedder, query_cache_size=0,
+                                result_cache_size=0, metadata_index=MetadataIndex())
+        queries = [sentences(rng, rng.choice(list(TOPICS)), 1) for _ in range(n(50))]
+        ops = [lambda q=q: service.search_similar_chunks(q, "bench_suite", n_results=5) for q in queries]
+        return ops, [1] * len(ops), "queries"
+
+    def stage_audio_split():
+        clips = make_clips(workdir, n(10), 30.0, rng)
+        ops = [lambda c=c: find_silence_splits(read_wav(c), target_seconds=5.0, search_seconds=1.0) for c in clips]
+        return ops, [30] * len(clips), "audio_seconds"
+
+    def stage_transcribe():
+        from src.parsers.audio_parser import AudioParser
+        clips = make_clips(workdir, 3, 10.0, rng)
+        audio_parser = AudioParser(whisper_model)
+        return [lambda c=c: audio_parser.transcribe(c) for c in clips], [10] * len(clips), "audio_seconds"
+
+    stages = {
+        "pdf_extract": stage_pdf_extract,
+        "text_extract": stage_text_extract,
+        "clean": stage_clean,
+        "chunk_text": stage_chunk_text,
+        "prepare_chunks": stage_prepare_chunks,
+        "save_to_chroma": stage_save_to_chroma,
+        "search": stage_search,
+        "audio_split": stage_audio_split,
+    }
+    if whisper_model:
+        stages["transcribe"] = stage_transcribe
+    return stages
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_stage(ops, items, unit, repeat: int = 5, min_seconds: float = 0.5) -> dict:
+    ops[0]()
+    latencies, passes = [], []
+    # Short stages get extra passes so one scheduler hiccup cannot decide the best pass
+    while len(passes) < repeat or sum(passes) < min_seconds:
+        start = time.perf_counter()
+        for op in ops:
+            began = time.perf_counter()
+            op()
+            latencies.append(time.perf_counter() - began)
+        passes.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    for op in ops:
+        op()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    best = min(passes)
+    return {
+        "passes": len(passes),
+        "ops": len(latencies),
+        "items": sum(items),
+        "unit": unit,
+        "best_pass_seconds": round(best, 4),
+        # Best of the passes: noise from other processes only ever slows a pass down
+        "items_per_sec": round(sum(items) / best, 2) if best else 0.0,
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "peak_mb": round(peak / 1024 ** 2, 2)
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_ms: float = 0.5, min_mb: float = 1.0) -> list:
+    """
+    Stages that got worse than baseline by more than threshold (a fraction).
+
+    Latency and memory also have to grow by min_ms / min_mb in absolute terms,
+    so sub-millisecond jitter on tiny stages is not reported.
+    """
+    regressions = []
+    for name, stage in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if stage["items_per_sec"] < base["items_per_sec"] * (1 - threshold):
+            regressions.append({"stage": name, "metric": "items_per_sec",
+                                "baseline": base["items_per_sec"], "current": stage["items_per_sec"]})
+        if stage["p50_ms"] > max(base["p50_ms"] * (1 + threshold), base["p50_ms"] + min_ms):
+            regressions.append({"stage": name, "metric": "p50_ms", "baseline": base["p50_ms"], "current": stage["p50_ms"]})
+        if stage["peak_mb"] > max(base["peak_mb"] * (1 + threshold), base["peak_mb"] + min_mb):
+            regressions.append({"stage": name, "metric": "peak_mb", "baseline": base["peak_mb"], "current": stage["peak_mb"]})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier on the number of generated inputs')
+    parser.add_argument('--repeat', type=int, default=5, help='Minimum timed passes over each stage\'s inputs')
+    parser.add_argument('--stages', default=None, help='Comma-separated subset of stages to run')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='Write the results to --baseline')
+    parser.add_argument('--check', action='store_true', help='Compare with --baseline and exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative slowdown / growth')
+    parser.add_argument('--confirm', type=int, default=2,
+                        help='With --check, re-measure a regressed stage up to this many times before reporting it')
+    parser.add_argument('--whisper-model', default=None, help='Also time transcription with this Whisper model')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.check:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("scale") != args.scale:
+            parser.error(f"baseline was recorded at --scale {baseline['meta'].get('scale')}")
+
+    results, regressions = {}, []
+    with tempfile.TemporaryDirectory() as tmp:
+        # Parsers and save_to_chroma log to stdout; keep stdout for the JSON report
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            stages = build_stages(Path(tmp), args.scale, args.whisper_model)
+            selected = args.stages.split(',') if args.stages else list(stages)
+            unknown = set(selected) - set(stages)
+            if unknown:
+                parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+            for name in selected:
+                results[name] = run_stage(*stages[name](), repeat=args.repeat)
+                print(f"[BENCH] {name}: {results[name]['items_per_sec']} {results[name]['unit']}/s, "
+                      f"p95 {results[name]['p95_ms']} ms", file=sys.stderr)
+                if baseline is None:
+                    continue
+                stage_regressions = compare({name: results[name]}, baseline["stages"], args.threshold)
+                for _ in range(args.confirm):
+                    if not stage_regressions:
+                        break
+                    # A slow run on a shared machine is common; only a repeatable slowdown is a regression
+                    print(f"[BENCH] {name}: possible regression, measuring again", file=sys.stderr)
+                    results[name] = run_stage(*stages[name](), repeat=args.repeat)
+                    stage_regressions = compare({name: results[name]}, baseline["stages"], args.threshold)
+                regressions.extend(stage_regressions)
+
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "scale": args.scale, "repeat": args.repeat},
+        "stages": results
+    }
+    if baseline is not None:
+        report["regressions"] = regressions
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    print(json.dumps(report, indent=2))
+    if report.get("regressions"):
+        for regression in report["regressions"]:
+            print(f"❌ {regression['stage']} {regression['metric']}: {regression['baseline']} -> {regression['current']}",
+                  file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,58 @@
-import boto3
+import argparse
+import contextlib
+import json
 import os
 import sys
-import json
+import time
+
+import boto3
+
+from src.utils.aws_utils import AWSManager
 
 # Usage: python list_user_files_dynamodb.py <user_id>
-if len(sys.argv) < 2:
-    print("Usage: python list_user_files_dynamodb.py <user_id>")
-    sys.exit(1)
-
-user_id = sys.argv[1]
-
-table_name = os.environ.get("AWS_DYNAMODB_TABLE")
-region = os.environ.get("AWS_REGION", "us-east-2")
-
-if not table_name:
-    print("AWS_DYNAMODB_TABLE environment variable not set!")
-    sys.exit(1)
-
-dynamodb = boto3.resource('dynamodb', region_name=region)
-table = dynamodb.Table(table_name)
-
-# Query for all files with the given user_id
-response = table.scan(
-    FilterExpression='user_id = :uid',
-    ExpressionAttributeValues={':uid': user_id}
-)
-
-items = response.get('Items', [])
-
-print(json.dumps(items, indent=2, default=str))
-print(f"\nFound {len(items)} files for user_id={user_id}")
-
-if items:
-    print("\n--- File IDs and 'text' field status for all records ---")
-    valid_count = 0
-    for idx, record in enumerate(items):
-        file_id = record.get('file_id', f'index_{idx}')
-        has_text = ('text' in record and bool(record['text']))
-        print(f"[{idx}] file_id: {file_id} | text present: {has_text}")
-        if not has_text:
-            print(f"    [DEBUG] Record missing/empty 'text': {json.dumps(record, indent=2, default=str)}")
-        else:
-            valid_count += 1
-    print(f"\nTotal records: {len(items)} | Valid for embedding: {valid_count} | Skipped: {len(items) - valid_count}")
-else:
-    print("No files found for this user.")
+#        python list_user_files_dynamodb.py --all --segments 8   (admin audit of every user)
+#
+# One JSON object per file is streamed to stdout as pages arrive; the summary goes to stderr.
+
+DEFAULT_FIELDS = ['user_id', 'file_id', 'filename', 'class', 'topic', 'file_type', 's3_key', 'uploaded_at']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List file metadata from DynamoDB as NDJSON.")
+    parser.add_argument('user_id', nargs='?', help='User whose files to list (a key-condition query)')
+    parser.add_argument('--all', action='store_true', help='List every user\'s files with a parallel segmented scan')
+    parser.add_argument('--segments', type=int, default=4, help='Parallel scan segments (threads) with --all')
+    parser.add_argument('--fields', default=','.join(DEFAULT_FIELDS),
+                        help='Comma-separated attributes to fetch ("*" for all)')
+    parser.add_argument('--page-size', type=int, default=None, help='Items per DynamoDB page')
+    args = parser.parse_args()
+
+    if not args.user_id and not args.all:
+        parser.error("a user_id is required unless --all is given")
+    if not os.environ.get("AWS_DYNAMODB_TABLE"):
+        print("AWS_DYNAMODB_TABLE environment variable not set!", file=sys.stderr)
+        sys.exit(1)
+
+    # AWSManager logs its configuration on stdout; keep stdout for the NDJSON stream
+    region = os.environ.get("AWS_REGION", "us-east-2")
+    with contextlib.redirect_stdout(sys.stderr):
+        manager = AWSManager(s3_client=boto3.client('s3', region_name=region),
+                             dynamodb=boto3.resource('dynamodb', region_name=region))
+    projection = None if args.fields.strip() == '*' else [f.strip() for f in args.fields.split(',') if f.strip()]
+
+    start = time.perf_counter()
+    if args.all:
+        items = manager.scan_files(args.segments, projection=projection, page_size=args.page_size)
+    else:
+        items = manager.iter_files(args.user_id, page_size=args.page_size, projection=projection)
+    count = 0
+    for item in items:
+        print(json.dumps(item, default=str))
+        count += 1
+
+    scope = "all users" if args.all else f"user_id={args.user_id}"
+    print(f"Found {count} files for {scope} in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,11 @@
 # Unified document parsing/conversion API
-from .document import PDFParser, AudioParser
+# Parsers are resolved lazily so that lightweight modules in this package
+# (e.g. the search service) can be imported without loading pymupdf/whisper.
+__all__ = ["PDFParser", "AudioParser", "DocxParser", "PptxParser", "TextParser", "get_parser"]
 
-__all__ = ["PDFParser", "AudioParser"]
\ No newline at end of file
+
+def __getattr__(name):
+    if name in __all__:
+        from . import document
+        return getattr(document, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,81 +1,328 @@
 import whisper
+import numpy as np
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterator, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import argparse
 import json
+import multiprocessing
+import os
 import sys
+import threading
+import time
+
+# Add the project root to sys.path for absolute imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.storage.file_store import PARSE_CACHE_PATH, FileStore
+
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+
+# Whisper models loaded in this process, keyed by model size. Loading a model
+# costs seconds and hundreds of MB, so every AudioParser shares one copy.
+_MODEL_CACHE = {}
+_MODEL_LOAD_SECONDS = {}
+_MODEL_LOCK = threading.Lock()
+
+def load_model(model_size: str = "small"):
+    """
+    Load a Whisper model once per process and reuse it afterwards.
+    
+    Args:
+        model_size: Size of the Whisper model ('tiny', 'base', 'small', 'medium', 'large')
+        
+    Returns:
+        The loaded Whisper model
+    """
+    with _MODEL_LOCK:
+        if model_size not in _MODEL_CACHE:
+            start = time.perf_counter()
+            _MODEL_CACHE[model_size] = whisper.load_model(model_size)
+            _MODEL_LOAD_SECONDS[model_size] = time.perf_counter() - start
+        return _MODEL_CACHE[model_size]
+
+def model_load_seconds() -> Dict[str, float]:
+    """Time spent loading each cached model size in this process."""
+    return dict(_MODEL_LOAD_SECONDS)
+
+def clean_segment(segment: Dict) -> Optional[Dict]:
+    """Return the cleaned segment, or None if it is most likely silence (no_speech_prob >= 0.95)."""
+    if segment["no_speech_prob"] >= 0.95:
+        return None
+    return {
+        "start": segment["start"],
+        "end": segment["end"],
+        "text": segment["text"].strip(),
+        "avg_logprob": segment["avg_logprob"],
+        "no_speech_prob": segment["no_speech_prob"]
+    }
+
+def find_silence_splits(audio: np.ndarray, sample_rate: int = SAMPLE_RATE, target_seconds: float = 300.0,
+                        search_seconds: float = 30.0, frame_seconds: float = 0.05) -> List[Tuple[int, int]]:
+    """
+    Cut audio into pieces of roughly target_seconds at silence boundaries.
+    
+    Each cut is moved to the quietest frame within +/- search_seconds of the
+    target position, so pieces rarely split a word. Runs in linear time.
+    
+    Args:
+        audio: Mono float32 samples
+        sample_rate: Samples per second
+        target_seconds: Desired piece length
+        search_seconds: How far from the target a cut may move (at most a quarter of target_seconds)
+        frame_seconds: Frame length used for the energy envelope
+        
+    Returns:
+        List of (start_sample, end_sample) spans covering the whole input
+    """
+    total = len(audio)
+    target = int(target_seconds * sample_rate)
+    if total <= target:
+        return [(0, total)]
+
+    frame = max(1, int(frame_seconds * sample_rate))
+    num_frames = total // frame
+    frames = audio[:num_frames * frame].reshape(num_frames, frame)
+    # Per-frame energy without materialising a squared copy of the audio
+    energy = np.einsum('ij,ij->i', frames, frames)
+    # Never let a cut move more than a quarter of a piece away from its target
+    window = int(min(search_seconds, target_seconds / 4) * sample_rate) // frame
+
+    spans = []
+    start = 0
+    while total - start > target:
+        ideal = (start + target) // frame
+        lo = max(start // frame + 1, ideal - window)
+        hi = min(num_frames, ideal + window + 1)
+        if lo < hi:
+            # Quietest frame in the window; ties go to the one nearest the target
+            quietest = lo + np.flatnonzero(energy[lo:hi] == energy[lo:hi].min())
+            cut = int(quietest[np.argmin(np.abs(quietest - ideal))]) * frame + frame // 2
+        else:
+            cut = start + target
+        spans.append((start, cut))
+        start = cut
+    spans.append((start, total))
+    return spans
+
+def _transcribe_piece(model_size: str, audio: np.ndarray, offset_seconds: float) -> Dict:
+    """Decode one piece of audio and shift its segment timestamps to absolute time."""
+    result = load_model(model_size).transcribe(audio)
+    segments = [
+        {**segment, "start": segment["start"] + offset_seconds, "end": segment["end"] + offset_seconds}
+        for segment in result.get("segments", [])
+    ]
+    return {"language": result.get("language"), "segments": segments}
 
 class AudioParser:
-    def __init__(self, model_size: str = "small"):
+    # Bump when transcribe() output changes so cached transcripts are not reused
+    PARSER_VERSION = "1"
+
+    def __init__(self, model_size: str = "small", cache: Optional[FileStore] = None):
         """
         Initialize the audio parser with a specific Whisper model.
         
         Args:
             model_size: Size of the Whisper model to use ('tiny', 'base', 'small', 'medium', 'large')
+            cache: Parse cache consulted before transcribing (None always transcribes)
         """
-        self.model = whisper.load_model(model_size)
+        self.model_size = model_size
         self.supported_extensions = {'.mp3', '.wav', '.m4a', '.ogg'}
+        self.cache = cache
+        # Transcriptions actually decoded by this parser (cache hits are not counted)
+        self.decoded = 0
+
+    @property
+    def model(self):
+        """
+        The Whisper model, loaded on first use.
+
+        Long-audio mode decodes in worker processes that load their own copy,
+        so the parent only pays for the model if it decodes in-process.
+        """
+        return load_model(self.model_size)
+
+    def _cache_parser(self, long_audio: bool, chunk_seconds: float) -> str:
+        # Transcripts depend on the model size and on how the audio was cut into
+        # pieces (long-audio split points follow chunk_seconds), so each is cached separately
+        if long_audio:
+            return f"AudioParser/{self.model_size}/long/{chunk_seconds:g}"
+        return f"AudioParser/{self.model_size}"
+
+    def _check_file(self, file_path: str | Path) -> Path:
+        if not isinstance(file_path, Path):
+            file_path = Path(file_path)
+            
+        if file_path.suffix.lower() not in self.supported_extensions:
+            raise ValueError(f"Unsupported file type: {file_path.suffix}")
+        return file_path
 
-    def transcribe(self, file_path: str | Path) -> Dict[str, str]:
+    def transcribe(self, file_path: str | Path, long_audio: bool = False, chunk_seconds: float = 300.0,
+                   max_workers: Optional[int] = None) -> Dict[str, str]:
         """
         Transcribe audio file to text using Whisper.
         
         Args:
             file_path: Path to the audio file
+            long_audio: Split the file at silences and decode the pieces in parallel
+            chunk_seconds: Target piece length in long-audio mode
+            max_workers: Worker processes in long-audio mode (derived from the core count if omitted)
             
         Returns:
             Dict containing transcribed text and metadata
         """
-        if not isinstance(file_path, Path):
-            file_path = Path(file_path)
-            
-        if file_path.suffix.lower() not in self.supported_extensions:
-            raise ValueError(f"Unsupported file type: {file_path.suffix}")
-            
+        file_path = self._check_file(file_path)
+        if self.cache is not None:
+            return self.cache.get_or_parse(file_path, self._cache_parser(long_audio, chunk_seconds), self.PARSER_VERSION,
+                                           lambda: self._transcribe(file_path, long_audio, chunk_seconds, max_workers))
+        return self._transcribe(file_path, long_audio, chunk_seconds, max_workers)
+
+    def _transcribe(self, file_path: Path, long_audio: bool, chunk_seconds: float,
+                    max_workers: Optional[int]) -> Dict[str, str]:
+        self.decoded += 1
         try:
-            result = self.model.transcribe(str(file_path))
-            
-            # Clean up segments and filter out high no_speech_prob segments
             clean_segments = []
-            filtered_text = []
-            
-            for segment in result.get("segments", []):
-                # Only include segments with no_speech_prob < 0.95
-                if segment["no_speech_prob"] < 0.95:
-                    clean_segments.append({
-                        "start": segment["start"],
-                        "end": segment["end"],
-                        "text": segment["text"].strip(),
-                        "avg_logprob": segment["avg_logprob"],
-                        "no_speech_prob": segment["no_speech_prob"]
-                    })
-                    filtered_text.append(segment["text"].strip())
+            if long_audio:
+                audio = whisper.load_audio(str(file_path))
+                language = None
+                for piece in self._decode_pieces(audio, chunk_seconds, max_workers):
+                    language = language or piece["language"]
+                    clean_segments.extend(filter(None, map(clean_segment, piece["segments"])))
+                language = language or "unknown"
+                duration = len(audio) / SAMPLE_RATE
+            else:
+                result = self.model.transcribe(str(file_path))
+                # Clean up segments and filter out high no_speech_prob segments
+                for segment in result.get("segments", []):
+                    # Only include segments with no_speech_prob < 0.95
+                    cleaned = clean_segment(segment)
+                    if cleaned is not None:
+                        clean_segments.append(cleaned)
+                language = result.get("language", "unknown")
+                duration = result.get("duration", 0)
             
-            return {
-                "text": " ".join(filtered_text),
-                "filename": file_path.name,
-                "file_type": "audio",
-                "language": result.get("language", "unknown"),
-                "segments": clean_segments,
-                "duration": result.get("duration", 0),
-                "class": "",  # Will be filled by server
-                "topic": ""   # Will be filled by server
-            }
+            return self._result(file_path, clean_segments, language, duration)
             
         except Exception as e:
             raise Exception(f"Error processing audio file {file_path}: {str(e)}")
 
+    @staticmethod
+    def _result(file_path: Path, segments: List[Dict], language: str, duration: float) -> Dict:
+        return {
+            "text": " ".join(segment["text"] for segment in segments),
+            "filename": file_path.name,
+            "file_type": "audio",
+            "language": language,
+            "segments": segments,
+            "duration": duration,
+            "class": "",  # Will be filled by server
+            "topic": ""   # Will be filled by server
+        }
+
+    def iter_segments(self, file_path: str | Path, chunk_seconds: float = 300.0,
+                      max_workers: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Stream cleaned segments of a long recording as soon as each piece is decoded.
+        
+        The file is cut at silence boundaries and the pieces are decoded in parallel
+        across a process pool; segments are yielded in order with absolute timestamps,
+        so downstream chunking/embedding can start before transcription finishes.
+        Cached transcripts are replayed from the parse cache, and a fresh one is
+        stored there once the last piece is decoded.
+        
+        Args:
+            file_path: Path to the audio file
+            chunk_seconds: Target piece length
+            max_workers: Worker processes (derived from the core count if omitted)
+            
+        Yields:
+            Cleaned segment dicts, as in transcribe()["segments"]
+        """
+        file_path = self._check_file(file_path)
+        key = None
+        if self.cache is not None:
+            key = self.cache.cache_key(file_path, self._cache_parser(True, chunk_seconds), self.PARSER_VERSION)
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield from cached["segments"]
+                return
+
+        self.decoded += 1
+        audio = whisper.load_audio(str(file_path))
+        clean_segments = []
+        language = None
+        for piece in self._decode_pieces(audio, chunk_seconds, max_workers):
+            language = language or piece["language"]
+            for segment in piece["segments"]:
+                cleaned = clean_segment(segment)
+                if cleaned is not None:
+                    clean_segments.append(cleaned)
+                    yield cleaned
+        if key is not None:
+            self.cache.put(key, self._result(file_path, clean_segments, language or "unknown",
+                                             len(audio) / SAMPLE_RATE))
+
+    def _decode_pieces(self, audio: np.ndarray, chunk_seconds: float,
+                       max_workers: Optional[int]) -> Iterator[Dict]:
+        """Decode silence-split pieces in a process pool, yielding results in order."""
+        from src.parsers.transcription_pool import default_pool_size, init_worker
+
+        spans = find_silence_splits(audio, target_seconds=chunk_seconds)
+        if len(spans) == 1 or max_workers == 1:
+            # Nothing to parallelise; decode in this process (loading the model here on first use)
+            for start, end in spans:
+                yield _transcribe_piece(self.model_size, audio[start:end], start / SAMPLE_RATE)
+            return
+
+        workers, threads = default_pool_size(max_workers)
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(self.model_size, threads)
+        )
+        try:
+            # Keep only a bounded number of pieces in flight so the pickled
+            # audio queued for workers does not double the memory footprint
+            in_flight = deque()
+            pending = iter(spans)
+
+            def submit_next():
+                span = next(pending, None)
+                if span is not None:
+                    start, end = span
+                    in_flight.append(pool.submit(_transcribe_piece, self.model_size, audio[start:end], start / SAMPLE_RATE))
+
+            for _ in range(workers * 2):
+                submit_next()
+            while in_flight:
+                result = in_flight.popleft().result()
+                submit_next()
+                yield result
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python audio_parser.py <audio_file_path>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Transcribe an audio file with Whisper.")
+    parser.add_argument('file_path', help='Path to the audio file')
+    parser.add_argument('--model', default='small', help='Whisper model size')
+    parser.add_argument('--long-audio', action='store_true', help='Split at silences and decode pieces in parallel')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes in long-audio mode')
+    parser.add_argument('--cache-path', default=PARSE_CACHE_PATH,
+                        help='Parse cache directory (default $PARSE_CACHE_PATH; none disables caching)')
+    parser.add_argument('--no-cache', action='store_true', help='Always transcribe, never reuse cached transcripts')
+    args = parser.parse_args()
 
-    file_path = sys.argv[1]
-    parser = AudioParser()
+    file_path = args.file_path
+    cache = FileStore(args.cache_path) if args.cache_path and not args.no_cache else None
+    audio_parser = AudioParser(args.model, cache)
     
     try:
-        result = parser.transcribe(file_path)
+        result = audio_parser.transcribe(file_path, long_audio=args.long_audio, max_workers=args.workers)
         # Print the result as JSON to stdout
         print(json.dumps(result))
+        if cache is not None:
+            print(f"[PARSE CACHE] {json.dumps(cache.stats())}", file=sys.stderr)
     except Exception as e:
         print(json.dumps({"error": str(e)}), file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,410 @@
+import argparse
+import json
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# Add the project root to sys.path for absolute imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.storage.conversion_cache import ConversionCache, file_digest
+from src.utils.ndjson_server import make_unix_socket_server, serve_stdio
+
+SOFFICE = os.getenv("SOFFICE_PATH") or shutil.which("soffice") or shutil.which("libreoffice") or "soffice"
+UNOCONV = os.getenv("UNOCONV_PATH") or shutil.which("unoconv")
+CONVERSION_CACHE_PATH = os.getenv("CONVERSION_CACHE_PATH", "pdf_cache")
+
+try:
+    # LibreOffice's Python bridge (python3-uno); lets this process drive a resident office directly
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:
+    uno = None
+
+# PDF export filter per document type; anything else is exported as a text document
+_PDF_FILTERS = (
+    ("com.sun.star.sheet.SpreadsheetDocument", "calc_pdf_Export"),
+    ("com.sun.star.presentation.PresentationDocument", "impress_pdf_Export"),
+    ("com.sun.star.drawing.DrawingDocument", "draw_pdf_Export"),
+)
+
+
+def office_client() -> Optional[str]:
+    """How conversions reach a resident office: "uno" (in-process bridge), "unoconv", or None (cold soffice runs)."""
+    if uno is not None:
+        return "uno"
+    if UNOCONV is not None:
+        return "unoconv"
+    return None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _uno_property(name: str, value):
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+class OfficeInstance:
+    """
+    One headless LibreOffice with its own user profile.
+
+    When a UNO client is available (LibreOffice's Python bridge, or else
+    unoconv) the office process is started once as a socket listener and
+    every conversion is sent to it, so only the first one pays the office
+    startup. Without either, each conversion is a cold soffice --convert-to
+    run: the per-instance profile only keeps parallel conversions from
+    colliding (sharing one profile is what makes parallel soffice calls
+    fail), and there is no warm-up benefit.
+
+    UNO calls into the resident office run under the same per-conversion
+    deadline as a soffice/unoconv run: a document that hangs the office gets
+    it killed, and the next conversion on this instance restarts it.
+    """
+
+    def __init__(self, index: int, base_dir: str | Path, timeout: float = 120, startup_timeout: float = 60):
+        self.index = index
+        self.profile = Path(base_dir) / f"profile_{index}"
+        self.profile.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.client = office_client()
+        self.port = None
+        self.process = None
+        self._desktop = None
+        self.conversions = 0
+        self.restarts = 0
+
+    @property
+    def profile_url(self) -> str:
+        return self.profile.resolve().as_uri()
+
+    @property
+    def connection(self) -> str:
+        return f"socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext"
+
+    def start(self):
+        if self.client is None or self.process is not None:
+            return
+        self.port = _free_port()
+        self.process = subprocess.Popen([
+            SOFFICE, "--headless", "--invisible", "--nologo", "--norestore", "--nodefault",
+            f"-env:UserInstallation={self.profile_url}", f"--accept={self.connection}"
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self._wait_for_listener()
+
+    def _wait_for_listener(self):
+        """Block until the office accepts connections, so the first conversion does not race its startup."""
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                self.process = None
+                raise RuntimeError(f"Office instance {self.index} exited during startup")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=1):
+                    return
+            except OSError:
+                if time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError(f"Office instance {self.index} did not start listening "
+                                       f"within {self.startup_timeout}s")
+                time.sleep(0.1)
+
+    def convert(self, input_path: Path, output_dir: Path) -> Path:
+        """Convert one file to output_dir/<stem>.pdf and return that path."""
+        output_pdf = output_dir / (input_path.stem + ".pdf")
+        if self.process is not None and self.process.poll() is not None:
+            # Killed by a conversion deadline or crashed since the last conversion
+            print(f"[WARNING] Office instance {self.index} exited (code {self.process.returncode}); restarting",
+                  file=sys.stderr)
+            self.restart()
+        if self.client is not None and self.process is None:
+            print(f"[WARNING] Office instance {self.index} is not running; converting {input_path.name} "
+                  f"with a cold soffice start", file=sys.stderr)
+        if self.process is not None and self.client == "uno":
+            self._uno_convert(input_path, output_pdf)
+        else:
+            if self.process is not None:
+                command = [UNOCONV, "--connection", self.connection, "-f", "pdf", "-o", str(output_pdf),
+                           str(input_path)]
+            else:
+                command = [SOFFICE, f"-env:UserInstallation={self.profile_url}", "--headless",
+                           "--convert-to", "pdf", "--outdir", str(output_dir), str(input_path)]
+            result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=self.timeout)
+            if result.returncode != 0:
+                raise RuntimeError(f"Conversion failed: {result.stderr.decode(errors='replace') or result.stdout.decode(errors='replace')}")
+        if not output_pdf.exists():
+            raise RuntimeError(f"Conversion failed: no PDF written for {input_path.name}")
+        self.conversions += 1
+        return output_pdf
+
+    def _uno_convert(self, input_path: Path, output_pdf: Path):
+        # UNO calls have no timeout of their own; killing the office makes a blocked call
+        # fail once the bridge loses its connection
+        process = self.process
+        expired = threading.Event()
+
+        def kill():
+            expired.set()
+            process.kill()
+
+        watchdog = threading.Timer(self.timeout, kill)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            self._uno_load_and_store(input_path, output_pdf)
+        except Exception:
+            if not expired.is_set():
+                raise
+        finally:
+            watchdog.cancel()
+        if expired.is_set():
+            raise TimeoutError(f"Conversion of {input_path.name} exceeded {self.timeout}s; "
+                               f"office instance {self.index} was killed")
+
+    def _uno_load_and_store(self, input_path: Path, output_pdf: Path):
+        if self._desktop is None:
+            local = uno.getComponentContext()
+            resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+            context = resolver.resolve(f"uno:{self.connection}")
+            self._desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+        document = self._desktop.loadComponentFromURL(input_path.resolve().as_uri(), "_blank", 0,
+                                                      (_uno_property("Hidden", True),))
+        if document is None:
+            raise RuntimeError(f"Conversion failed: office could not open {input_path.name}")
+        try:
+            filter_name = next((name for service, name in _PDF_FILTERS if document.supportsService(service)),
+                               "writer_pdf_Export")
+            document.storeToURL(output_pdf.resolve().as_uri(), (_uno_property("FilterName", filter_name),))
+        finally:
+            document.close(True)
+
+    def restart(self):
+        self.stop()
+        self.restarts += 1
+        self.start()
+
+    def stop(self):
+        self._desktop = None
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+
+
+class ConversionPool:
+    """
+    Pool of warm, isolated office instances that convert documents to PDF.
+
+    Results are cached by source content hash, and concurrent requests for the
+    same content wait for a single conversion instead of running it twice.
+    """
+
+    def __init__(self, size: int = 2, cache: Optional[ConversionCache] = None,
+                 instance_factory=OfficeInstance, timeout: float = 120, work_dir: Optional[str] = None):
+        """
+        Initialize the conversion pool.
+
+        Args:
+            size: Number of office instances (maximum concurrent conversions)
+            cache: Converted-PDF cache (None disables caching)
+            instance_factory: Callable (index, base_dir, timeout) -> instance with start/convert/restart/stop
+            timeout: Seconds allowed per conversion
+            work_dir: Directory for instance profiles (a temporary directory by default)
+        """
+        self.size = size
+        self.cache = cache
+        self._work_dir = Path(work_dir or tempfile.mkdtemp(prefix="office_pool_"))
+        self._instances = [instance_factory(i, self._work_dir, timeout) for i in range(size)]
+        self._idle = queue.Queue()
+        if office_client() is None:
+            print("[WARNING] Neither LibreOffice's Python bridge (python3-uno) nor unoconv is installed: "
+                  "office instances cannot stay resident and every conversion is a cold soffice start. "
+                  "Install python3-uno or unoconv to keep them warm.", file=sys.stderr)
+        for instance in self._instances:
+            instance.start()
+            self._idle.put(instance)
+        self._executor = ThreadPoolExecutor(max_workers=size)
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Lock] = {}
+        self._metrics = {"conversions": 0, "cache_hits": 0, "failures": 0, "convert_seconds_total": 0.0}
+
+    def convert(self, input_path: str | Path, output_dir: Optional[str | Path] = None) -> Dict:
+        """
+        Convert one file to PDF, serving it from the cache when the same content was converted before.
+
+        Args:
+            input_path: Source document
+            output_dir: Where <stem>.pdf is written (defaults to the source's directory)
+
+        Returns:
+            {"input": ..., "output_file": ..., "cached": bool, "seconds": float}
+        """
+        input_path = Path(input_path).resolve()
+        output_dir = Path(output_dir or input_path.parent).resolve()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_pdf = output_dir / (input_path.stem + ".pdf")
+        start = time.perf_counter()
+        digest = file_digest(input_path) if self.cache is not None else None
+
+        key_lock = self._digest_lock(digest)
+        try:
+            with key_lock:
+                cached = self.cache.get(digest) if digest else None
+                if cached is not None:
+                    try:
+                        shutil.copyfile(cached, output_pdf)
+                    except FileNotFoundError:
+                        # Evicted by another process since get(); convert instead
+                        cached = None
+                if cached is not None:
+                    with self._lock:
+                        self._metrics["cache_hits"] += 1
+                    return {"input": str(input_path), "output_file": str(output_pdf), "cached": True,
+                            "seconds": round(time.perf_counter() - start, 4)}
+                self._convert_with_instance(input_path, output_dir)
+                if digest:
+                    self.cache.put(digest, output_pdf)
+        finally:
+            self._release_digest_lock(digest, key_lock)
+
+        seconds = time.perf_counter() - start
+        with self._lock:
+            self._metrics["conversions"] += 1
+            self._metrics["convert_seconds_total"] += seconds
+        return {"input": str(input_path), "output_file": str(output_pdf), "cached": False,
+                "seconds": round(seconds, 4)}
+
+    def _digest_lock(self, digest: Optional[str]) -> threading.Lock:
+        if digest is None:
+            return threading.Lock()
+        with self._lock:
+            return self._inflight.setdefault(digest, threading.Lock())
+
+    def _release_digest_lock(self, digest: Optional[str], key_lock: threading.Lock):
+        # Callers still queued on key_lock hold their own reference; later ones find the result cached
+        if digest is not None:
+            with self._lock:
+                if self._inflight.get(digest) is key_lock:
+                    del self._inflight[digest]
+
+    def _convert_with_instance(self, input_path: Path, output_dir: Path) -> Path:
+        instance = self._idle.get()
+        try:
+            try:
+                return instance.convert(input_path, output_dir)
+            except Exception:
+                # A wedged office process is the usual cause; retry once on a fresh one
+                instance.restart()
+                return instance.convert(input_path, output_dir)
+        except Exception:
+            with self._lock:
+                self._metrics["failures"] += 1
+            raise
+        finally:
+            self._idle.put(instance)
+
+    def convert_many(self, input_paths: Iterable[str | Path], output_dir: Optional[str | Path] = None) -> List[Dict]:
+        """Convert several files concurrently; failures are reported per file instead of raised."""
+        paths = list(input_paths)
+
+        def convert_one(path):
+            try:
+                return self.convert(path, output_dir)
+            except Exception as e:
+                return {"input": str(path), "error": str(e)}
+
+        return list(self._executor.map(convert_one, paths))
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            snapshot = dict(self._metrics)
+        snapshot.update({
+            "size": self.size,
+            "idle_instances": self._idle.qsize(),
+            "restarts": sum(instance.restarts for instance in self._instances),
+            "persistent_office": office_client() is not None,
+            "office_client": office_client()
+        })
+        if self.cache is not None:
+            snapshot["cache"] = self.cache.stats()
+        return snapshot
+
+    def handle_request(self, request: Dict) -> Dict:
+        """
+        Handle one decoded NDJSON request.
+
+        Supported requests:
+            {"op": "convert", "files": [...], "output_dir": ...}
+            {"op": "metrics"}
+        """
+        op = request.get("op", "convert")
+        if op in ("metrics", "health"):
+            return self.metrics()
+        if op != "convert":
+            return {"error": f"Unknown op: {op}"}
+        files = request.get("files") or ([request["path"]] if request.get("path") else [])
+        if not files:
+            return {"error": "Missing files to convert"}
+        return {"results": self.convert_many(files, request.get("output_dir"))}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        for instance in self._instances:
+            instance.stop()
+        shutil.rmtree(self._work_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert documents to PDF with a pool of warm LibreOffice instances.")
+    parser.add_argument('files', nargs='*', help='Documents to convert (one JSON result per line)')
+    parser.add_argument('--output-dir', default=None, help='Output directory (defaults to each source directory)')
+    parser.add_argument('--stdio', action='store_true', help='Serve NDJSON conversion requests on stdin/stdout')
+    parser.add_argument('--socket', default=None, help='Serve NDJSON conversion requests on this Unix socket')
+    parser.add_argument('--instances', type=int, default=2, help='Office instances kept alive')
+    parser.add_argument('--cache-path', default=CONVERSION_CACHE_PATH, help='Converted-PDF cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='Always convert, never reuse cached PDFs')
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else ConversionCache(args.cache_path)
+    with ConversionPool(args.instances, cache) as pool:
+        if args.socket:
+            server = make_unix_socket_server(pool.handle_request, args.socket, max_workers=args.instances * 2)
+            try:
+                server.serve_forever()
+            finally:
+                server.server_close()
+                os.unlink(args.socket)
+        elif args.stdio:
+            serve_stdio(pool.handle_request, max_workers=args.instances * 2)
+        else:
+            for result in pool.convert_many(args.files, args.output_dir):
+                print(json.dumps(result))
+        print(json.dumps({"metrics": pool.metrics()}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import os
 import subprocess
 import sys
+import tempfile
 from pathlib import Path
 
 def convert_to_pdf(input_path: str, output_dir: str = "."):
@@ -13,9 +14,13 @@ def convert_to_pdf(input_path: str, output_dir: str = "."):
 
     print(f"Converting {input_path.name} to PDF...")
 
+    # A private profile per call: concurrent conversions sharing the default
+    # profile block or fail. For repeated conversions use conversion_pool.py.
+    profile_dir = tempfile.TemporaryDirectory(prefix="lo_profile_")
     try:
         result = subprocess.run([
             "libreoffice",
+            f"-env:UserInstallation={Path(profile_dir.name).as_uri()}",
             "--headless",
             "--convert-to", "pdf",
             "--outdir", str(output_dir),
@@ -32,6 +37,8 @@ def convert_to_pdf(input_path: str, output_dir: str = "."):
     except subprocess.CalledProcessError as e:
         print("❌ LibreOffice conversion error:")
         print(e.stdout.decode(), e.stderr.decode())
+    finally:
+        profile_dir.cleanup()
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
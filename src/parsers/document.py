@@ -1,7 +1,29 @@
 # Canonical import for all document conversion and parsing utilities.
 # Use this module to access PDFParser, AudioParser, and future document handlers in a unified way.
 
+from pathlib import Path
+
 from .pdf_parser import PDFParser
 from .audio_parser import AudioParser
+from .office_parser import DocxParser, PptxParser
+from .text_parser import TextParser
+
+# Parser class per extension. DOCX/PPTX/TXT/MD are read directly; other office
+# formats have no entry and are converted to PDF first (see conversion_pool.py).
+# Classes rather than instances, so only the parser a file needs is constructed.
+PARSERS = {
+    '.pdf': PDFParser,
+    '.mp3': AudioParser, '.wav': AudioParser, '.m4a': AudioParser, '.ogg': AudioParser,
+    '.docx': DocxParser,
+    '.pptx': PptxParser,
+    '.txt': TextParser, '.md': TextParser, '.markdown': TextParser,
+}
+
+
+def get_parser(file_path):
+    """Return a parser instance for file_path's extension, or None if it needs PDF conversion first."""
+    parser_class = PARSERS.get(Path(file_path).suffix.lower())
+    return parser_class() if parser_class is not None else None
+
 
-__all__ = ["PDFParser", "AudioParser"]
+__all__ = ["PDFParser", "AudioParser", "DocxParser", "PptxParser", "TextParser", "get_parser"]
@@ -1,30 +1,153 @@
 import sys
 import json
+import argparse
+import itertools
 import chromadb
 import os
+from typing import Dict, Iterator, List, Optional, Sequence
+
+# Add the project root to sys.path for absolute imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.storage.metadata_index import METADATA_INDEX_FILENAME, MetadataIndex
+from src.storage.paths import CHROMA_DB_PATH
+
+# Output field -> Chroma include name
+FIELDS = {"text": "documents", "metadata": "metadatas"}
+DEFAULT_PAGE_SIZE = 1000
+
+def iter_rows(collection, fields: Sequence[str] = ("text", "metadata"), where: Optional[Dict] = None,
+              offset: int = 0, limit: Optional[int] = None, page_size: int = DEFAULT_PAGE_SIZE,
+              metadata_index: Optional[MetadataIndex] = None) -> Iterator[Dict]:
+    """
+    Yield a collection's rows, with one page of ids and documents in memory at a time.
+
+    When the sidecar metadata index covers the collection, rows come in file_id
+    then chunk order: the index lists each page of chunk ids with a keyset
+    cursor on file_id and the page is fetched by id, so no call grows with the
+    collection. Chroma's where filters cannot compare ids, so other collections
+    (never backfilled, or with ids outside file_id_<chunk_index>) are paged
+    with Chroma's limit/offset in its storage order instead; memory stays
+    bounded but each page rescans the rows before it.
+
+    Args:
+        collection: Chroma collection
+        fields: Output fields besides "id" ("text", "metadata")
+        where: Optional Chroma metadata filter
+        offset: Matching rows to skip (positions in the export order, so pages are stable between calls)
+        limit: Maximum rows to yield (None for all)
+        page_size: Rows fetched per collection.get() call
+        metadata_index: Sidecar index of the collection's files (None always pages by offset)
+
+    Yields:
+        Dicts with "id" plus the requested fields
+    """
+    include = [FIELDS[field] for field in fields]
+    if metadata_index is not None and metadata_index.is_complete(collection.name):
+        rows = _iter_indexed(collection, metadata_index, include, where, offset, limit, page_size)
+    else:
+        rows = _iter_offset(collection, include, where, offset, limit, page_size)
+    for page, i in itertools.islice(rows, limit):
+        row = {"id": page["ids"][i]}
+        for field in fields:
+            values = page[FIELDS[field]]
+            row[field] = values[i] if values is not None else None
+        if "metadata" in row and row["metadata"] is None:
+            row["metadata"] = {}
+        yield row
+
+def _iter_indexed(collection, metadata_index: MetadataIndex, include: List[str], where: Optional[Dict],
+                  offset: int, limit: Optional[int], page_size: int) -> Iterator[tuple]:
+    ids = metadata_index.iter_chunk_ids(collection.name, page_size=page_size)
+    skip = offset
+    if where is None:
+        # Every listed id is a row, so the window is cut from the ids without fetching anything
+        ids = itertools.islice(ids, offset, None if limit is None else offset + limit)
+        skip = 0
+    while True:
+        page_ids = list(itertools.islice(ids, page_size))
+        if not page_ids:
+            return
+        page = collection.get(ids=page_ids, where=where, include=include)
+        # get(ids=...) does not return rows in the requested order
+        positions = {row_id: i for i, row_id in enumerate(page["ids"])}
+        for row_id in page_ids:
+            i = positions.get(row_id)
+            if i is None:
+                # Filtered out by where, or deleted since it was indexed
+                continue
+            if skip:
+                skip -= 1
+                continue
+            yield page, i
+
+def _iter_offset(collection, include: List[str], where: Optional[Dict], offset: int, limit: Optional[int],
+                 page_size: int) -> Iterator[tuple]:
+    end = None if limit is None else offset + limit
+    while end is None or offset < end:
+        size = page_size if end is None else min(page_size, end - offset)
+        page = collection.get(where=where, limit=size, offset=offset, include=include)
+        yield from ((page, i) for i in range(len(page["ids"])))
+        if len(page["ids"]) < size:
+            return
+        offset += size
+
+def dump(collection, out, output_format: str = "json", **kwargs) -> int:
+    """
+    Write a collection's rows to out as they are fetched.
+
+    "ndjson" writes one row per line; "json" writes the same rows wrapped in
+    {"chunks": [...]} without ever building the whole document in memory.
+    Errors are raised to the caller and never written to out, so a failed
+    JSON export is a truncated document rather than a valid-looking one.
+
+    Returns:
+        Number of rows written
+    """
+    count = 0
+    if output_format == "json":
+        out.write('{"chunks": [')
+    for row in iter_rows(collection, **kwargs):
+        if output_format == "json":
+            out.write((", " if count else "") + json.dumps(row))
+        else:
+            out.write(json.dumps(row) + "\n")
+        count += 1
+        if count % DEFAULT_PAGE_SIZE == 0:
+            out.flush()
+    if output_format == "json":
+        limit = kwargs.get("limit")
+        next_offset = kwargs.get("offset", 0) + count if limit is not None and count == limit else None
+        out.write(f'], "next_offset": {json.dumps(next_offset)}}}\n')
+    out.flush()
+    return count
 
 def main():
-    if len(sys.argv) < 2:
-        print(json.dumps({"error": "No collection name provided"}))
+    parser = argparse.ArgumentParser(description="Export the chunks of a ChromaDB collection.")
+    parser.add_argument('collection', nargs='?', help='Collection name')
+    parser.add_argument('--limit', type=int, default=None, help='Maximum rows to export')
+    parser.add_argument('--offset', type=int, default=0, help='Rows to skip (use next_offset from a previous page)')
+    parser.add_argument('--where', default=None, help='Chroma metadata filter as JSON, e.g. \'{"file_id": "abc"}\'')
+    parser.add_argument('--fields', nargs='*', choices=sorted(FIELDS), default=["text", "metadata"],
+                        help='Fields to export besides the id')
+    parser.add_argument('--format', choices=['json', 'ndjson'], default='json', help='Output format')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help='Rows fetched per request')
+    args = parser.parse_args()
+
+    if not args.collection:
+        print(json.dumps({"error": "No collection name provided"}), file=sys.stderr)
         sys.exit(1)
-    collection_name = sys.argv[1]
-    chroma_db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../backend/chroma_db'))
-    client = chromadb.PersistentClient(path=chroma_db_path)
+    client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
+    metadata_index = MetadataIndex(os.path.join(CHROMA_DB_PATH, METADATA_INDEX_FILENAME))
     try:
-        collection = client.get_collection(name=collection_name)
-        results = collection.get()
-        print(json.dumps({
-            "chunks": [
-                {
-                    "id": results["ids"][i] if i < len(results["ids"]) else None,
-                    "text": results["documents"][i],
-                    "metadata": results["metadatas"][i] if i < len(results["metadatas"]) else {}
-                }
-                for i in range(len(results["documents"]))
-            ]
-        }))
+        where = json.loads(args.where) if args.where else None
+        collection = client.get_collection(name=args.collection)
+        dump(collection, sys.stdout, args.format, fields=args.fields, where=where,
+             offset=args.offset, limit=args.limit, page_size=args.page_size, metadata_index=metadata_index)
     except Exception as e:
-        print(json.dumps({"error": str(e)}))
+        # Rows may already be on stdout; report out of band and let the exit status mark the failure
+        if args.format == "ndjson":
+            print(json.dumps({"error": str(e)}), flush=True)
+        print(json.dumps({"error": str(e)}), file=sys.stderr)
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -2,35 +2,106 @@ import os
 import json
 import chromadb
 from dotenv import load_dotenv
-from typing import List, Dict
+from typing import Iterable, List, Dict, Optional
 import tempfile
 import sys
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
 
 # Add the project root to sys.path for absolute imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-# Initialize persistent ChromaDB client
-chroma_client = chromadb.PersistentClient(path="chroma_db")
-
-def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
-    """Split text into overlapping chunks."""
-    chunks = []
-    start = 0
-    text_length = len(text)
-    
-    while start < text_length:
-        end = start + chunk_size
-        chunk = text[start:end]
-        chunks.append(chunk)
-        start = end - overlap
+from src.utils.chunking import chunk_spans, section_spans
+from src.utils.text_utils import clean_document
+from src.utils.dedup import NearDuplicateIndex
+from src.utils.embedders import (
+    DEFAULT_EMBEDDING_MODEL_ID, add_embedder_arguments, check_collection_embedder, embedder_from_args,
+    embedder_identity, get_embedder
+)
+from src.parsers.pdf_parser import page_for_offset
+from src.storage.embedding_cache import EmbeddingCache
+from src.storage.query_cache import COLLECTION_VERSIONS_FILENAME, CollectionVersions
+from src.storage.metadata_index import METADATA_INDEX_FILENAME, MetadataIndex, chunk_id
+from src.storage.bm25_index import BM25_INDEX_FILENAME, BM25Index
+from src.storage.paths import CHROMA_DB_PATH
+
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3")
+# Chunks per embed/upsert batch; bounds memory and stays under Chroma's max batch size
+DEFAULT_BATCH_SIZE = 256
+# Near-duplicate chunk removal for the CLIs; off unless a deployment opts in
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0"))
+DEDUP_SCOPE = os.getenv("DEDUP_SCOPE", "file")
+
+# Persistent ChromaDB client, opened on first use
+_chroma_client = None
+
+def get_chroma_client():
+    global _chroma_client
+    if _chroma_client is None:
+        _chroma_client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
+    return _chroma_client
+
+def embedding_model_id(embedding_function) -> str:
+    """Best-effort identity of an embedding function for cache keys (see embedder_identity)."""
+    return embedder_identity(embedding_function)
+
+def embed_with_cache(documents: List[str], embedding_function, cache: Optional[EmbeddingCache],
+                     model_id: str) -> List[List[float]]:
+    """Return embeddings for documents, only calling the embedding function for cache misses."""
+    if cache is None:
+        return [list(map(float, vector)) for vector in embedding_function(documents)]
+    embeddings = cache.get_many(documents, model_id)
+    misses = [i for i, vector in enumerate(embeddings) if vector is None]
+    if misses:
+        miss_documents = [documents[i] for i in misses]
+        computed = [list(map(float, vector)) for vector in embedding_function(miss_documents)]
+        cache.put_many(miss_documents, model_id, computed)
+        for i, vector in zip(misses, computed):
+            embeddings[i] = vector
+    return embeddings
+
+def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200, boundary: str = "none") -> List[str]:
+    """Split text into overlapping chunks (see src.utils.chunking.chunk_spans for boundary modes)."""
+    return [text[start:end] for start, end in chunk_spans(text, chunk_size, overlap, boundary=boundary)]
+
+def prepare_chunks(parsed_data: List[Dict], chunk_size: int = 1000, overlap: int = 200,
+                   boundary: str = "sentence", max_tokens: Optional[int] = None,
+                   dedup_threshold: Optional[float] = None, dedup_scope: str = "file",
+                   dedup_indexes: Optional[Dict[str, NearDuplicateIndex]] = None,
+                   duplicates: Optional[Dict[str, str]] = None,
+                   dropped: Optional[List[Dict]] = None) -> Dict[str, List[Dict]]:
+    """
+    Prepare chunks with metadata from parsed files, grouped by user_id.
     
-    return chunks
+    Chunks are cut on sentence boundaries by default and carry their
+    (char_start, char_end) offsets into the source text, plus the page they
+    start on when the parser reported page_offsets. When the parser reported
+    section_offsets (slides, headings), chunks never straddle a section start.
 
-def prepare_chunks(parsed_data: List[Dict]) -> Dict[str, List[Dict]]:
-    """Prepare chunks with metadata from parsed files, grouped by user_id."""
+    With dedup_threshold set, a chunk whose text near-duplicates an earlier
+    kept chunk (MinHash Jaccard estimate, see NearDuplicateIndex) is dropped
+    before embedding, and the kept chunks are renumbered. dedup_scope "file"
+    compares chunks within each file; "user" compares across all of a user's
+    files, using (and filling) dedup_indexes[user_id] so a caller can carry
+    one index across batches (see load_dedup_indexes to seed it from a stored
+    collection). Each dropped chunk is recorded in duplicates as
+    "<file_id>:<char_start>-<char_end>" -> chunk id of its representative, and
+    appended to dropped as {"chunk", "representative", "representative_file"}
+    for save_to_chroma to persist.
+    """
+    if dedup_scope not in ("file", "user"):
+        raise ValueError(f"dedup_scope must be 'file' or 'user', got {dedup_scope!r}")
+    dedup_indexes = {} if dedup_indexes is None else dedup_indexes
+    duplicates = {} if duplicates is None else duplicates
+    dropped = [] if dropped is None else dropped
     user_chunks = {}
     valid_count = 0
     skipped_count = 0
+    dropped_count = 0
     for data in parsed_data:
         file_id = data.get('file_id', 'UNKNOWN')
         # Defensive: Skip records without 'text'
@@ -42,81 +113,561 @@ def prepare_chunks(parsed_data: List[Dict]) -> Dict[str, List[Dict]]:
         print(f"[EMBED DEBUG] Processing chunk for user_id: {user_id}")
         if user_id not in user_chunks:
             user_chunks[user_id] = []
-        # Create chunks from the text
-        text_chunks = chunk_text(data['text'])
-        if not text_chunks:
-            print(f"[WARNING] No chunks created for file_id={file_id} (text length={len(data['text'])})")
+        # Create chunk spans from the text
+        text = data['text']
+        spans = _spans(data, chunk_size, overlap, boundary, max_tokens)
+        if not spans:
+            print(f"[WARNING] No chunks created for file_id={file_id} (text length={len(text)})")
             continue
-        # Create chunk objects with metadata
-        for i, chunk in enumerate(text_chunks):
-            chunk_obj = {
-                'text': chunk,
+        cleaning = data.get('cleaning')
+        if cleaning is not None and 'chunks_after' not in cleaning:
+            _estimate_chunks_saved(cleaning, len(spans))
+            print(f"[CLEAN] file_id={file_id}: ~{cleaning['chunks_saved']} chunks saved "
+                  f"({cleaning['chunks_after']} chunks after cleaning)")
+        page_offsets = data.get('page_offsets')
+
+        def chunk_object(start: int, end: int) -> Dict:
+            return {
+                'text': text[start:end],
+                'char_start': start,
+                'char_end': end,
+                'page': page_for_offset(page_offsets, start) if page_offsets else 0,
                 'filename': data['filename'],
                 'file_id': data.get('file_id', 'UNKNOWN'),
                 'class': data.get('class', ''),
                 'topic': data.get('topic', ''),
-                'chunk_index': i,
-                'total_chunks': len(text_chunks),
                 's3_key': data.get('s3_key', ''),
                 'user_id': user_id,
                 'timestamp': data.get('processed_date', '')
             }
+
+        if dedup_threshold:
+            if dedup_scope == "user":
+                index = dedup_indexes.setdefault(user_id, NearDuplicateIndex(dedup_threshold))
+                # A re-indexed file must not be matched against its own previous version
+                index.discard_group(file_id)
+            else:
+                index = NearDuplicateIndex(dedup_threshold)
+            kept = []
+            for start, end in spans:
+                representative = index.add(chunk_id(file_id, len(kept)), text[start:end], group=file_id)
+                if representative is None:
+                    kept.append((start, end))
+                else:
+                    duplicates[f"{file_id}:{start}-{end}"] = representative
+                    dropped.append({"chunk": chunk_object(start, end), "representative": representative,
+                                    "representative_file": index.group_of(representative)})
+            dropped_count += len(spans) - len(kept)
+            spans = kept
+        # Create chunk objects with metadata
+        for i, (start, end) in enumerate(spans):
+            chunk_obj = chunk_object(start, end)
+            chunk_obj.update({'chunk_index': i, 'total_chunks': len(spans)})
             user_chunks[user_id].append(chunk_obj)
             valid_count += 1
     print(f"[DEBUG] Chunks prepared: valid={valid_count}, skipped={skipped_count}")
+    if dedup_threshold:
+        print(f"[DEDUP] Dropped {dropped_count} near-duplicate chunks (threshold={dedup_threshold}, scope={dedup_scope})")
     for user_id, chunks in user_chunks.items():
         if chunks:
             print(f"[DEBUG] User {user_id} has {len(chunks)} chunks. Sample chunk: {chunks[0]['text'][:120]}...")
     return user_chunks
 
-def save_to_chroma(user_chunks: Dict[str, List[Dict]]):
-    """Save chunks to user-specific ChromaDB collections."""
-    def normalize_collection_name(user_id):
-        if user_id.startswith('user_'):
-            return user_id
-        return f'user_{user_id}'
+def _spans(data: Dict, chunk_size: int, overlap: int, boundary: str, max_tokens: Optional[int]):
+    if data.get('section_offsets'):
+        return section_spans(data['text'], data['section_offsets'], chunk_size, overlap,
+                             boundary=boundary, max_tokens=max_tokens)
+    return chunk_spans(data['text'], chunk_size, overlap, boundary=boundary, max_tokens=max_tokens)
 
-    for user_id, chunks in user_chunks.items():
+def _estimate_chunks_saved(report: Dict, chunks_after: int):
+    # The uncleaned text is never chunked on the default path, so its chunk count is
+    # scaled from the cleaned text's actual chunks per character
+    chunks_before = chunks_after
+    if report['chars_after']:
+        chunks_before = max(chunks_after, round(chunks_after * report['chars_before'] / report['chars_after']))
+    report.update({'chunks_before': chunks_before, 'chunks_after': chunks_after,
+                   'chunks_saved': chunks_before - chunks_after, 'chunks_estimated': True})
+
+def clean_parsed(parsed_data: List[Dict], chunk_size: int = 1000, overlap: int = 200,
+                 boundary: str = "sentence", max_tokens: Optional[int] = None,
+                 report_chunks: bool = False) -> List[Dict]:
+    """
+    Clean parsed files before chunking (see text_utils.clean_document).
+
+    A one-line summary is logged per file. prepare_chunks then adds
+    chunks_before/chunks_after/chunks_saved to each "cleaning" report from
+    the spans it computes anyway, estimating chunks_before from the cleaned
+    text's chunks per character (chunks_estimated). With report_chunks the
+    counts are exact instead, at the cost of chunking every document twice more.
+    """
+    cleaned = []
+    for data in parsed_data:
+        if not isinstance(data.get('text'), str) or not data['text'].strip():
+            cleaned.append(data)
+            continue
+        result = clean_document(data)
+        report = result['cleaning']
+        summary = f"saved {report['chars_saved']} chars"
+        if report_chunks:
+            report['chunks_before'] = len(_spans(data, chunk_size, overlap, boundary, max_tokens))
+            report['chunks_after'] = len(_spans(result, chunk_size, overlap, boundary, max_tokens)) if result['text'] else 0
+            report['chunks_saved'] = report['chunks_before'] - report['chunks_after']
+            summary += f", {report['chunks_saved']} chunks"
+        print(f"[CLEAN] file_id={data.get('file_id', 'UNKNOWN')}: {summary} "
+              f"({report['repeated_lines']} repeated header/footer lines)")
+        cleaned.append(result)
+    return cleaned
+
+def normalize_collection_name(user_id: str) -> str:
+    if user_id.startswith('user_'):
+        return user_id
+    return f'user_{user_id}'
+
+def chunk_metadata(chunk: Dict) -> Dict:
+    return {
+        'filename': chunk['filename'],
+        'file_id': chunk['file_id'],
+        'class': chunk['class'],
+        'topic': chunk['topic'],
+        'chunk_index': chunk['chunk_index'],
+        'total_chunks': chunk['total_chunks'],
+        'char_start': chunk['char_start'],
+        'char_end': chunk['char_end'],
+        'page': chunk['page'],
+        's3_key': chunk['s3_key'],
+        'user_id': chunk['user_id'],
+        'timestamp': chunk['timestamp']
+    }
+
+def _with_retries(fn, max_retries: int, label: str):
+    """Call fn, retrying with exponential backoff; re-raises after the last attempt."""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = 0.5 * (2 ** attempt)
+            print(f"[WARNING] {label} failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def _save_user_chunks(client, user_id: str, chunks: List[Dict], embedding_function,
+                      cache: Optional[EmbeddingCache], model_id: str, batch_size: int,
+                      max_retries: int, metadata_index: Optional[MetadataIndex] = None,
+                      bm25_index: Optional[BM25Index] = None, dropped: Optional[List[Dict]] = None,
+                      dedup_index: Optional[NearDuplicateIndex] = None) -> Dict[str, int]:
+    """
+    Embed and upsert one user's chunks batch by batch.
+    
+    A producer thread embeds batch i+1 while this thread writes batch i, and a
+    batch that still fails after retries is reported without aborting the rest.
+    """
+    collection_name = normalize_collection_name(user_id)
+    print(f"[DEBUG] Processing collection: {collection_name}")
+    print(f"[DEBUG] Preparing to upsert {len(chunks)} chunks for user {user_id}")
+    # Get or create collection
+    collection = client.get_or_create_collection(
+        name=collection_name,
+        metadata={"user_id": user_id},
+        embedding_function=embedding_function
+    )
+    check_collection_embedder(collection, model_id)
+    ensure_indexed(collection, collection_name, metadata_index, bm25_index)
+    result = {"chunks": 0, "batches": 0, "failed_batches": 0, "failed_chunks": 0}
+    if not chunks:
+        print(f"[WARNING] No documents to upsert for user {user_id}")
+        if metadata_index is not None and dropped:
+            # Every chunk was a near-duplicate; the links still need recording
+            _index_files(collection, collection_name, [], metadata_index, bm25_index, set(), dropped, dedup_index)
+        return result
+    print(f"[DEBUG] Example document: {chunks[0]['text'][:100]}...")
+
+    batches = [chunks[i:i + batch_size] for i in range(0, len(chunks), batch_size)]
+    # maxsize=1: at most one embedded batch waits while the previous one is written
+    embedded = queue.Queue(maxsize=1)
+
+    def produce():
+        for number, batch in enumerate(batches):
+            documents = [chunk['text'] for chunk in batch]
+            try:
+                embeddings = _with_retries(
+                    lambda: embed_with_cache(documents, embedding_function, cache, model_id),
+                    max_retries, f"Embedding batch {number} for {collection_name}"
+                )
+                embedded.put((number, batch, documents, embeddings, None))
+            except Exception as e:
+                embedded.put((number, batch, documents, None, e))
+        embedded.put(None)
+
+    written = set()
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    print(f"[DEBUG] Uploading/embedding into ChromaDB collection: {collection_name} ({len(batches)} batches)")
+    while True:
+        item = embedded.get()
+        if item is None:
+            break
+        number, batch, documents, embeddings, error = item
+        result["batches"] += 1
+        if error is None:
+            ids = [chunk_id(chunk['file_id'], chunk['chunk_index']) for chunk in batch]
+            try:
+                _with_retries(
+                    lambda: collection.upsert(
+                        documents=documents,
+                        embeddings=embeddings,
+                        ids=ids,
+                        metadatas=[chunk_metadata(chunk) for chunk in batch]
+                    ),
+                    max_retries, f"Upserting batch {number} into {collection_name}"
+                )
+            except Exception as e:
+                error = e
+            else:
+                written.update(ids)
+                result["chunks"] += len(batch)
+                index_lexical(bm25_index, collection_name, ids, documents)
+                continue
+        result["failed_batches"] += 1
+        result["failed_chunks"] += len(batch)
+        print(f"❌ Batch {number} ({len(batch)} chunks) failed for {collection_name}: {error}")
+    producer.join()
+    if metadata_index is not None:
+        _index_files(collection, collection_name, chunks, metadata_index, bm25_index, written, dropped, dedup_index)
+    print(f"✅ Added {result['chunks']} chunks to ChromaDB collection: {collection_name}")
+    return result
+
+def ensure_indexed(collection, collection_name: str, metadata_index: Optional[MetadataIndex] = None,
+                   bm25_index: Optional[BM25Index] = None):
+    """Backfill the sidecar indexes from a collection they have never scanned, before the first indexed write."""
+    if metadata_index is not None and not metadata_index.is_backfilled(collection_name):
+        complete = metadata_index.backfill(collection_name, collection)
+        print(f"[DEBUG] Backfilled metadata index for {collection_name} (complete={complete})")
+    if bm25_index is not None and not bm25_index.is_backfilled(collection_name):
+        count = bm25_index.backfill(collection_name, collection)
+        print(f"[DEBUG] Backfilled BM25 index for {collection_name} ({count} chunks)")
+
+def index_lexical(bm25_index: Optional[BM25Index], collection_name: str, ids: List[str], documents: List[str]):
+    """
+    Add chunks already stored in Chroma to the BM25 index.
+
+    A failure here does not undo or fail the Chroma write: it is logged and
+    the collection is marked for a BM25 backfill, which the next writer (or
+    hybrid query) runs.
+    """
+    if bm25_index is None:
+        return
+    try:
+        bm25_index.upsert(collection_name, ids, documents)
+    except Exception as e:
+        print(f"[WARNING] BM25 indexing of {len(ids)} chunks in {collection_name} failed ({e}); "
+              f"the collection will be backfilled")
+        try:
+            bm25_index.invalidate(collection_name)
+        except Exception:
+            pass
+
+def load_dedup_indexes(client, user_ids: Iterable[str], metadata_index: MetadataIndex,
+                       threshold: float) -> Dict[str, NearDuplicateIndex]:
+    """
+    Near-duplicate indexes seeded with what each user's collection already holds.
+
+    Signatures stored in the metadata index are loaded as they are; files
+    indexed without signatures are signed once from their documents in Chroma
+    and the signatures stored. Pass the result to prepare_chunks as
+    dedup_indexes (scope "user") so new chunks are compared with the whole
+    collection, not just the current run.
+    """
+    indexes = {}
+    for user_id in user_ids:
         collection_name = normalize_collection_name(user_id)
-        print(f"[DEBUG] Normalized collection name: {collection_name}")
-        print(f"[DEBUG] Processing collection: {collection_name}")
-        print(f"[DEBUG] Preparing to upsert {len(chunks)} chunks for user {user_id}")
-        # Get or create collection
-        collection = chroma_client.get_or_create_collection(
-            name=collection_name,
-            metadata={"user_id": user_id}
-        )
-        # Prepare documents, ids, and metadatas
-        documents = [chunk['text'] for chunk in chunks]
-        ids = [f"{chunk['file_id']}_{chunk['chunk_index']}" for chunk in chunks]
-        metadatas = [{
-            'filename': chunk['filename'],
-            'file_id': chunk['file_id'],
-            'class': chunk['class'],
-            'topic': chunk['topic'],
-            'chunk_index': chunk['chunk_index'],
-            'total_chunks': chunk['total_chunks'],
-            's3_key': chunk['s3_key'],
-            'user_id': chunk['user_id'],
-            'timestamp': chunk['timestamp']
-        } for chunk in chunks]
-        print(f"[DEBUG] Example document: {documents[0][:100]}..." if documents else "[DEBUG] No documents to upsert.")
-        # Add documents to collection
-        if documents:
-            print(f"[DEBUG] Uploading/embedding into ChromaDB collection: {collection_name}")
-            collection.upsert(
-                documents=documents,
-                ids=ids,
-                metadatas=metadatas
-            )
-            print(f"✅ Added {len(chunks)} chunks to ChromaDB collection: {collection_name}")
-        else:
-            print(f"[WARNING] No documents to upsert for user {user_id}")
+        index = indexes[user_id] = NearDuplicateIndex(threshold)
+        try:
+            collection = client.get_collection(collection_name)
+        except Exception:
+            # No collection yet: nothing to compare against
+            continue
+        ensure_indexed(collection, collection_name, metadata_index)
+        for file_id, chunk_index, signature in metadata_index.signatures(collection_name):
+            signature = np.frombuffer(signature, dtype=np.uint32)
+            if len(signature) == index.num_perm:
+                index.add_signature(chunk_id(file_id, chunk_index), signature, group=file_id)
+        for file_id in metadata_index.unsigned_files(collection_name):
+            ids = metadata_index.chunk_ids(collection_name, file_id=file_id)
+            if not ids:
+                continue
+            page = collection.get(ids=ids, include=["documents"])
+            signatures = {}
+            for row_id, document in zip(page["ids"], page["documents"]):
+                signature = index.signature(document or "")
+                index.add_signature(row_id, signature, group=file_id)
+                signatures[int(row_id[len(file_id) + 1:])] = signature.tobytes()
+            metadata_index.record_signatures(collection_name, file_id, signatures)
+        print(f"[DEDUP] Seeded {collection_name} with {len(index)} stored chunk signatures")
+    return indexes
+
+def _index_files(collection, collection_name: str, chunks: List[Dict], metadata_index: MetadataIndex,
+                 bm25_index: Optional[BM25Index] = None, written: Optional[set] = None,
+                 dropped: Optional[List[Dict]] = None, dedup_index: Optional[NearDuplicateIndex] = None):
+    """
+    Record each written file in the metadata index and drop chunks left over from a longer old version.
+
+    Only ids in written (all of chunks when None) are recorded as present; a
+    file none of whose chunks were written keeps its previous entry. Each
+    file's dropped near-duplicates (see prepare_chunks) replace the ones
+    recorded before, and its chunk signatures are taken from dedup_index when
+    every chunk was written; otherwise the file is left unsigned, to be signed
+    from Chroma by the next load_dedup_indexes.
+    """
+    files = {}
+    for chunk in chunks:
+        files.setdefault(chunk['file_id'], []).append(chunk)
+    links = {}
+    for link in dropped or []:
+        links.setdefault(link['chunk']['file_id'], []).append(link)
+    for file_id in links.keys() - files.keys():
+        # Every chunk of the file duplicated another file's; any older version goes
+        stale = metadata_index.remove_file(collection_name, file_id)
+        if stale:
+            collection.delete(ids=stale)
+            if bm25_index is not None:
+                bm25_index.delete(collection_name, stale)
+        metadata_index.replace_duplicates(collection_name, file_id, links[file_id])
+    for file_id, file_chunks in files.items():
+        chunk = file_chunks[0]
+        indexes = [c['chunk_index'] for c in file_chunks
+                   if written is None or chunk_id(file_id, c['chunk_index']) in written]
+        if not indexes:
+            continue
+        previous = metadata_index.record_file(collection_name, file_id, chunk['total_chunks'],
+                                              chunk['class'], chunk['topic'], chunk['filename'], written=indexes)
+        metadata_index.replace_duplicates(collection_name, file_id, links.get(file_id, []))
+        signatures = {}
+        if dedup_index is not None and len(indexes) == chunk['total_chunks']:
+            for i in indexes:
+                signature = dedup_index.signature_of(chunk_id(file_id, i))
+                if signature is None:
+                    signatures = {}
+                    break
+                signatures[i] = signature.tobytes()
+        metadata_index.record_signatures(collection_name, file_id, signatures)
+        if previous > chunk['total_chunks']:
+            stale = [chunk_id(file_id, i) for i in range(chunk['total_chunks'], previous)]
+            collection.delete(ids=stale)
+            if bm25_index is not None:
+                bm25_index.delete(collection_name, stale)
+            print(f"[DEBUG] Removed {len(stale)} stale chunks of re-indexed file {file_id}")
+
+def _readmit_duplicates(collection, collection_name: str, file_id: str, metadata_index: MetadataIndex,
+                        bm25_index: Optional[BM25Index], embedding_function, cache: Optional[EmbeddingCache],
+                        model_id: str) -> int:
+    """
+    Write back the chunks that were dropped as near-duplicates of a removed file's chunks.
+
+    Each re-admitted chunk is appended to its own file's id range. When several
+    dropped chunks shared one representative, the first is re-admitted and the
+    rest are linked to it instead. The owning files are left unsigned, so
+    load_dedup_indexes re-signs them with the re-admitted chunks included.
+
+    Returns:
+        Number of chunks re-admitted
+    """
+    groups = {}
+    for link in metadata_index.duplicates_of(collection_name, file_id):
+        groups.setdefault(link['representative'], []).append(link)
+    if not groups:
+        return 0
+    owners = {}
+    for group in groups.values():
+        owners.setdefault(group[0]['chunk']['file_id'], []).append(group)
+    chunks, relinked = [], []
+    for owner, owner_groups in owners.items():
+        entry = metadata_index.files(collection_name, file_id=owner)
+        count = entry[0]['chunk_count'] if entry else 0
+        for offset, group in enumerate(owner_groups):
+            chunk = dict(group[0]['chunk'], chunk_index=count + offset, total_chunks=count + len(owner_groups))
+            chunks.append(chunk)
+            relinked.extend(dict(link, representative=chunk_id(owner, chunk['chunk_index']), representative_file=owner)
+                            for link in group[1:])
+    check_collection_embedder(collection, model_id)
+    documents = [chunk['text'] for chunk in chunks]
+    ids = [chunk_id(chunk['file_id'], chunk['chunk_index']) for chunk in chunks]
+    collection.upsert(ids=ids, documents=documents,
+                      embeddings=embed_with_cache(documents, embedding_function, cache, model_id),
+                      metadatas=[chunk_metadata(chunk) for chunk in chunks])
+    index_lexical(bm25_index, collection_name, ids, documents)
+    for owner in owners:
+        owned = [chunk for chunk in chunks if chunk['file_id'] == owner]
+        metadata_index.record_file(collection_name, owner, owned[0]['total_chunks'], owned[0]['class'],
+                                   owned[0]['topic'], owned[0]['filename'],
+                                   written=[chunk['chunk_index'] for chunk in owned])
+        metadata_index.record_signatures(collection_name, owner, {})
+    metadata_index.relink_duplicates(collection_name, file_id, relinked)
+    print(f"[DEDUP] Re-admitted {len(chunks)} chunks that duplicated file {file_id}")
+    return len(chunks)
+
+def delete_file_chunks(user_id: str, file_id: str, client=None, metadata_index: Optional[MetadataIndex] = None,
+                       versions: Optional[CollectionVersions] = None, bm25_index: Optional[BM25Index] = None,
+                       embedding_function=None, cache: Optional[EmbeddingCache] = None,
+                       model_id: Optional[str] = None) -> int:
+    """
+    Delete one file's chunks from a user's collection.
+
+    Ids come from the metadata index when the file is indexed, which avoids a
+    metadata scan; otherwise Chroma's file_id filter is used. Chunks of other
+    files that were dropped as near-duplicates of this file's chunks are
+    embedded and written back, since nothing in the collection covers them
+    any more.
+
+    Args:
+        embedding_function / cache / model_id: Used to re-admit dropped near-duplicates,
+            as in save_to_chroma (the configured embedder when omitted)
+
+    Returns:
+        Number of chunks deleted (-1 when deleted by filter and the count is unknown)
+    """
+    if client is None:
+        client = get_chroma_client()
+        metadata_index = metadata_index or MetadataIndex(os.path.join(CHROMA_DB_PATH, METADATA_INDEX_FILENAME))
+        versions = versions or CollectionVersions(os.path.join(CHROMA_DB_PATH, COLLECTION_VERSIONS_FILENAME))
+        bm25_index = bm25_index or BM25Index(os.path.join(CHROMA_DB_PATH, BM25_INDEX_FILENAME))
+    collection_name = normalize_collection_name(user_id)
+    collection = client.get_collection(collection_name)
+    ids = metadata_index.remove_file(collection_name, file_id) if metadata_index is not None else []
+    if not ids and bm25_index is not None:
+        # Unindexed file: the lexical index still needs its ids
+        ids = collection.get(where={"file_id": file_id}, include=[])["ids"]
+    if bm25_index is not None:
+        bm25_index.delete(collection_name, ids)
+    if ids:
+        collection.delete(ids=ids)
+        deleted = len(ids)
+    else:
+        collection.delete(where={"file_id": file_id})
+        deleted = -1
+    if metadata_index is not None and metadata_index.duplicates_of(collection_name, file_id):
+        if embedding_function is None:
+            embedding_function = get_embedder()
+        _readmit_duplicates(collection, collection_name, file_id, metadata_index, bm25_index, embedding_function,
+                            cache, model_id or embedding_model_id(embedding_function))
+    if versions is not None:
+        versions.bump(collection_name)
+    print(f"✅ Deleted chunks of file {file_id} from {collection_name}")
+    return deleted
+
+def save_to_chroma(user_chunks: Dict[str, List[Dict]], embedding_function=None,
+                   cache: Optional[EmbeddingCache] = None, client=None, model_id: Optional[str] = None,
+                   batch_size: int = DEFAULT_BATCH_SIZE, max_workers: int = 4,
+                   max_retries: int = 3, versions: Optional[CollectionVersions] = None,
+                   metadata_index: Optional[MetadataIndex] = None,
+                   bm25_index: Optional[BM25Index] = None, dropped: Optional[List[Dict]] = None,
+                   dedup_indexes: Optional[Dict[str, NearDuplicateIndex]] = None) -> Dict[str, float]:
+    """
+    Save chunks to user-specific ChromaDB collections.
+    
+    Embeddings are computed here rather than by Chroma so that chunks already
+    in the embedding cache (same normalized text, same model) are not re-embedded.
+    Each user's chunks are embedded and written in pipelined batches, and
+    different users' collections are written concurrently.
+    
+    Args:
+        user_chunks: Chunks grouped by user_id, as returned by prepare_chunks()
+        embedding_function: Embedding function (defaults to the configured embedder, see get_embedder)
+        cache: Embedding cache consulted before embedding (None disables caching)
+        client: Chroma client (defaults to the persistent client at CHROMA_DB_PATH)
+        model_id: Identity of embedding_function (derived if omitted), used as the cache key
+            and recorded on each collection; writing a collection recorded with another
+            identity fails for that user
+        batch_size: Chunks per upsert (capped at the client's max batch size)
+        max_workers: Collections written concurrently
+        max_retries: Retries per batch before it is reported as failed
+        versions: Collection version counters bumped after each write so search
+            result caches drop stale entries (defaults to the counters stored in
+            CHROMA_DB_PATH when the default client is used)
+        metadata_index: Sidecar index of each collection's files, classes and topics
+            (defaults to the index stored in CHROMA_DB_PATH when the default client is used)
+        bm25_index: Lexical index updated with every upserted batch, for hybrid search
+            (same default as metadata_index)
+        dropped: Near-duplicates dropped by prepare_chunks, recorded in metadata_index
+            so they can be re-admitted when their representative's file is deleted
+        dedup_indexes: The user-scope indexes given to prepare_chunks; the signatures of
+            written chunks are stored from them for the next run's load_dedup_indexes
+        
+    Returns:
+        Run summary: chunk/batch counts, failures, elapsed seconds and chunks/sec
+    """
+    if client is None:
+        client = get_chroma_client()
+        versions = versions or CollectionVersions(os.path.join(CHROMA_DB_PATH, COLLECTION_VERSIONS_FILENAME))
+        metadata_index = metadata_index or MetadataIndex(os.path.join(CHROMA_DB_PATH, METADATA_INDEX_FILENAME))
+        bm25_index = bm25_index or BM25Index(os.path.join(CHROMA_DB_PATH, BM25_INDEX_FILENAME))
+    if embedding_function is None:
+        embedding_function = get_embedder()
+    model_id = model_id or embedding_model_id(embedding_function)
+    try:
+        batch_size = min(batch_size, client.get_max_batch_size())
+    except Exception:
+        # Older clients do not expose a max batch size
+        pass
+
+    start = time.perf_counter()
+    summary = {"users": len(user_chunks), "chunks": 0, "batches": 0, "failed_batches": 0, "failed_chunks": 0}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(user_chunks) or 1))) as pool:
+        futures = {
+            pool.submit(_save_user_chunks, client, user_id, chunks, embedding_function,
+                        cache, model_id, batch_size, max_retries, metadata_index, bm25_index,
+                        [link for link in dropped or [] if link['chunk']['user_id'] == user_id],
+                        (dedup_indexes or {}).get(user_id)): user_id
+            for user_id, chunks in user_chunks.items()
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # e.g. the collection itself could not be opened
+                print(f"❌ Failed to save chunks for user {futures[future]}: {e}")
+                summary["failed_chunks"] += len(user_chunks[futures[future]])
+                continue
+            if versions is not None and result["chunks"]:
+                versions.bump(normalize_collection_name(futures[future]))
+            for key, value in result.items():
+                summary[key] += value
+
+    elapsed = time.perf_counter() - start
+    summary["seconds"] = round(elapsed, 3)
+    summary["chunks_per_sec"] = round(summary["chunks"] / elapsed, 1) if elapsed else 0.0
+    print(f"[EMBED SUMMARY] {summary['chunks']} chunks in {summary['batches']} batches for "
+          f"{summary['users']} users in {summary['seconds']}s ({summary['chunks_per_sec']} chunks/sec), "
+          f"failed batches={summary['failed_batches']}")
+    if cache is not None:
+        stats = cache.stats()
+        print(f"[EMBED CACHE] hits={stats['hits']} misses={stats['misses']} hit_rate={stats['hit_rate']:.1%}")
+    return summary
 
 def main():
     import argparse
     parser = argparse.ArgumentParser(description="Embed parsed file data into ChromaDB.")
     parser.add_argument('--input', type=str, default=None, help='Path to parsed JSON file. If not provided, reads from stdin.')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Character budget per chunk')
+    parser.add_argument('--overlap', type=int, default=200, help='Characters shared between consecutive chunks')
+    parser.add_argument('--boundary', default='sentence', choices=['none', 'whitespace', 'sentence', 'paragraph'],
+                        help='Preferred chunk boundary')
+    parser.add_argument('--max-tokens', type=int, default=None, help='Optional token budget per chunk')
+    parser.add_argument('--no-clean', action='store_true', help='Chunk the parsed text as-is, without cleaning')
+    parser.add_argument('--clean-report', action='store_true',
+                        help='Count the chunks cleaning saved per file exactly rather than estimating them '
+                             '(chunks each file twice more)')
+    parser.add_argument('--dedup-threshold', type=float, default=DEDUP_THRESHOLD,
+                        help='Drop chunks at least this similar (Jaccard) to a kept chunk; 0 (default) disables')
+    parser.add_argument('--dedup-scope', default=DEDUP_SCOPE, choices=['file', 'user'],
+                        help='Compare chunks within each file or across all of a user\'s files')
+    parser.add_argument('--cache-path', default=EMBEDDING_CACHE_PATH, help='Embedding cache SQLite file')
+    parser.add_argument('--cache-size', type=int, default=100_000, help='Maximum cached embeddings (LRU eviction)')
+    parser.add_argument('--no-cache', action='store_true', help='Embed every chunk without consulting the cache')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Chunks per embed/upsert batch')
+    parser.add_argument('--workers', type=int, default=4, help='User collections written concurrently')
+    add_embedder_arguments(parser)
+    parser.add_argument('--max-retries', type=int, default=3, help='Retries per failed batch')
     args = parser.parse_args()
 
     try:
@@ -132,8 +683,23 @@ def main():
             print("No parsed files found, skipping embedding process")
             return
 
+        if not args.no_clean:
+            parsed_data = clean_parsed(parsed_data, args.chunk_size, args.overlap,
+                                       boundary=args.boundary, max_tokens=args.max_tokens,
+                                       report_chunks=args.clean_report)
+
+        client = get_chroma_client()
+        metadata_index = MetadataIndex(os.path.join(CHROMA_DB_PATH, METADATA_INDEX_FILENAME))
+        dedup_indexes, dropped = {}, []
+        if args.dedup_threshold and args.dedup_scope == 'user':
+            user_ids = {data.get('user_id', 'default_user') for data in parsed_data}
+            dedup_indexes = load_dedup_indexes(client, user_ids, metadata_index, args.dedup_threshold)
+
         # Prepare chunks with metadata, grouped by user
-        user_chunks = prepare_chunks(parsed_data)
+        user_chunks = prepare_chunks(parsed_data, args.chunk_size, args.overlap,
+                                     boundary=args.boundary, max_tokens=args.max_tokens,
+                                     dedup_threshold=args.dedup_threshold or None, dedup_scope=args.dedup_scope,
+                                     dedup_indexes=dedup_indexes, dropped=dropped)
         print(f"✅ Created chunks for {len(user_chunks)} users")
 
         if not user_chunks:
@@ -142,7 +708,16 @@ def main():
 
         # Save to ChromaDB
         print("Saving to ChromaDB...")
-        save_to_chroma(user_chunks)
+        cache = None if args.no_cache else EmbeddingCache(args.cache_path, max_entries=args.cache_size)
+        summary = save_to_chroma(user_chunks, embedding_function=embedder_from_args(args),
+                                 cache=cache, client=client, batch_size=args.batch_size,
+                                 max_workers=args.workers, max_retries=args.max_retries,
+                                 versions=CollectionVersions(os.path.join(CHROMA_DB_PATH, COLLECTION_VERSIONS_FILENAME)),
+                                 metadata_index=metadata_index,
+                                 bm25_index=BM25Index(os.path.join(CHROMA_DB_PATH, BM25_INDEX_FILENAME)),
+                                 dropped=dropped, dedup_indexes=dedup_indexes)
+        if summary["failed_chunks"]:
+            raise RuntimeError(f"{summary['failed_chunks']} chunks failed to save to ChromaDB")
         print("✅ Chunks saved to ChromaDB")
 
     except Exception as e:
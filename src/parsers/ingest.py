@@ -0,0 +1,525 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Add the project root to sys.path for absolute imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.parsers.embed_parser import (
+    BM25_INDEX_FILENAME, COLLECTION_VERSIONS_FILENAME, DEDUP_SCOPE, DEDUP_THRESHOLD, DEFAULT_BATCH_SIZE,
+    EMBEDDING_CACHE_PATH, METADATA_INDEX_FILENAME, _index_files, _with_retries, chunk_metadata,
+    clean_parsed, embed_with_cache, embedding_model_id, ensure_indexed, get_chroma_client,
+    index_lexical, load_dedup_indexes, normalize_collection_name, prepare_chunks
+)
+from src.storage.bm25_index import BM25Index
+from src.storage.embedding_cache import EmbeddingCache
+from src.storage.file_store import PARSE_CACHE_PATH, FileStore
+from src.storage.metadata_index import MetadataIndex, chunk_id
+from src.storage.paths import CHROMA_DB_PATH
+from src.storage.query_cache import CollectionVersions
+from src.utils.embedders import add_embedder_arguments, check_collection_embedder, embedder_from_args, get_embedder
+
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.m4a', '.ogg'}
+NATIVE_EXTENSIONS = {'.pdf', '.docx', '.pptx', '.txt', '.md', '.markdown'}
+# Converted to PDF first; mirrors backend/src/supported_filetypes.js minus the natively parsed formats
+CONVERT_EXTENSIONS = {
+    '.doc', '.odt', '.rtf', '.html', '.htm', '.xml', '.xls', '.xlsx', '.ods', '.csv', '.tsv',
+    '.ppt', '.odp', '.fodt', '.fods', '.fodp', '.sxi', '.sxw'
+}
+INGEST_EXTENSIONS = AUDIO_EXTENSIONS | NATIVE_EXTENSIONS | CONVERT_EXTENSIONS
+
+_DONE = object()
+
+# Parse caches opened in this process, keyed by directory
+_PARSE_CACHES = {}
+
+
+class Stage:
+    """
+    One pipeline stage: fn applied to each item by a pool of workers.
+
+    fn returns the item for the next stage, or None to drop it. Thread
+    stages run fn on `workers` threads; process stages run it on a process
+    pool of the same size (fn must then be a picklable top-level function).
+    """
+
+    def __init__(self, name: str, fn: Callable, workers: int = 1, processes: bool = False, queue_size: int = 8):
+        """
+        Args:
+            name: Stage name used in metrics and errors
+            fn: Item -> item (or None) transform
+            workers: Concurrent items in this stage
+            processes: Run fn in worker processes (CPU-bound stages)
+            queue_size: Capacity of this stage's input queue; a full queue blocks the previous stage
+        """
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.processes = processes
+        self.queue_size = queue_size
+        self.metrics = {"items_in": 0, "items_out": 0, "errors": 0, "busy_seconds": 0.0,
+                        "blocked_seconds": 0.0, "idle_seconds": 0.0}
+
+
+class Pipeline:
+    """
+    Streams items through stages connected by bounded queues.
+
+    Every stage runs concurrently, so file N can be embedded while file N+1 is
+    parsed and file N+2 converted. Queues are bounded: a slow stage fills its
+    input queue and the stages before it block (their blocked_seconds grows)
+    instead of piling up parsed documents in memory. A failing item is
+    recorded in errors and dropped; the rest keep flowing.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        self.errors: List[Dict] = []
+        self._lock = threading.Lock()
+        self.seconds = 0.0
+
+    def run(self, items: Iterable, on_result: Optional[Callable] = None) -> List:
+        """
+        Feed items through every stage and block until the last one drains.
+
+        Args:
+            items: Source items (consumed lazily, at the pace of the first stage)
+            on_result: Called with each item leaving the last stage (results are also returned)
+
+        Returns:
+            Items that left the last stage, in completion order
+        """
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages] + [queue.Queue()]
+        results = []
+        # spawn, not fork: the parent holds threads, a Chroma client and SQLite handles
+        executors = [ProcessPoolExecutor(max_workers=stage.workers,
+                                         mp_context=multiprocessing.get_context("spawn"))
+                     if stage.processes else None
+                     for stage in self.stages]
+        start = time.perf_counter()
+
+        def put(stage: Stage, q: queue.Queue, item):
+            waited = time.perf_counter()
+            q.put(item)
+            with self._lock:
+                stage.metrics["blocked_seconds"] += time.perf_counter() - waited
+
+        def work(index: int):
+            stage, executor = self.stages[index], executors[index]
+            inbox, outbox = queues[index], queues[index + 1]
+            while True:
+                waited = time.perf_counter()
+                item = inbox.get()
+                idle = time.perf_counter() - waited
+                if item is _DONE:
+                    break
+                began = time.perf_counter()
+                try:
+                    output = executor.submit(stage.fn, item).result() if executor else stage.fn(item)
+                    error = None
+                except Exception as e:
+                    output, error = None, e
+                busy = time.perf_counter() - began
+                with self._lock:
+                    stage.metrics["items_in"] += 1
+                    stage.metrics["busy_seconds"] += busy
+                    stage.metrics["idle_seconds"] += idle
+                    if error is not None:
+                        stage.metrics["errors"] += 1
+                        self.errors.append({"stage": stage.name, "item": _describe(item), "error": str(error)})
+                    elif output is not None:
+                        stage.metrics["items_out"] += 1
+                if output is not None:
+                    put(stage, outbox, output)
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            workers = [threading.Thread(target=work, args=(index,), name=f"{stage.name}-{i}", daemon=True)
+                       for i in range(stage.workers)]
+            threads.append(workers)
+            for worker in workers:
+                worker.start()
+
+        def drain():
+            while True:
+                item = queues[-1].get()
+                if item is _DONE:
+                    return
+                results.append(item)
+                if on_result is not None:
+                    on_result(item)
+
+        drainer = threading.Thread(target=drain, name="pipeline-drain", daemon=True)
+        drainer.start()
+        try:
+            for item in items:
+                queues[0].put(item)
+            # Close stages in order: once every worker of stage i has exited, nothing
+            # more can reach stage i+1, so its workers can be told to stop
+            for index, stage in enumerate(self.stages):
+                for _ in range(stage.workers):
+                    queues[index].put(_DONE)
+                for worker in threads[index]:
+                    worker.join()
+            queues[-1].put(_DONE)
+            drainer.join()
+        finally:
+            for executor in executors:
+                if executor is not None:
+                    executor.shutdown(wait=True)
+        self.seconds = time.perf_counter() - start
+        return results
+
+    def metrics(self) -> Dict:
+        """Per-stage counts, throughput (items/s over the run) and utilization (busy / worker time)."""
+        report = {"seconds": round(self.seconds, 3), "errors": len(self.errors), "stages": []}
+        for stage in self.stages:
+            m = dict(stage.metrics)
+            worker_seconds = stage.workers * self.seconds
+            report["stages"].append({
+                "stage": stage.name,
+                "workers": stage.workers,
+                "processes": stage.processes,
+                **{key: round(value, 3) if isinstance(value, float) else value for key, value in m.items()},
+                "items_per_sec": round(m["items_out"] / self.seconds, 2) if self.seconds else 0.0,
+                "utilization": round(m["busy_seconds"] / worker_seconds, 3) if worker_seconds else 0.0
+            })
+        return report
+
+
+def _describe(item) -> str:
+    if isinstance(item, dict):
+        return str(item.get("path") or item.get("file_id") or "")
+    return str(item)
+
+
+def discover(source: str | Path, user_id: str = "default_user", class_name: str = "", topic: str = "") -> List[Dict]:
+    """
+    Build file records from a directory (walked recursively) or a manifest.
+
+    A manifest is a JSON list, or NDJSON, of objects with "path" and optional
+    "file_id", "user_id", "class", "topic" and "s3_key"; relative paths are
+    resolved against the manifest's directory. Missing fields fall back to
+    the arguments, and file_id defaults to <user_id>_<relative path> like the
+    upload route's fallback.
+    """
+    source = Path(source)
+    if source.is_dir():
+        root = source
+        entries = [{"path": str(p)} for p in sorted(source.rglob("*"))
+                   if p.is_file() and p.suffix.lower() in INGEST_EXTENSIONS]
+    else:
+        root = source.parent
+        text = source.read_text(encoding="utf-8").strip()
+        entries = json.loads(text) if text.startswith("[") else [json.loads(line) for line in text.splitlines() if line.strip()]
+    records = []
+    for entry in entries:
+        path = Path(entry["path"])
+        if not path.is_absolute():
+            path = root / path
+        owner = entry.get("user_id") or user_id
+        try:
+            relative = path.relative_to(root).as_posix()
+        except ValueError:
+            relative = path.name
+        records.append({
+            "path": str(path),
+            "file_id": entry.get("file_id") or f"{owner}_{relative}",
+            "user_id": owner,
+            "class": entry.get("class", class_name),
+            "topic": entry.get("topic", topic),
+            "s3_key": entry.get("s3_key", "")
+        })
+    return records
+
+
+def parse_file(record: Dict, cache_path: Optional[str] = None) -> Dict:
+    """Parse one record's file (top-level so it can run in a worker process)."""
+    cache = None
+    if cache_path:
+        # One FileStore per process, so its size scan and hit counters are shared across files
+        cache = _PARSE_CACHES.get(cache_path)
+        if cache is None:
+            cache = _PARSE_CACHES.setdefault(cache_path, FileStore(cache_path))
+    path = Path(record.get("parse_path") or record["path"])
+    suffix = path.suffix.lower()
+    if suffix == '.pdf':
+        from src.parsers.pdf_parser import PDFParser
+        parsed = PDFParser(cache).extract_text(path)
+    elif suffix in ('.docx', '.pptx'):
+        from src.parsers.office_parser import DocxParser, PptxParser
+        parsed = (PptxParser(cache) if suffix == '.pptx' else DocxParser(cache)).extract_text(path)
+    elif suffix in AUDIO_EXTENSIONS:
+        from src.parsers.audio_parser import AudioParser
+        parsed = AudioParser(cache=cache).transcribe(path)
+    else:
+        from src.parsers.text_parser import TextParser
+        parsed = TextParser(cache).extract_text(path)
+    # Metadata from the record wins over the parser's empty placeholders
+    parsed.update({key: record[key] for key in ("file_id", "user_id", "class", "topic", "s3_key")})
+    parsed["filename"] = Path(record["path"]).name
+    return parsed
+
+
+class Ingestor:
+    """Builds and runs the convert → parse → chunk → embed → upsert pipeline (cleaning runs in the chunk stage)."""
+
+    def __init__(self, client=None, embedding_function=None, embedding_cache: Optional[EmbeddingCache] = None,
+                 model_id: Optional[str] = None, parse_cache_path: Optional[str] = None,
+                 metadata_index: Optional[MetadataIndex] = None, bm25_index: Optional[BM25Index] = None,
+                 versions: Optional[CollectionVersions] = None, conversion_pool=None,
+                 chunk_size: int = 1000, overlap: int = 200, boundary: str = "sentence",
+                 batch_size: int = DEFAULT_BATCH_SIZE, max_retries: int = 3, clean: bool = True,
+                 dedup_threshold: Optional[float] = None, dedup_scope: str = "file"):
+        """
+        Args:
+            client: Chroma client (defaults to the persistent client and the sidecar indexes in CHROMA_DB_PATH)
+            embedding_function: Embedding function (defaults to the configured embedder, see get_embedder)
+            embedding_cache: Embedding cache consulted before embedding
+            model_id: Cache identity of embedding_function (derived if omitted)
+            parse_cache_path: FileStore directory for parse results (None disables the parse cache)
+            metadata_index / bm25_index / versions: Sidecar indexes kept in step with Chroma, as in save_to_chroma
+            conversion_pool: ConversionPool for formats without a native parser (created on first use)
+            chunk_size / overlap / boundary: Chunking, as in prepare_chunks
+            batch_size: Chunks per embed call and per upsert
+            max_retries: Retries per embed/upsert batch
+            clean: Clean the parsed text (clean_parsed) before chunking
+            dedup_threshold / dedup_scope: Near-duplicate chunk removal, as in prepare_chunks; with
+                scope "user" one index per user, seeded from the collection (load_dedup_indexes),
+                spans the whole run
+        """
+        if client is None:
+            client = get_chroma_client()
+            versions = versions or CollectionVersions(os.path.join(CHROMA_DB_PATH, COLLECTION_VERSIONS_FILENAME))
+            metadata_index = metadata_index or MetadataIndex(os.path.join(CHROMA_DB_PATH, METADATA_INDEX_FILENAME))
+            bm25_index = bm25_index or BM25Index(os.path.join(CHROMA_DB_PATH, BM25_INDEX_FILENAME))
+        if embedding_function is None:
+            embedding_function = get_embedder()
+        self.client = client
+        self.embedding_function = embedding_function
+        self.embedding_cache = embedding_cache
+        self.model_id = model_id or embedding_model_id(embedding_function)
+        self.parse_cache_path = parse_cache_path
+        self.metadata_index = metadata_index
+        self.bm25_index = bm25_index
+        self.versions = versions
+        self.chunk_size, self.overlap, self.boundary = chunk_size, overlap, boundary
+        self.batch_size = batch_size
+        self.upsert_batch_size = min(batch_size, client.get_max_batch_size())
+        self.max_retries = max_retries
+        self.clean = clean
+        self.dedup_threshold = dedup_threshold
+        self.dedup_scope = dedup_scope
+        self._dedup_indexes = {}
+        self._dedup_lock = threading.Lock()
+        self._conversion_pool = conversion_pool
+        self._owns_conversion_pool = False
+        self._convert_dir = None
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    # --- stage functions -------------------------------------------------
+
+    def convert(self, record: Dict) -> Dict:
+        if Path(record["path"]).suffix.lower() not in CONVERT_EXTENSIONS:
+            return record
+        with self._lock:
+            if self._conversion_pool is None:
+                from src.parsers.conversion_pool import CONVERSION_CACHE_PATH, ConversionPool
+                from src.storage.conversion_cache import ConversionCache
+                self._conversion_pool = ConversionPool(cache=ConversionCache(CONVERSION_CACHE_PATH))
+                self._owns_conversion_pool = True
+            if self._convert_dir is None:
+                self._convert_dir = Path(tempfile.mkdtemp(prefix="ingest_converted_"))
+        # One output directory per source path, so same-named files from different folders don't collide
+        digest = hashlib.sha1(str(Path(record["path"]).resolve()).encode("utf-8")).hexdigest()[:16]
+        converted = self._conversion_pool.convert(record["path"], self._convert_dir / digest)
+        record["parse_path"] = converted["output_file"]
+        return record
+
+    def chunk(self, parsed: Dict) -> Optional[Dict]:
+        if self.clean:
+            parsed = clean_parsed([parsed], self.chunk_size, self.overlap, boundary=self.boundary)[0]
+        duplicates, dropped = {}, []
+        chunks = prepare_chunks([parsed], self.chunk_size, self.overlap, boundary=self.boundary,
+                                dedup_threshold=self.dedup_threshold, dedup_scope=self.dedup_scope,
+                                dedup_indexes=self._dedup_index(parsed["user_id"]), duplicates=duplicates,
+                                dropped=dropped).get(parsed["user_id"])
+        if not chunks and not dropped:
+            return None
+        item = {"file_id": parsed["file_id"], "user_id": parsed["user_id"], "path": parsed["filename"],
+                "chunks": chunks or []}
+        if "cleaning" in parsed:
+            item["cleaning"] = parsed["cleaning"]
+        if duplicates:
+            item["duplicates"] = duplicates
+            item["dropped"] = dropped
+        return item
+
+    def _dedup_index(self, user_id: str) -> Dict:
+        """self._dedup_indexes, with user_id's index seeded from its collection on first use (scope "user")."""
+        if not self.dedup_threshold or self.dedup_scope != "user" or self.metadata_index is None:
+            return self._dedup_indexes
+        with self._dedup_lock:
+            if user_id not in self._dedup_indexes:
+                self._dedup_indexes.update(
+                    load_dedup_indexes(self.client, [user_id], self.metadata_index, self.dedup_threshold)
+                )
+        return self._dedup_indexes
+
+    def embed(self, item: Dict) -> Dict:
+        documents = [chunk["text"] for chunk in item["chunks"]]
+        embeddings = []
+        for start in range(0, len(documents), self.batch_size):
+            batch = documents[start:start + self.batch_size]
+            embeddings.extend(_with_retries(
+                lambda: embed_with_cache(batch, self.embedding_function, self.embedding_cache, self.model_id),
+                self.max_retries, f"Embedding {item['file_id']}"
+            ))
+        item["embeddings"] = embeddings
+        return item
+
+    def _collection(self, collection_name: str, user_id: str):
+        with self._lock:
+            if collection_name not in self._collections:
+                collection = self.client.get_or_create_collection(
+                    name=collection_name, metadata={"user_id": user_id}, embedding_function=self.embedding_function
+                )
+                check_collection_embedder(collection, self.model_id)
+                ensure_indexed(collection, collection_name, self.metadata_index, self.bm25_index)
+                self._collections[collection_name] = collection
+            return self._collections[collection_name]
+
+    def upsert(self, item: Dict) -> Dict:
+        chunks, embeddings = item["chunks"], item["embeddings"]
+        collection_name = normalize_collection_name(item["user_id"])
+        collection = self._collection(collection_name, item["user_id"])
+        written = set()
+        try:
+            for start in range(0, len(chunks), self.upsert_batch_size):
+                batch = chunks[start:start + self.upsert_batch_size]
+                ids = [chunk_id(chunk["file_id"], chunk["chunk_index"]) for chunk in batch]
+                documents = [chunk["text"] for chunk in batch]
+                _with_retries(
+                    lambda: collection.upsert(ids=ids, documents=documents,
+                                              embeddings=embeddings[start:start + self.upsert_batch_size],
+                                              metadatas=[chunk_metadata(chunk) for chunk in batch]),
+                    self.max_retries, f"Upserting {item['file_id']} into {collection_name}"
+                )
+                written.update(ids)
+                index_lexical(self.bm25_index, collection_name, ids, documents)
+        finally:
+            # Index whatever reached Chroma, even if a later batch failed
+            if self.metadata_index is not None:
+                dedup_index = self._dedup_indexes.get(item["user_id"]) if self.dedup_scope == "user" else None
+                _index_files(collection, collection_name, chunks, self.metadata_index, self.bm25_index, written,
+                             item.get("dropped"), dedup_index)
+        if self.versions is not None:
+            self.versions.bump(collection_name)
+        result = {"file_id": item["file_id"], "user_id": item["user_id"], "chunks": len(chunks)}
+        for key in ("cleaning", "duplicates"):
+            if key in item:
+                result[key] = item[key]
+        return result
+
+    # --- pipeline ---------------------------------------------------------
+
+    def build(self, convert_workers: int = 2, parse_workers: Optional[int] = None, parse_processes: bool = True,
+              chunk_workers: int = 1, embed_workers: int = 2, upsert_workers: int = 1,
+              queue_size: int = 8) -> Pipeline:
+        """
+        Assemble the stages. Parsing is CPU-bound and runs in processes by
+        default; conversion, embedding and upserts wait on LibreOffice, the
+        embedding model/API and Chroma, so they use threads.
+        """
+        from functools import partial
+        parse_workers = parse_workers or os.cpu_count() or 1
+        parse = partial(parse_file, cache_path=self.parse_cache_path)
+        return Pipeline([
+            Stage("convert", self.convert, convert_workers, queue_size=queue_size),
+            Stage("parse", parse, parse_workers, processes=parse_processes, queue_size=queue_size),
+            Stage("chunk", self.chunk, chunk_workers, queue_size=queue_size),
+            Stage("embed", self.embed, embed_workers, queue_size=queue_size),
+            Stage("upsert", self.upsert, upsert_workers, queue_size=queue_size)
+        ])
+
+    def ingest(self, records: Iterable[Dict], on_result: Optional[Callable] = None, **build_kwargs) -> Dict:
+        """
+        Run records through the pipeline.
+
+        Returns:
+            {"files": [...], "errors": [...], "metrics": Pipeline.metrics()}
+        """
+        pipeline = self.build(**build_kwargs)
+        try:
+            files = pipeline.run(records, on_result)
+        finally:
+            if self._owns_conversion_pool:
+                self._conversion_pool.shutdown()
+                self._conversion_pool, self._owns_conversion_pool = None, False
+            # Converted PDFs are only needed until their parse stage has run
+            if self._convert_dir is not None:
+                shutil.rmtree(self._convert_dir, ignore_errors=True)
+                self._convert_dir = None
+        return {"files": files, "errors": pipeline.errors, "metrics": pipeline.metrics()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest a directory or manifest: convert, parse, chunk, embed and upsert.")
+    parser.add_argument('source', help='Directory (walked recursively) or JSON/NDJSON manifest of {"path", ...} entries')
+    parser.add_argument('--user-id', default='default_user', help='Owner for entries without a user_id')
+    parser.add_argument('--class-name', default='', help='Class for entries without one')
+    parser.add_argument('--topic', default='', help='Topic for entries without one')
+    parser.add_argument('--convert-workers', type=int, default=2, help='Concurrent conversions (threads)')
+    parser.add_argument('--parse-workers', type=int, default=None, help='Parser processes (defaults to the core count)')
+    parser.add_argument('--embed-workers', type=int, default=2, help='Concurrent embedding calls (threads)')
+    parser.add_argument('--upsert-workers', type=int, default=1, help='Concurrent Chroma writers (threads)')
+    parser.add_argument('--queue-size', type=int, default=8, help='Files buffered between stages')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Character budget per chunk')
+    parser.add_argument('--overlap', type=int, default=200, help='Characters shared between consecutive chunks')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Chunks per embed/upsert call')
+    parser.add_argument('--no-clean', action='store_true', help='Chunk the parsed text as-is, without cleaning')
+    parser.add_argument('--dedup-threshold', type=float, default=DEDUP_THRESHOLD,
+                        help='Drop chunks at least this similar (Jaccard) to a kept chunk; 0 (default) disables')
+    parser.add_argument('--dedup-scope', default=DEDUP_SCOPE, choices=['file', 'user'],
+                        help='Compare chunks within each file or across all of a user\'s files')
+    parser.add_argument('--parse-cache-path', default=PARSE_CACHE_PATH,
+                        help='Parse cache directory (default $PARSE_CACHE_PATH; none disables caching)')
+    parser.add_argument('--cache-path', default=EMBEDDING_CACHE_PATH, help='Embedding cache SQLite file')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the parse and embedding caches')
+    add_embedder_arguments(parser)
+    args = parser.parse_args()
+
+    records = discover(args.source, args.user_id, args.class_name, args.topic)
+    print(f"[INGEST] {len(records)} files from {args.source}", file=sys.stderr)
+    ingestor = Ingestor(
+        embedding_function=embedder_from_args(args),
+        embedding_cache=None if args.no_cache else EmbeddingCache(args.cache_path),
+        parse_cache_path=None if args.no_cache else args.parse_cache_path,
+        chunk_size=args.chunk_size, overlap=args.overlap, batch_size=args.batch_size, clean=not args.no_clean,
+        dedup_threshold=args.dedup_threshold or None, dedup_scope=args.dedup_scope
+    )
+    report = ingestor.ingest(
+        records, on_result=lambda result: print(json.dumps(result), flush=True),
+        convert_workers=args.convert_workers, parse_workers=args.parse_workers,
+        embed_workers=args.embed_workers, upsert_workers=args.upsert_workers, queue_size=args.queue_size
+    )
+    for error in report["errors"]:
+        print(f"❌ [{error['stage']}] {error['item']}: {error['error']}", file=sys.stderr)
+    print(json.dumps({"metrics": report["metrics"]}), file=sys.stderr)
+    if report["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+import posixpath
+import re
+import sys
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Add the project root to sys.path for absolute imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.storage.file_store import PARSE_CACHE_PATH, FileStore
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+A_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+P_NS = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+R_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# Paragraph styles that open a new section ("Heading 1".."Heading 9", "Title")
+_HEADING_STYLE = re.compile(r'^(heading\s*\d|title)$', re.IGNORECASE)
+
+
+def join_sections(sections: List[str]) -> Tuple[str, List[int]]:
+    """
+    Join section texts with blank lines and record where each one starts.
+
+    Returns:
+        (text, section_offsets); the blank-line separator lets paragraph-aware
+        chunking break on section boundaries as well.
+    """
+    offsets = []
+    offset = 0
+    for text in sections:
+        offsets.append(offset)
+        offset += len(text) + 2
+    return "\n\n".join(sections), offsets
+
+
+class _ZipParser:
+    """Shared extension check and parse caching for the Office Open XML (zip) formats."""
+    # Bump when extract_text() output changes so cached results are not reused
+    PARSER_VERSION = "1"
+    supported_extensions = set()
+
+    def __init__(self, cache: Optional[FileStore] = None):
+        """
+        Args:
+            cache: Parse cache consulted before extracting (None always parses)
+        """
+        self.cache = cache
+
+    def extract_text(self, file_path: str | Path) -> Dict:
+        """Extract text and metadata (see _extract_text), from the parse cache when it has this file."""
+        file_path = self._check_file(file_path)
+        if self.cache is not None:
+            return self.cache.get_or_parse(file_path, type(self).__name__, self.PARSER_VERSION,
+                                           lambda: self._extract_text(file_path))
+        return self._extract_text(file_path)
+
+    def _check_file(self, file_path: str | Path) -> Path:
+        if not isinstance(file_path, Path):
+            file_path = Path(file_path)
+
+        if file_path.suffix.lower() not in self.supported_extensions:
+            raise ValueError(f"Unsupported file type: {file_path.suffix}")
+        return file_path
+
+
+class DocxParser(_ZipParser):
+    """Reads paragraph text straight from word/document.xml, without converting to PDF."""
+
+    def __init__(self, cache: Optional[FileStore] = None):
+        super().__init__(cache)
+        self.supported_extensions = {'.docx'}
+
+    def iter_sections(self, file_path: str | Path) -> Iterator[Tuple[str, str]]:
+        """
+        Stream the document one heading-delimited section at a time.
+
+        The XML is parsed incrementally and each paragraph is discarded once
+        its text is read, so memory is bounded by the largest section.
+
+        Args:
+            file_path: Path to the DOCX file
+
+        Yields:
+            (heading, text) tuples; text starts with the heading itself and the
+            first section's heading is "" when the document does not open with one
+        """
+        file_path = self._check_file(file_path)
+        try:
+            with zipfile.ZipFile(file_path) as z, z.open("word/document.xml") as xml:
+                heading, lines = "", []
+                for _, elem in ET.iterparse(xml, events=("end",)):
+                    if elem.tag != W_NS + "p":
+                        continue
+                    text = _paragraph_text(elem)
+                    style = elem.find(f"{W_NS}pPr/{W_NS}pStyle")
+                    is_heading = style is not None and _HEADING_STYLE.match(style.get(W_NS + "val", ""))
+                    elem.clear()
+                    if is_heading and text.strip():
+                        if any(line.strip() for line in lines):
+                            yield heading, "\n".join(lines).strip()
+                        heading, lines = text.strip(), []
+                    if text.strip():
+                        lines.append(text)
+                if any(line.strip() for line in lines):
+                    yield heading, "\n".join(lines).strip()
+        except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+            raise Exception(f"Error processing DOCX {file_path}: {str(e)}")
+
+    def _extract_text(self, file_path: Path) -> Dict:
+        """
+        Extract text from a DOCX file.
+
+        Args:
+            file_path: Path to the DOCX file
+
+        Returns:
+            Dict containing extracted text and metadata. "section_offsets" holds
+            the start offset of each heading-delimited section in "text" for
+            use as chunk boundaries.
+        """
+        text, section_offsets = join_sections([text for _, text in self.iter_sections(file_path)])
+        return {
+            "text": text,
+            "num_sections": len(section_offsets),
+            "section_offsets": section_offsets,
+            "filename": file_path.name,
+            "file_type": "docx",
+            "class": "",  # Will be filled by server
+            "topic": ""   # Will be filled by server
+        }
+
+
+def _paragraph_text(paragraph: ET.Element) -> str:
+    parts = []
+    for node in paragraph.iter():
+        if node.tag == W_NS + "t" and node.text:
+            parts.append(node.text)
+        elif node.tag == W_NS + "tab":
+            parts.append("\t")
+        elif node.tag in (W_NS + "br", W_NS + "cr"):
+            parts.append("\n")
+    return "".join(parts)
+
+
+class PptxParser(_ZipParser):
+    """Reads slide text straight from the slide XML parts, without converting to PDF."""
+
+    def __init__(self, cache: Optional[FileStore] = None):
+        super().__init__(cache)
+        self.supported_extensions = {'.pptx'}
+
+    def _slide_parts(self, z: zipfile.ZipFile) -> List[str]:
+        """Slide part names in presentation order (falls back to slideN numbering)."""
+        try:
+            with z.open("ppt/_rels/presentation.xml.rels") as f:
+                targets = {rel.get("Id"): rel.get("Target") for rel in ET.parse(f).getroot().iter(REL_NS + "Relationship")}
+            with z.open("ppt/presentation.xml") as f:
+                slide_ids = ET.parse(f).getroot().iter(P_NS + "sldId")
+                parts = [posixpath.normpath(posixpath.join("ppt", targets[s.get(R_NS + "id")])) for s in slide_ids]
+            if parts:
+                return parts
+        except (KeyError, ET.ParseError):
+            pass
+        names = [n for n in z.namelist() if re.fullmatch(r'ppt/slides/slide\d+\.xml', n)]
+        return sorted(names, key=lambda n: int(re.search(r'(\d+)\.xml$', n).group(1)))
+
+    def iter_slides(self, file_path: str | Path) -> Iterator[Tuple[int, str]]:
+        """
+        Stream slide text one slide at a time.
+
+        Args:
+            file_path: Path to the PPTX file
+
+        Yields:
+            (slide_number, text) tuples, with 1-based slide numbers and one
+            line per text paragraph
+        """
+        file_path = self._check_file(file_path)
+        try:
+            with zipfile.ZipFile(file_path) as z:
+                for slide_num, part in enumerate(self._slide_parts(z)):
+                    with z.open(part) as xml:
+                        lines = []
+                        for _, elem in ET.iterparse(xml, events=("end",)):
+                            if elem.tag == A_NS + "p":
+                                line = "".join(t.text or "" for t in elem.iter(A_NS + "t"))
+                                if line.strip():
+                                    lines.append(line)
+                                elem.clear()
+                    yield slide_num + 1, "\n".join(lines)
+        except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+            raise Exception(f"Error processing PPTX {file_path}: {str(e)}")
+
+    def _extract_text(self, file_path: Path) -> Dict:
+        """
+        Extract text from a PPTX file.
+
+        Args:
+            file_path: Path to the PPTX file
+
+        Returns:
+            Dict containing extracted text and metadata. Slides play the role of
+            pages: "page_offsets" maps chunks back to slide numbers and
+            "section_offsets" keeps chunks from straddling slides.
+        """
+        text, offsets = join_sections([text for _, text in self.iter_slides(file_path)])
+        return {
+            "text": text,
+            "num_pages": len(offsets),
+            "page_offsets": offsets,
+            "section_offsets": offsets,
+            "filename": file_path.name,
+            "file_type": "pptx",
+            "class": "",  # Will be filled by server
+            "topic": ""   # Will be filled by server
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract text from a DOCX or PPTX file without converting it to PDF.")
+    parser.add_argument('file_path', help='Path to the DOCX/PPTX file')
+    parser.add_argument('--cache-path', default=PARSE_CACHE_PATH,
+                        help='Parse cache directory (default $PARSE_CACHE_PATH; none disables caching)')
+    parser.add_argument('--no-cache', action='store_true', help='Always parse, never reuse cached results')
+    args = parser.parse_args()
+
+    suffix = Path(args.file_path).suffix.lower()
+    cache = FileStore(args.cache_path) if args.cache_path and not args.no_cache else None
+    office_parser = PptxParser(cache) if suffix == '.pptx' else DocxParser(cache)
+
+    try:
+        result = office_parser.extract_text(args.file_path)
+        print(json.dumps(result))
+        if cache is not None:
+            print(f"[PARSE CACHE] {json.dumps(cache.stats())}", file=sys.stderr)
+    except Exception as e:
+        print(json.dumps({"error": str(e)}), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
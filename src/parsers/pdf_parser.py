@@ -1,64 +1,165 @@
 import pymupdf
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+import argparse
 import json
+import os
 import sys
 
+# Add the project root to sys.path for absolute imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.storage.file_store import PARSE_CACHE_PATH, FileStore
+
+# Smallest page range handed to one worker; below this process overhead dominates
+MIN_PAGES_PER_TASK = 8
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Open the document independently and return the text of pages [start, stop)."""
+    with pymupdf.open(file_path) as doc:
+        return [doc[page_num].get_text() for page_num in range(start, stop)]
+
+def page_for_offset(page_offsets: List[int], offset: int) -> int:
+    """
+    Map a character offset in the extracted text back to its (1-based) page number.
+
+    Args:
+        page_offsets: Start offset of every page, as returned by extract_text()
+        offset: Character offset into the extracted text
+
+    Returns:
+        1-based page number containing the offset
+    """
+    return max(1, bisect_right(page_offsets, offset))
+
 class PDFParser:
-    def __init__(self):
-        self.supported_extensions = {'.pdf'}
+    # Bump when extract_text() output changes so cached results are not reused
+    PARSER_VERSION = "1"
 
-    def extract_text(self, file_path: str | Path) -> Dict[str, str]:
+    def __init__(self, cache: Optional[FileStore] = None):
         """
-        Extract text from a PDF file.
-        
+        Initialize the PDF parser.
+
         Args:
-            file_path: Path to the PDF file
-            
-        Returns:
-            Dict containing extracted text and metadata
+            cache: Parse cache consulted before extracting (None always parses)
         """
+        self.supported_extensions = {'.pdf'}
+        self.cache = cache
+
+    def _check_file(self, file_path: str | Path) -> Path:
         if not isinstance(file_path, Path):
             file_path = Path(file_path)
-            
+
         if file_path.suffix.lower() not in self.supported_extensions:
             raise ValueError(f"Unsupported file type: {file_path.suffix}")
-            
+        return file_path
+
+    def iter_pages(self, file_path: str | Path) -> Iterator[Tuple[int, str]]:
+        """
+        Stream page text without holding the whole document's text in memory.
+
+        Args:
+            file_path: Path to the PDF file
+
+        Yields:
+            (page_number, text) tuples, with 1-based page numbers
+        """
+        file_path = self._check_file(file_path)
         try:
-            doc = pymupdf.open(file_path)
-            text_content = []
-            
-            for page_num, page in enumerate(doc):
-                text = page.get_text()
-                text_content.append(text)
-                
+            with pymupdf.open(file_path) as doc:
+                for page_num, page in enumerate(doc):
+                    yield page_num + 1, page.get_text()
+        except Exception as e:
+            raise Exception(f"Error processing PDF {file_path}: {str(e)}")
+
+    def extract_text(self, file_path: str | Path, parallel: bool = False,
+                     max_workers: Optional[int] = None) -> Dict[str, str]:
+        """
+        Extract text from a PDF file.
+
+        Args:
+            file_path: Path to the PDF file
+            parallel: Split page ranges across worker processes
+            max_workers: Worker processes in parallel mode (defaults to the core count)
+
+        Returns:
+            Dict containing extracted text and metadata. "page_offsets" holds the
+            start offset of each page in "text" so chunks can be mapped back to
+            pages with page_for_offset().
+        """
+        file_path = self._check_file(file_path)
+        if self.cache is not None:
+            return self.cache.get_or_parse(file_path, "PDFParser", self.PARSER_VERSION,
+                                           lambda: self._extract_text(file_path, parallel, max_workers))
+        return self._extract_text(file_path, parallel, max_workers)
+
+    def _extract_text(self, file_path: Path, parallel: bool, max_workers: Optional[int]) -> Dict[str, str]:
+        try:
+            with pymupdf.open(file_path) as doc:
+                num_pages = len(doc)
+                if not parallel or num_pages < 2 * MIN_PAGES_PER_TASK:
+                    text_content = [page.get_text() for page in doc]
+                    parallel = False
+
+            if parallel:
+                text_content = self._extract_parallel(file_path, num_pages, max_workers)
+
+            # Pages are joined with "\n", so each page starts one past the previous end
+            page_offsets = []
+            offset = 0
+            for text in text_content:
+                page_offsets.append(offset)
+                offset += len(text) + 1
+
             return {
                 "text": "\n".join(text_content),
-                "num_pages": len(doc),
+                "num_pages": num_pages,
+                "page_offsets": page_offsets,
                 "filename": file_path.name,
                 "file_type": "pdf",
                 "class": "",  # Will be filled by server
                 "topic": ""   # Will be filled by server
             }
-            
+
         except Exception as e:
             raise Exception(f"Error processing PDF {file_path}: {str(e)}")
 
+    def _extract_parallel(self, file_path: Path, num_pages: int, max_workers: Optional[int]) -> List[str]:
+        workers = max_workers or os.cpu_count() or 1
+        # Several ranges per worker so uneven pages (scans, dense tables) balance out
+        step = max(MIN_PAGES_PER_TASK, -(-num_pages // (workers * 4)))
+        ranges = [(start, min(start + step, num_pages)) for start in range(0, num_pages, step)]
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+            futures = [pool.submit(_extract_page_range, str(file_path), start, stop) for start, stop in ranges]
+            text_content = []
+            for future in futures:
+                text_content.extend(future.result())
+        return text_content
+
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python pdf_parser.py <pdf_file_path>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Extract text from a PDF file.")
+    parser.add_argument('file_path', help='Path to the PDF file')
+    parser.add_argument('--parallel', action='store_true', help='Extract page ranges in worker processes')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes in parallel mode')
+    parser.add_argument('--cache-path', default=PARSE_CACHE_PATH,
+                        help='Parse cache directory (default $PARSE_CACHE_PATH; none disables caching)')
+    parser.add_argument('--no-cache', action='store_true', help='Always parse, never reuse cached results')
+    args = parser.parse_args()
+
+    file_path = args.file_path
+    cache = FileStore(args.cache_path) if args.cache_path and not args.no_cache else None
+    pdf_parser = PDFParser(cache)
 
-    file_path = sys.argv[1]
-    parser = PDFParser()
-    
     try:
-        result = parser.extract_text(file_path)
+        result = pdf_parser.extract_text(file_path, parallel=args.parallel, max_workers=args.workers)
         # Print the result as JSON to stdout
         print(json.dumps(result))
+        if cache is not None:
+            print(f"[PARSE CACHE] {json.dumps(cache.stats())}", file=sys.stderr)
     except Exception as e:
         print(json.dumps({"error": str(e)}), file=sys.stderr)
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,530 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import chromadb
+import numpy as np
+
+# Add the project root to sys.path for absolute imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.utils.ndjson_server import make_unix_socket_server, serve_stdio
+from src.storage.query_cache import COLLECTION_VERSIONS_FILENAME, CollectionVersions, TTLCache, normalize_query
+from src.storage.metadata_index import METADATA_INDEX_FILENAME, MetadataIndex
+from src.storage.bm25_index import BM25_INDEX_FILENAME, BM25Index, reciprocal_rank_fusion
+from src.storage.paths import CHROMA_DB_PATH
+from src.utils.embedders import (
+    add_embedder_arguments, check_collection_embedder, embedder_from_args, embedder_identity, get_embedder
+)
+
+# Same directory (and sidecar stores) the writers use, see src/storage/paths.py
+DEFAULT_CHROMA_DB_PATH = CHROMA_DB_PATH
+SEARCH_MODES = ("vector", "hybrid")
+# Hybrid mode drops BM25 hits scoring below this fraction of the best hit
+LEXICAL_SCORE_CUTOFF = 0.5
+
+
+def debug_log(msg):
+    print(f"[DEBUG] {msg}", file=sys.stderr)
+    sys.stderr.flush()
+
+
+def normalize_collection_name(collection_name: str) -> str:
+    """Always prefix 'user_' for user collections, except for the shared 'documents' collection."""
+    if collection_name != "documents" and not collection_name.startswith('user_'):
+        return f'user_{collection_name}'
+    return collection_name
+
+
+def format_results(results: Dict, index: int = 0) -> List[Dict]:
+    """Convert one query's worth of a Chroma query response into the search API shape."""
+    if not results['documents'] or not results['documents'][index]:
+        return []
+    formatted_results = []
+    for i in range(len(results['documents'][index])):
+        metadata = results['metadatas'][index][i] or {}
+        formatted_results.append({
+            "text": results['documents'][index][i],
+            "filename": metadata.get('filename', ''),
+            "class": metadata.get('class', ''),
+            "topic": metadata.get('topic', ''),
+            "similarity_score": 1 - (results['distances'][index][i] / 2)  # Convert distance to similarity score
+        })
+    return formatted_results
+
+
+class SearchService:
+    """
+    Keeps the ChromaDB client, the embedding model and opened collections warm
+    so repeated searches skip the cold start of a fresh process.
+    """
+
+    def __init__(self, chroma_db_path: Optional[str] = None, client=None,
+                 embedding_function=None, debug: bool = False, versions: Optional[CollectionVersions] = None,
+                 query_cache_size: int = 10_000, query_cache_ttl: float = 24 * 3600,
+                 result_cache_size: int = 2_000, result_cache_ttl: float = 300,
+                 metadata_index: Optional[MetadataIndex] = None, bm25_index: Optional[BM25Index] = None):
+        """
+        Initialize the search service.
+
+        Args:
+            chroma_db_path: Path of the persistent ChromaDB directory
+            client: Optional pre-built Chroma client (e.g. an EphemeralClient in tests)
+            embedding_function: Embedding function shared by every opened collection
+                (defaults to the configured embedder, see src.utils.embedders.get_embedder;
+                its identity must match the one recorded on the collections searched)
+            debug: Log a small sample of each collection the first time it is opened
+            versions: Per-collection write counters used to invalidate cached results
+                (defaults to the file shared with save_to_chroma in the ChromaDB directory,
+                or in-memory counters when a client is injected)
+            query_cache_size: Maximum cached query embeddings
+            query_cache_ttl: Seconds a cached query embedding stays valid
+            result_cache_size: Maximum cached result lists
+            result_cache_ttl: Seconds a cached result list stays valid
+            metadata_index: Sidecar index maintained by save_to_chroma, used for topic
+                filters and class/topic listings (same defaults as versions)
+            bm25_index: Lexical index maintained by save_to_chroma for hybrid search
+                (same defaults as versions)
+        """
+        self.chroma_db_path = chroma_db_path or DEFAULT_CHROMA_DB_PATH
+        # Constructing the embedder is cheap; the model itself loads on first use or warm_up()
+        self.embedding_function = embedding_function if embedding_function is not None else get_embedder()
+        self.model_id = embedder_identity(self.embedding_function)
+        self.debug = debug
+        if versions is None:
+            versions = CollectionVersions(
+                os.path.join(self.chroma_db_path, COLLECTION_VERSIONS_FILENAME) if client is None else None
+            )
+        self.versions = versions
+        if metadata_index is None:
+            metadata_index = MetadataIndex(
+                os.path.join(self.chroma_db_path, METADATA_INDEX_FILENAME) if client is None else None
+            )
+        self.metadata_index = metadata_index
+        if bm25_index is None:
+            bm25_index = BM25Index(
+                os.path.join(self.chroma_db_path, BM25_INDEX_FILENAME) if client is None else None
+            )
+        self.bm25_index = bm25_index
+        # Level 1: normalized query text -> query embedding
+        self.query_cache = TTLCache(query_cache_size, query_cache_ttl)
+        # Level 2: (collection, version, query, n_results, topic) -> formatted results
+        self.result_cache = TTLCache(result_cache_size, result_cache_ttl)
+        self._client = client
+        self._collections = {}
+        self._lock = threading.Lock()
+        self._backfill_lock = threading.Lock()
+        self._ready = threading.Event()
+        self.started_at = time.time()
+        self.stats = {"requests": 0, "errors": 0}
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = chromadb.PersistentClient(path=self.chroma_db_path)
+                debug_log(f"ChromaDB client initialized at {self.chroma_db_path}")
+            return self._client
+
+    def _get_embedding_function(self):
+        return self.embedding_function
+
+    def get_collection(self, collection_name: str):
+        """Return an opened collection, reusing the cached handle when available."""
+        collection_name = normalize_collection_name(collection_name)
+        collection = self._collections.get(collection_name)
+        if collection is not None:
+            return collection
+        client = self.client
+        with self._lock:
+            collection = self._collections.get(collection_name)
+            if collection is None:
+                collection = client.get_or_create_collection(
+                    name=collection_name,
+                    embedding_function=self._get_embedding_function()
+                )
+                # Querying vectors from another model returns meaningless neighbours
+                check_collection_embedder(collection, self.model_id, record=False)
+                self._collections[collection_name] = collection
+                debug_log(f"Collection '{collection_name}' opened")
+                if self.debug:
+                    self._log_sample(collection)
+        return collection
+
+    def _log_sample(self, collection):
+        try:
+            sample = collection.peek(limit=3)
+            debug_log(f"Collection count: {collection.count()}")
+            for i in range(len(sample['ids'])):
+                debug_log(f"Sample doc {i}: text={sample['documents'][i][:80]}... metadata={sample['metadatas'][i]}")
+        except Exception as e:
+            debug_log(f"Error retrieving collection docs for debug: {e}")
+
+    def warm_up(self, collection_names: Optional[List[str]] = None):
+        """
+        Open the client, load the embedding model and pre-open collections.
+
+        Args:
+            collection_names: Collections to open eagerly (defaults to none)
+        """
+        start = time.time()
+        embedding_function = self._get_embedding_function()
+        warm_up = getattr(embedding_function, "warm_up", None)
+        if warm_up is not None:
+            warm_up()
+        else:
+            embedding_function(["warm up"])
+        for name in collection_names or []:
+            self.get_collection(name)
+        self._ready.set()
+        debug_log(f"Search service ready in {time.time() - start:.2f}s")
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def search_similar_chunks(self, query: str, collection_name: str = "documents",
+                              n_results: int = 5, topic: str = None, mode: str = "vector",
+                              query_embedding: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        Search for similar chunks using ChromaDB.
+
+        Args:
+            query: Search query
+            collection_name: Collection (or bare user id) to search
+            n_results: Number of results to return
+            topic: Optional topic metadata filter
+            mode: "vector", or "hybrid" to fuse the vector ranking with BM25
+                  keyword matches (course codes, formula names, acronyms)
+            query_embedding: The query's embedding, when the caller already computed it
+
+        Returns:
+            List of result dicts (text, filename, class, topic, similarity_score;
+            hybrid results also carry fusion_score)
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'. Choose from: {', '.join(SEARCH_MODES)}")
+        collection_name = normalize_collection_name(collection_name)
+        normalized = normalize_query(query)
+        # A write to the collection bumps its version, so older entries can no longer be hit
+        result_key = (collection_name, self.versions.get(collection_name), normalized, n_results, topic or None, mode)
+        cached = self.result_cache.get(result_key)
+        if cached is not None:
+            return [dict(result) for result in cached]
+
+        topic_ids = None
+        if topic and self.metadata_index.is_complete(collection_name):
+            # Restrict the query to the topic's chunk ids instead of scanning metadata; only
+            # safe once every chunk is indexed, otherwise older chunks would silently drop out
+            topic_ids = self.metadata_index.chunk_ids(collection_name, topic=topic)
+            if not topic_ids:
+                return []
+        if query_embedding is None:
+            query_embedding = self.embed_query(normalized)
+        if mode == "hybrid":
+            results = self._hybrid_search(collection_name, query, query_embedding, n_results, topic, topic_ids)
+        else:
+            _, results = self._vector_search(collection_name, query_embedding, n_results, topic, topic_ids)
+        self.result_cache.put(result_key, results)
+        return [dict(result) for result in results]
+
+    def _vector_search(self, collection_name: str, query_embedding: np.ndarray, n_results: int,
+                       topic: Optional[str], topic_ids: Optional[List[str]]):
+        """Nearest-neighbour query; returns (chunk ids, formatted results) best first."""
+        query_kwargs = {
+            "query_embeddings": [np.asarray(query_embedding, dtype=np.float32).tolist()],
+            "n_results": n_results
+        }
+        if topic_ids is not None:
+            query_kwargs["ids"] = topic_ids
+            query_kwargs["n_results"] = min(n_results, len(topic_ids))
+        elif topic:
+            query_kwargs["where"] = {"topic": topic}
+        results = self.get_collection(collection_name).query(**query_kwargs)
+        return (results["ids"][0] if results["ids"] else []), format_results(results)
+
+    def _hybrid_search(self, collection_name: str, query: str, query_embedding: np.ndarray, n_results: int,
+                       topic: Optional[str], topic_ids: Optional[List[str]]) -> List[Dict]:
+        """
+        Fuse the top n_results of the vector and BM25 rankings with reciprocal rank fusion.
+
+        The pools are deliberately no deeper than n_results: in a deeper pool most
+        vector hits also share some query word, and RRF's agreement bonus then
+        outranks a chunk that only BM25 finds through an exact rare term.
+        """
+        vector_ids, vector_results = self._vector_search(collection_name, query_embedding, n_results, topic, topic_ids)
+        self._ensure_lexical(collection_name)
+        lexical = self.bm25_index.search(collection_name, query, n_results, topic_ids)
+        # Drop weak keyword matches (e.g. chunks sharing only a common query word)
+        lexical_ids = [doc_id for doc_id, score in lexical if score >= LEXICAL_SCORE_CUTOFF * lexical[0][1]]
+        by_id = dict(zip(vector_ids, vector_results))
+
+        # Keyword-only hits were not returned by the vector query; fetch their text and metadata
+        missing = [doc_id for doc_id in lexical_ids if doc_id not in by_id]
+        if missing:
+            fetched = self.get_collection(collection_name).get(ids=missing, include=["documents", "metadatas"])
+            for doc_id, text, metadata in zip(fetched["ids"], fetched["documents"], fetched["metadatas"]):
+                metadata = metadata or {}
+                if topic and metadata.get("topic") != topic:
+                    continue
+                by_id[doc_id] = {
+                    "text": text,
+                    "filename": metadata.get("filename", ''),
+                    "class": metadata.get("class", ''),
+                    "topic": metadata.get("topic", ''),
+                    "similarity_score": None
+                }
+        lexical_ids = [doc_id for doc_id in lexical_ids if doc_id in by_id]
+
+        fused = []
+        for doc_id, score in reciprocal_rank_fusion([vector_ids, lexical_ids])[:n_results]:
+            fused.append({**by_id[doc_id], "fusion_score": round(score, 6)})
+        return fused
+
+    def _ensure_lexical(self, collection_name: str):
+        """Index a collection's chunks for BM25 once if they were written without postings."""
+        if self.bm25_index.is_backfilled(collection_name):
+            return
+        with self._backfill_lock:
+            if not self.bm25_index.is_backfilled(collection_name):
+                count = self.bm25_index.backfill(collection_name, self.get_collection(collection_name))
+                debug_log(f"Backfilled BM25 index for {collection_name} ({count} chunks)")
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed query text, reusing the cached embedding for an identical normalized query."""
+        return self.embed_queries([query])[0]
+
+    def embed_queries(self, queries: List[str]) -> List[np.ndarray]:
+        """Embed several queries, computing every cache miss in one batched model call."""
+        keys = [(self.model_id, normalize_query(query)) for query in queries]
+        embeddings = [self.query_cache.get(key) for key in keys]
+        missing = list(dict.fromkeys(key for key, embedding in zip(keys, embeddings) if embedding is None))
+        if missing:
+            computed = self._get_embedding_function()([key[1] for key in missing])
+            for key, embedding in zip(missing, computed):
+                self.query_cache.put(key, np.asarray(embedding, dtype=np.float32))
+            fresh = dict(zip(missing, computed))
+            embeddings = [
+                embedding if embedding is not None else np.asarray(fresh[key], dtype=np.float32)
+                for key, embedding in zip(keys, embeddings)
+            ]
+        return embeddings
+
+    def batch_search(self, queries: List, collection_name: str = "documents", n_results: int = 5,
+                     topic: str = None, mode: str = "vector") -> Dict:
+        """
+        Run many searches with one embedding pass and one query per collection and filter.
+
+        Args:
+            queries: Query strings, or dicts with "query" and optional "collection",
+                     "n_results", "topic" and "mode" overriding the defaults below
+            collection_name: Default collection
+            n_results: Default number of results per query
+            topic: Default topic filter
+            mode: Default search mode; hybrid queries are fused one by one after
+                  sharing the batched embedding pass
+
+        Returns:
+            {"results": one result list per query, in order,
+             "union": distinct chunks across all queries (best score first), each
+                      with its chunk id and the indexes of the queries that found it}
+        """
+        requests = []
+        for item in queries:
+            item = {"query": item} if isinstance(item, str) else dict(item)
+            if not item.get("query"):
+                raise ValueError("Every batch entry needs a query")
+            requests.append({
+                "query": item["query"],
+                "collection": normalize_collection_name(item.get("collection") or collection_name),
+                "n_results": int(item.get("n_results") or n_results),
+                "topic": item.get("topic", topic) or None,
+                "mode": item.get("mode") or mode
+            })
+        for request in requests:
+            if request["mode"] not in SEARCH_MODES:
+                raise ValueError(f"Unknown search mode '{request['mode']}'. Choose from: {', '.join(SEARCH_MODES)}")
+
+        results: List[Optional[List[Dict]]] = [None] * len(requests)
+        ids: List[List[Optional[str]]] = [[] for _ in requests]
+        pending = []
+        for i, request in enumerate(requests):
+            request["key"] = (request["collection"], self.versions.get(request["collection"]),
+                              normalize_query(request["query"]), request["n_results"], request["topic"],
+                              request["mode"])
+            cached = self.result_cache.get(request["key"])
+            if cached is not None:
+                results[i] = [dict(result) for result in cached]
+            else:
+                pending.append(i)
+
+        embeddings = self.embed_queries([requests[i]["query"] for i in pending])
+        vectors = dict(zip(pending, embeddings))
+        groups: Dict[tuple, List[int]] = {}
+        for i in pending:
+            request = requests[i]
+            if request["mode"] == "hybrid":
+                results[i] = self.search_similar_chunks(request["query"], request["collection"],
+                                                        request["n_results"], request["topic"], "hybrid",
+                                                        query_embedding=vectors[i])
+                continue
+            groups.setdefault((request["collection"], request["topic"]), []).append(i)
+
+        for (name, group_topic), members in groups.items():
+            query_kwargs = {
+                "query_embeddings": [vectors[i].tolist() for i in members],
+                "n_results": max(requests[i]["n_results"] for i in members)
+            }
+            if group_topic and self.metadata_index.is_complete(name):
+                topic_ids = self.metadata_index.chunk_ids(name, topic=group_topic)
+                if not topic_ids:
+                    for i in members:
+                        results[i] = []
+                    continue
+                query_kwargs["ids"] = topic_ids
+                query_kwargs["n_results"] = min(query_kwargs["n_results"], len(topic_ids))
+            elif group_topic:
+                query_kwargs["where"] = {"topic": group_topic}
+            response = self.get_collection(name).query(**query_kwargs)
+            for row, i in enumerate(members):
+                formatted = format_results(response, row)[:requests[i]["n_results"]]
+                ids[i] = response["ids"][row][:len(formatted)]
+                self.result_cache.put(requests[i]["key"], formatted)
+                results[i] = [dict(result) for result in formatted]
+
+        return {"results": results, "union": self._union(requests, results, ids)}
+
+    @staticmethod
+    def _union(requests: List[Dict], results: List[List[Dict]], ids: List[List[Optional[str]]]) -> List[Dict]:
+        """Deduplicate chunks found by several queries by text, keeping each chunk's best score."""
+        union: Dict[tuple, Dict] = {}
+        for i, (request, found) in enumerate(zip(requests, results)):
+            for j, result in enumerate(found):
+                # Cached and hybrid results carry no chunk id
+                chunk_id = ids[i][j] if j < len(ids[i]) else None
+                key = (request["collection"], result["text"])
+                entry = union.get(key)
+                if entry is None:
+                    union[key] = {**result, "id": chunk_id, "collection": request["collection"], "queries": [i]}
+                    continue
+                entry["queries"].append(i)
+                entry["id"] = entry["id"] or chunk_id
+                if (result.get("similarity_score") or 0) > (entry.get("similarity_score") or 0):
+                    entry["similarity_score"] = result["similarity_score"]
+        return sorted(union.values(), key=lambda entry: entry.get("similarity_score") or 0, reverse=True)
+
+    def list_metadata(self, op: str, request: Dict) -> Dict:
+        """Answer a classes/topics/files listing from the metadata index."""
+        collection_name = normalize_collection_name(request.get("collection", "documents"))
+        if op == "classes":
+            return {"classes": self.metadata_index.classes(collection_name)}
+        if op == "topics":
+            return {"topics": self.metadata_index.topics(collection_name, request.get("class"))}
+        return {"files": self.metadata_index.files(collection_name, request.get("class"), request.get("topic"))}
+
+    def cache_stats(self) -> Dict:
+        """Hit rate, entry count and approximate memory of both cache levels."""
+        return {"query_cache": self.query_cache.stats(), "result_cache": self.result_cache.stats()}
+
+    def health(self) -> Dict:
+        """Readiness/health probe payload."""
+        return {
+            "status": "ok" if self.ready else "starting",
+            "ready": self.ready,
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "open_collections": len(self._collections),
+            **self.stats,
+            **self.cache_stats()
+        }
+
+    def handle_request(self, request: Dict) -> Dict:
+        """
+        Handle one decoded NDJSON request.
+
+        Supported requests:
+            {"op": "search", "query": ..., "collection": ..., "n_results": 5, "topic": ..., "mode": "vector"}
+            {"op": "batch_search", "queries": [...], "collection": ..., "n_results": 5, "topic": ...}
+            {"op": "classes", "collection": ...}
+            {"op": "topics", "collection": ..., "class": ...}
+            {"op": "files", "collection": ..., "class": ..., "topic": ...}
+            {"op": "health"}
+        """
+        op = request.get("op", "search")
+        if op == "health":
+            return self.health()
+        if op in ("classes", "topics", "files"):
+            return self.list_metadata(op, request)
+        if op == "batch_search":
+            if not request.get("queries"):
+                return {"error": "Missing queries"}
+            self._count("requests")
+            try:
+                return self.batch_search(
+                    request["queries"],
+                    collection_name=request.get("collection", "documents"),
+                    n_results=int(request.get("n_results", 5)),
+                    topic=request.get("topic"),
+                    mode=request.get("mode") or "vector"
+                )
+            except Exception:
+                self._count("errors")
+                raise
+        if op != "search":
+            return {"error": f"Unknown op: {op}"}
+        if not request.get("query"):
+            return {"error": "Missing search query"}
+        self._count("requests")
+        try:
+            results = self.search_similar_chunks(
+                query=request["query"],
+                collection_name=request.get("collection", "documents"),
+                n_results=int(request.get("n_results", 5)),
+                topic=request.get("topic"),
+                mode=request.get("mode") or "vector"
+            )
+        except Exception:
+            self._count("errors")
+            raise
+        return {"results": results}
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident semantic search worker (NDJSON over stdio or a Unix socket).")
+    parser.add_argument('--socket', default=None, help='Serve on this Unix socket path instead of stdin/stdout')
+    parser.add_argument('--workers', type=int, default=4, help='Maximum number of concurrent requests')
+    parser.add_argument('--chroma-path', default=None, help='ChromaDB directory (defaults to backend/chroma_db)')
+    parser.add_argument('--preload', nargs='*', default=[], help='Collections to open at startup')
+    parser.add_argument('--debug', action='store_true', help='Log a sample of each collection when opened')
+    parser.add_argument('--query-cache-size', type=int, default=10_000, help='Cached query embeddings')
+    parser.add_argument('--result-cache-size', type=int, default=2_000, help='Cached result lists')
+    parser.add_argument('--result-ttl', type=float, default=300, help='Seconds a cached result list stays valid')
+    add_embedder_arguments(parser)
+    args = parser.parse_args()
+
+    service = SearchService(chroma_db_path=args.chroma_path, debug=args.debug,
+                            embedding_function=embedder_from_args(args),
+                            query_cache_size=args.query_cache_size, result_cache_size=args.result_cache_size,
+                            result_cache_ttl=args.result_ttl)
+    # Warm up in the background so health probes can report "starting" meanwhile
+    threading.Thread(target=service.warm_up, args=(args.preload,), daemon=True).start()
+
+    if args.socket:
+        server = make_unix_socket_server(service.handle_request, args.socket, max_workers=args.workers)
+        debug_log(f"Listening on {args.socket}")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            os.unlink(args.socket)
+    else:
+        serve_stdio(service.handle_request, max_workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
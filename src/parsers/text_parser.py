@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+# Add the project root to sys.path for absolute imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.parsers.office_parser import join_sections
+from src.storage.file_store import PARSE_CACHE_PATH, FileStore
+
+MARKDOWN_EXTENSIONS = {'.md', '.markdown'}
+# ATX heading ("# Title" .. "###### Title"); setext headings are left in their section
+_MD_HEADING = re.compile(r'^ {0,3}#{1,6}(\s|$)')
+_MD_FENCE = re.compile(r'^ {0,3}(```|~~~)')
+
+
+class TextParser:
+    """Reads plain text and Markdown directly; no conversion or layout analysis is needed."""
+
+    # Bump when extract_text() output changes so cached results are not reused
+    PARSER_VERSION = "1"
+
+    def __init__(self, cache: Optional[FileStore] = None):
+        """
+        Initialize the text parser.
+
+        Args:
+            cache: Parse cache consulted before extracting (None always parses)
+        """
+        self.supported_extensions = {'.txt'} | MARKDOWN_EXTENSIONS
+        self.cache = cache
+
+    def _check_file(self, file_path: str | Path) -> Path:
+        if not isinstance(file_path, Path):
+            file_path = Path(file_path)
+
+        if file_path.suffix.lower() not in self.supported_extensions:
+            raise ValueError(f"Unsupported file type: {file_path.suffix}")
+        return file_path
+
+    def iter_sections(self, file_path: str | Path) -> Iterator[Tuple[str, str]]:
+        """
+        Stream the file one section at a time, reading it line by line.
+
+        Markdown sections start at ATX headings (outside fenced code blocks);
+        plain text sections are separated by form feeds (page breaks in
+        exported text).
+
+        Args:
+            file_path: Path to the text file
+
+        Yields:
+            (heading, text) tuples; heading is "" for plain text and for
+            anything before the first Markdown heading
+        """
+        file_path = self._check_file(file_path)
+        markdown = file_path.suffix.lower() in MARKDOWN_EXTENSIONS
+        heading, lines, in_fence = "", [], False
+        # utf-8-sig drops a BOM; undecodable bytes are replaced rather than failing the upload
+        with open(file_path, "r", encoding="utf-8-sig", errors="replace") as f:
+            for line in f:
+                line = line.rstrip("\r\n")
+                if markdown and _MD_FENCE.match(line):
+                    in_fence = not in_fence
+                starts_section = markdown and not in_fence and _MD_HEADING.match(line)
+                if not markdown and "\f" in line:
+                    *pages, line = line.split("\f")
+                    for page in pages:
+                        lines.append(page)
+                        if "".join(lines).strip():
+                            yield heading, "\n".join(lines).strip()
+                        lines = []
+                if starts_section:
+                    if "".join(lines).strip():
+                        yield heading, "\n".join(lines).strip()
+                    heading, lines = line.lstrip(" #").strip(), []
+                lines.append(line)
+        if "".join(lines).strip():
+            yield heading, "\n".join(lines).strip()
+
+    def extract_text(self, file_path: str | Path) -> Dict:
+        """
+        Extract text from a .txt or .md file.
+
+        Args:
+            file_path: Path to the text file
+
+        Returns:
+            Dict containing the text and metadata. "section_offsets" holds the
+            start offset of each section in "text" for use as chunk boundaries.
+        """
+        file_path = self._check_file(file_path)
+        if self.cache is not None:
+            return self.cache.get_or_parse(file_path, "TextParser", self.PARSER_VERSION,
+                                           lambda: self._extract_text(file_path))
+        return self._extract_text(file_path)
+
+    def _extract_text(self, file_path: Path) -> Dict:
+        text, section_offsets = join_sections([text for _, text in self.iter_sections(file_path)])
+        return {
+            "text": text,
+            "num_sections": len(section_offsets),
+            "section_offsets": section_offsets,
+            "filename": file_path.name,
+            "file_type": file_path.suffix.lower().lstrip("."),
+            "class": "",  # Will be filled by server
+            "topic": ""   # Will be filled by server
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract text from a .txt or .md file.")
+    parser.add_argument('file_path', help='Path to the text file')
+    parser.add_argument('--cache-path', default=PARSE_CACHE_PATH,
+                        help='Parse cache directory (default $PARSE_CACHE_PATH; none disables caching)')
+    parser.add_argument('--no-cache', action='store_true', help='Always parse, never reuse cached results')
+    args = parser.parse_args()
+
+    cache = FileStore(args.cache_path) if args.cache_path and not args.no_cache else None
+    try:
+        result = TextParser(cache).extract_text(args.file_path)
+        print(json.dumps(result))
+        if cache is not None:
+            print(f"[PARSE CACHE] {json.dumps(cache.stats())}", file=sys.stderr)
+    except Exception as e:
+        print(json.dumps({"error": str(e)}), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
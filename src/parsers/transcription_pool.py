@@ -0,0 +1,246 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# Add the project root to sys.path for absolute imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.storage.file_store import PARSE_CACHE_PATH, FileStore
+from src.utils.ndjson_server import serve_stdio
+
+# Parse caches opened in this worker process, keyed by directory
+_PARSE_CACHES = {}
+
+
+def default_pool_size(max_workers: Optional[int] = None,
+                      threads_per_worker: Optional[int] = None) -> tuple:
+    """
+    Partition the CPU cores between workers so workers * threads never exceeds the core count.
+
+    Args:
+        max_workers: Requested worker count (derived from the core count if omitted)
+        threads_per_worker: Requested torch threads per worker (derived if omitted)
+
+    Returns:
+        (max_workers, threads_per_worker)
+    """
+    cpus = os.cpu_count() or 1
+    if max_workers is None and threads_per_worker is None:
+        # Whisper decoding scales reasonably up to ~4 threads; use the rest for more workers
+        threads_per_worker = min(4, cpus)
+    if max_workers is None:
+        max_workers = max(1, cpus // threads_per_worker)
+    if threads_per_worker is None:
+        threads_per_worker = max(1, cpus // max_workers)
+    threads_per_worker = max(1, min(threads_per_worker, cpus // max_workers or 1))
+    return max_workers, threads_per_worker
+
+
+def init_worker(model_size: str, threads_per_worker: int):
+    """Pin torch threading for this worker and load the default model up front."""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads_per_worker)
+    import torch
+    torch.set_num_threads(threads_per_worker)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Can only be set once per process, before any parallel work
+        pass
+    from src.parsers.audio_parser import load_model
+    load_model(model_size)
+
+
+def _transcribe_job(file_path: str, model_size: str, cache_path: Optional[str] = None) -> Dict:
+    """Run one transcription inside a worker and return the result plus timing metrics."""
+    from src.parsers.audio_parser import AudioParser, model_load_seconds
+
+    cache = None
+    if cache_path is not None:
+        cache = _PARSE_CACHES.get(cache_path)
+        if cache is None:
+            cache = _PARSE_CACHES.setdefault(cache_path, FileStore(cache_path))
+    parser = AudioParser(model_size, cache)
+    start = time.perf_counter()
+    result = parser.transcribe(file_path)
+    return {
+        "result": result,
+        "metrics": {
+            "worker": f"{os.getpid()}:{threading.get_ident()}",
+            "decode_seconds": time.perf_counter() - start,
+            "model_load_seconds": model_load_seconds(),
+            "cache_hit": cache is not None and parser.decoded == 0
+        }
+    }
+
+
+class TranscriptionPool:
+    """
+    Pool of transcription workers that keep Whisper models resident.
+
+    Each worker loads a model size the first time it sees it and reuses it for
+    every later job, so uploads only pay the decoding cost.
+    """
+
+    def __init__(self, model_size: str = "small", max_workers: Optional[int] = None,
+                 threads_per_worker: Optional[int] = None, use_processes: bool = True,
+                 cache_path: Optional[str] = None):
+        """
+        Initialize the transcription pool.
+
+        Args:
+            model_size: Default Whisper model size, preloaded in every worker
+            max_workers: Maximum number of concurrent transcriptions
+            threads_per_worker: torch intra-op threads per worker
+            use_processes: Run workers as processes (True) or threads in this process (False)
+            cache_path: Parse cache directory shared by the workers (None always transcribes)
+        """
+        self.model_size = model_size
+        self.cache_path = str(cache_path) if cache_path is not None else None
+        self.max_workers, self.threads_per_worker = default_pool_size(max_workers, threads_per_worker)
+        if use_processes:
+            # "spawn" avoids forking a parent that may already hold torch thread pools
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(model_size, self.threads_per_worker)
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=init_worker,
+                initargs=(model_size, self.threads_per_worker)
+            )
+        self._lock = threading.Lock()
+        self._metrics = {
+            "jobs_submitted": 0,
+            "jobs_completed": 0,
+            "jobs_failed": 0,
+            "decode_seconds_total": 0.0,
+            "model_load_seconds": {},
+            "cache_hits": 0,
+            "cache_misses": 0
+        }
+
+    def submit(self, file_path: str | Path, model_size: Optional[str] = None) -> Future:
+        """
+        Queue a file for transcription.
+
+        Args:
+            file_path: Path to the audio file
+            model_size: Whisper model size for this job (defaults to the pool's model)
+
+        Returns:
+            Future resolving to the same dict AudioParser.transcribe() returns
+        """
+        with self._lock:
+            self._metrics["jobs_submitted"] += 1
+        job = self._executor.submit(_transcribe_job, str(file_path), model_size or self.model_size, self.cache_path)
+        result = Future()
+
+        def done(job_future: Future):
+            try:
+                payload = job_future.result()
+            except Exception as e:
+                with self._lock:
+                    self._metrics["jobs_failed"] += 1
+                result.set_exception(e)
+                return
+            metrics = payload["metrics"]
+            with self._lock:
+                self._metrics["jobs_completed"] += 1
+                if self.cache_path is not None:
+                    self._metrics["cache_hits" if metrics["cache_hit"] else "cache_misses"] += 1
+                if not metrics["cache_hit"]:
+                    self._metrics["decode_seconds_total"] += metrics["decode_seconds"]
+                self._metrics["model_load_seconds"][metrics["worker"]] = metrics["model_load_seconds"]
+            result.set_result(payload["result"])
+
+        job.add_done_callback(done)
+        return result
+
+    def transcribe(self, file_path: str | Path, model_size: Optional[str] = None) -> Dict:
+        """Transcribe one file and block until it is done."""
+        return self.submit(file_path, model_size).result()
+
+    def transcribe_many(self, file_paths: Iterable[str | Path], model_size: Optional[str] = None) -> List[Dict]:
+        """Transcribe several files concurrently, returning results in input order."""
+        futures = [self.submit(path, model_size) for path in file_paths]
+        return [future.result() for future in futures]
+
+    def metrics(self) -> Dict:
+        """Snapshot of pool configuration, job counts, model-load and decoding time."""
+        with self._lock:
+            snapshot = json.loads(json.dumps(self._metrics))
+        decoded = snapshot["jobs_completed"] - snapshot["cache_hits"]
+        snapshot.update({
+            "model_size": self.model_size,
+            "max_workers": self.max_workers,
+            "threads_per_worker": self.threads_per_worker,
+            "decode_seconds_avg": snapshot["decode_seconds_total"] / decoded if decoded else 0.0
+        })
+        return snapshot
+
+    def handle_request(self, request: Dict) -> Dict:
+        """
+        Handle one decoded NDJSON request.
+
+        Supported requests:
+            {"op": "transcribe", "path": ..., "model_size": "small"}
+            {"op": "metrics"}
+        """
+        op = request.get("op", "transcribe")
+        if op in ("metrics", "health"):
+            return self.metrics()
+        if op != "transcribe":
+            return {"error": f"Unknown op: {op}"}
+        if not request.get("path"):
+            return {"error": "Missing audio file path"}
+        return {"result": self.transcribe(request["path"], request.get("model_size"))}
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe audio files with a pool of resident Whisper workers.")
+    parser.add_argument('files', nargs='*', help='Audio files to transcribe (one JSON result per line)')
+    parser.add_argument('--stdio', action='store_true', help='Serve NDJSON transcription requests on stdin/stdout')
+    parser.add_argument('--model', default='small', help='Default Whisper model size')
+    parser.add_argument('--workers', type=int, default=None, help='Maximum concurrent transcriptions')
+    parser.add_argument('--threads', type=int, default=None, help='torch threads per worker')
+    parser.add_argument('--cache-path', default=PARSE_CACHE_PATH,
+                        help='Parse cache directory (default $PARSE_CACHE_PATH; none disables caching)')
+    parser.add_argument('--no-cache', action='store_true', help='Always transcribe, never reuse cached transcripts')
+    args = parser.parse_args()
+
+    cache_path = args.cache_path if args.cache_path and not args.no_cache else None
+    with TranscriptionPool(args.model, args.workers, args.threads, cache_path=cache_path) as pool:
+        if args.stdio:
+            # Enough request threads to keep every worker busy while others queue
+            serve_stdio(pool.handle_request, max_workers=pool.max_workers * 2)
+        else:
+            futures = [pool.submit(path) for path in args.files]
+            for path, future in zip(args.files, futures):
+                try:
+                    print(json.dumps(future.result()))
+                except Exception as e:
+                    print(json.dumps({"error": str(e), "file": path}), file=sys.stderr)
+        print(json.dumps({"metrics": pool.metrics()}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,10 @@
 # Storage package initialization
 from .file_store import FileStore
+from .embedding_cache import EmbeddingCache
+from .query_cache import TTLCache, CollectionVersions
+from .metadata_index import MetadataIndex
+from .bm25_index import BM25Index
+from .conversion_cache import ConversionCache
+from .segment_store import SegmentStore
 
-__all__ = ['FileStore'] 
\ No newline at end of file
+__all__ = ['FileStore', 'EmbeddingCache', 'TTLCache', 'CollectionVersions', 'MetadataIndex', 'BM25Index', 'ConversionCache', 'SegmentStore'] 
\ No newline at end of file
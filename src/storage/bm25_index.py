@@ -0,0 +1,199 @@
+import math
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.utils.text_utils import normalize_text
+
+# Index file kept next to chroma.sqlite3, like the metadata index
+BM25_INDEX_FILENAME = "bm25_index.sqlite3"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lexical terms of a chunk or query: normalize_text() split on whitespace."""
+    return normalize_text(text).split()
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuse several best-first id rankings with reciprocal rank fusion.
+
+    Each id scores sum(1 / (k + rank)) over the rankings it appears in (rank
+    starting at 1), so ids ranked well by several retrievers rise to the top
+    without having to calibrate their raw scores against each other.
+
+    Returns:
+        (id, fused score) pairs, best first
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """
+    On-disk inverted index scoring chunks with Okapi BM25, one logical index per collection.
+
+    Postings (term, chunk id, term frequency) and chunk lengths live in SQLite,
+    so upserting or deleting chunks only touches their own rows.
+
+    Chunks are indexed as they are written, so a collection holding chunks
+    written before the index existed (or while it was unavailable) has no
+    postings for them. backfill() indexes such a collection from Chroma once;
+    is_backfilled() tells callers whether that has happened.
+    """
+
+    def __init__(self, path: Optional[str | Path] = None, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize the BM25 index.
+
+        Args:
+            path: SQLite file (created if missing); None keeps the index in memory
+            k1: Term-frequency saturation
+            b: Document-length normalization
+        """
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path) if path is not None else ":memory:", check_same_thread=False)
+        if path is not None:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS bm25_documents (
+                collection TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                PRIMARY KEY (collection, doc_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS bm25_postings (
+                collection TEXT NOT NULL,
+                term TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (collection, term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_bm25_postings_doc ON bm25_postings(collection, doc_id);
+            CREATE TABLE IF NOT EXISTS bm25_coverage (
+                collection TEXT PRIMARY KEY
+            ) WITHOUT ROWID;
+        """)
+        self._conn.commit()
+
+    def upsert(self, collection: str, ids: Sequence[str], texts: Sequence[str]):
+        """Index (or re-index) chunks; existing postings for the same ids are replaced."""
+        with self._lock:
+            self._delete(collection, ids)
+            documents = []
+            postings = []
+            for doc_id, text in zip(ids, texts):
+                terms = tokenize(text)
+                documents.append((collection, doc_id, len(terms)))
+                postings.extend((collection, term, doc_id, tf) for term, tf in Counter(terms).items())
+            self._conn.executemany("INSERT INTO bm25_documents VALUES (?, ?, ?)", documents)
+            self._conn.executemany("INSERT INTO bm25_postings VALUES (?, ?, ?, ?)", postings)
+            self._conn.commit()
+
+    def is_backfilled(self, collection: str) -> bool:
+        """Whether every chunk of the collection in Chroma has been indexed (see backfill)."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM bm25_coverage WHERE collection = ?", (collection,)
+            ).fetchone() is not None
+
+    def invalidate(self, collection: str):
+        """Forget that a collection is fully indexed (e.g. after a failed upsert), so it is backfilled again."""
+        with self._lock:
+            self._conn.execute("DELETE FROM bm25_coverage WHERE collection = ?", (collection,))
+            self._conn.commit()
+
+    def backfill(self, collection: str, chroma_collection, page_size: int = 1000) -> int:
+        """
+        Index every chunk currently in a Chroma collection and mark the collection covered.
+
+        Ids are listed once, then documents are read and indexed a page at a
+        time. Chunks are upserted rather than the collection rebuilt, so a
+        writer indexing chunks concurrently loses nothing.
+
+        Returns:
+            Number of chunks indexed
+        """
+        ids = chroma_collection.get(include=[])["ids"]
+        for start in range(0, len(ids), page_size):
+            page = chroma_collection.get(ids=ids[start:start + page_size], include=["documents"])
+            self.upsert(collection, page["ids"], [document or "" for document in page["documents"]])
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO bm25_coverage (collection) VALUES (?)", (collection,))
+            self._conn.commit()
+        return len(ids)
+
+    def delete(self, collection: str, ids: Sequence[str]):
+        with self._lock:
+            self._delete(collection, ids)
+            self._conn.commit()
+
+    def _delete(self, collection: str, ids: Sequence[str]):
+        rows = [(collection, doc_id) for doc_id in ids]
+        self._conn.executemany("DELETE FROM bm25_postings WHERE collection = ? AND doc_id = ?", rows)
+        self._conn.executemany("DELETE FROM bm25_documents WHERE collection = ? AND doc_id = ?", rows)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM bm25_documents").fetchone()[0]
+
+    def has_collection(self, collection: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM bm25_documents WHERE collection = ? LIMIT 1", (collection,)
+            ).fetchone() is not None
+
+    def search(self, collection: str, query: str, n_results: int = 10,
+               ids: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Rank a collection's chunks against a query with BM25.
+
+        Args:
+            collection: Collection name
+            query: Query text (tokenized like the chunks)
+            n_results: Maximum number of hits
+            ids: Optional set of chunk ids to restrict the search to
+
+        Returns:
+            (chunk id, BM25 score) pairs, best first
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        allowed = set(ids) if ids is not None else None
+        scores: Dict[str, float] = defaultdict(float)
+        with self._lock:
+            doc_count, total_length = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM bm25_documents WHERE collection = ?", (collection,)
+            ).fetchone()
+            if not doc_count:
+                return []
+            avg_length = total_length / doc_count
+            for term in terms:
+                rows = self._conn.execute(
+                    "SELECT p.doc_id, p.tf, d.length FROM bm25_postings p "
+                    "JOIN bm25_documents d ON d.collection = p.collection AND d.doc_id = p.doc_id "
+                    "WHERE p.collection = ? AND p.term = ?", (collection, term)
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (doc_count - len(rows) + 0.5) / (len(rows) + 0.5))
+                for doc_id, tf, length in rows:
+                    if allowed is not None and doc_id not in allowed:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
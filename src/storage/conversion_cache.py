@@ -0,0 +1,92 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+
+def file_digest(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents, read in chunks so large uploads are never fully loaded."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """
+    Content-addressed cache of converted PDFs.
+
+    Each PDF is stored as <sha256 of the source file>.pdf, so the same handout
+    uploaded again (under any name, by any user) is never converted twice.
+    Least recently used PDFs are removed once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = 2 * 1024 ** 3):
+        """
+        Initialize the conversion cache.
+
+        Args:
+            directory: Cache directory (created if missing)
+            max_bytes: Total size above which the least recently used PDFs are evicted
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def path_for(self, digest: str) -> Path:
+        return self.directory / f"{digest}.pdf"
+
+    def get(self, digest: str) -> Optional[Path]:
+        """Return the cached PDF for a source digest, or None on a miss."""
+        path = self.path_for(digest)
+        with self._lock:
+            try:
+                # mtime doubles as the LRU timestamp
+                os.utime(path)
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return path
+
+    def put(self, digest: str, pdf_path: str | Path) -> Path:
+        """Copy a freshly converted PDF into the cache (atomically) and return the cached path."""
+        target = self.path_for(digest)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(pdf_path, tmp_path)
+        os.replace(tmp_path, target)
+        self._evict()
+        return target
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for p in self.directory.glob("*.pdf"):
+                try:
+                    stat = p.stat()
+                except FileNotFoundError:
+                    # Evicted by another process sharing the cache
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, p))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
@@ -1,41 +1,246 @@
+import hashlib
 import json
+import os
+import tempfile
+import threading
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
 from datetime import datetime
 
+from .conversion_cache import file_digest
+from .segment_store import SegmentStore
+
+# Parse cache directory for the parser CLIs and ingest.py. Unset leaves parsing uncached, so
+# the parsers the server spawns write nothing to disk unless a deployment opts in.
+PARSE_CACHE_PATH = os.getenv("PARSE_CACHE_PATH") or None
+
+
 class FileStore:
-    def __init__(self, storage_path: str | Path):
+    """
+    Content-addressed store of parser output.
+
+    Parsed results are kept as <storage_path>/parsed/<key[:2]>/<key>.json,
+    where the key hashes the raw file bytes together with the parser name and
+    version. Re-uploading the same lecture (under any name) is served from
+    here instead of being parsed again, and bumping a parser's version makes
+    its old entries unreachable. Writes are atomic (temp file + rename), so
+    concurrent workers can share one store; least recently used entries are
+    evicted once the store exceeds max_bytes.
+
+    Processed documents saved with save_processed_content() go to an
+    append-only SegmentStore under <storage_path>/segments, indexed by
+    file_id and class.
+    """
+
+    def __init__(self, storage_path: str | Path, max_bytes: int = 1024 ** 3):
         """
         Initialize the file store.
-        
+
         Args:
             storage_path: Path where processed files will be stored
+            max_bytes: Total size of cached parse results above which the least recently used are evicted
         """
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(parents=True, exist_ok=True)
+        self.parsed_path = self.storage_path / "parsed"
+        self.parsed_path.mkdir(exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Lock] = {}
+        # Running size estimate, scanned on the first write rather than on open so that
+        # processes which only read from the store never walk it; rescanned when over max_bytes
+        self._total_bytes: Optional[int] = None
+        self._segments = None
+
+    @property
+    def segments(self) -> SegmentStore:
+        """Segment store for processed documents, opened on first use."""
+        with self._lock:
+            if self._segments is None:
+                self._segments = SegmentStore(self.storage_path / "segments")
+            return self._segments
+
+    @staticmethod
+    def cache_key(file_path: str | Path, parser: str, version: str) -> str:
+        """SHA-256 over the file's content digest, the parser name and the parser version."""
+        return hashlib.sha256(f"{file_digest(file_path)}\0{parser}\0{version}".encode("utf-8")).hexdigest()
+
+    def _path_for(self, key: str) -> Path:
+        return self.parsed_path / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached parse result for a key, or None on a miss."""
+        path = self._path_for(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = json.load(f)
+            # mtime doubles as the LRU timestamp
+            os.utime(path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return content
+
+    def _size(self) -> int:
+        # Caller holds self._lock
+        if self._total_bytes is None:
+            self._total_bytes = sum(p.stat().st_size for p in self.parsed_path.glob("*/*.json"))
+        return self._total_bytes
+
+    def put(self, key: str, content: Dict[str, Any]) -> Path:
+        """Atomically write a parse result under key and return its path."""
+        with self._lock:
+            # Scan before writing so the new entry is counted once
+            self._size()
+        path = self._path_for(key)
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(content, f, ensure_ascii=False)
+            size = os.path.getsize(tmp_path)
+            try:
+                # An overwritten entry's bytes leave the store with it
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            self._total_bytes += size - replaced
+            over_budget = self._total_bytes > self.max_bytes
+        if over_budget:
+            self._evict()
+        return path
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for p in self.parsed_path.glob("*/*.json"):
+                try:
+                    stat = p.stat()
+                except FileNotFoundError:
+                    # Evicted by another worker sharing the store
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, p))
+            total = sum(size for _, size, _ in entries)
+            # Evict down to 90% so a full store does not rescan on every put
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes * 0.9:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+            self._total_bytes = total
+
+    def get_or_parse(self, file_path: str | Path, parser: str, version: str,
+                     parse: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return the cached result for this file and parser, running parse() only on a miss.
+
+        Concurrent callers in this process asking for the same key wait for a
+        single parse. The result's "filename" always reflects file_path, since
+        the cached entry may come from an upload under another name.
+
+        Args:
+            file_path: File being parsed
+            parser: Parser name (include any option that changes the output)
+            version: Parser version; bump it when the parser's output changes
+            parse: Zero-argument callable producing the parse result
+
+        Returns:
+            The parse result
+        """
+        key = self.cache_key(file_path, parser, version)
+        with self._lock:
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                content = self.get(key)
+                if content is None:
+                    content = parse()
+                    self.put(key, content)
+        finally:
+            # Callers still queued on key_lock hold their own reference; later ones find the result cached
+            with self._lock:
+                if self._inflight.get(key) is key_lock:
+                    del self._inflight[key]
+        if "filename" in content:
+            content["filename"] = Path(file_path).name
+        return content
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "bytes": self._size()
+            }
 
     def save_processed_content(self, content: Dict[str, Any], class_name: str) -> Path:
         """
-        Save processed content to a JSON file.
+        Save processed content to the segment store.
         
         Args:
             content: Dictionary containing the processed content
             class_name: Name of the class/course
             
         Returns:
-            Path to the saved file
+            Path to the segment file holding the record
         """
-        # Create class directory if it doesn't exist
-        class_dir = self.storage_path / class_name
-        class_dir.mkdir(exist_ok=True)
-        
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{content['filename']}_{timestamp}.json"
-        
-        # Save the content
-        file_path = class_dir / filename
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(content, f, ensure_ascii=False, indent=2)
-            
-        return file_path 
\ No newline at end of file
+        # Keyed by file_id when the parser result has one; otherwise every save
+        # is a new record, as with the old timestamped files
+        file_id = content.get("file_id")
+        if not file_id:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            file_id = f"{content['filename']}_{timestamp}"
+        segment, _, _ = self.segments.put(file_id, content, class_name)
+        return self.segments.segment_path(segment)
+
+    def load_processed_content(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Return a saved document by file_id, or None."""
+        return self.segments.get(file_id)
+
+    def iter_processed_content(self, class_name: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Stream (file_id, content) for every document saved under class_name."""
+        return self.segments.iter_class(class_name)
+
+    def migrate_json_files(self, remove: bool = False) -> int:
+        """
+        Import processed documents written by the old one-JSON-file-per-document layout.
+
+        Args:
+            remove: Delete each JSON file once it is imported
+
+        Returns:
+            Number of documents imported
+        """
+        imported = 0
+        for class_dir in sorted(p for p in self.storage_path.iterdir() if p.is_dir()):
+            if class_dir.name in ("parsed", "segments"):
+                continue
+            paths = sorted(class_dir.glob("*.json"))
+            documents = []
+            for path in paths:
+                with open(path, 'r', encoding='utf-8') as f:
+                    content = json.load(f)
+                documents.append((content.get("file_id") or path.stem, content, class_dir.name))
+            self.segments.put_many(documents)
+            imported += len(documents)
+            if remove:
+                for path in paths:
+                    path.unlink()
+        return imported
+
+    def close(self):
+        if self._segments is not None:
+            self._segments.close()
+            self._segments = None
@@ -0,0 +1,360 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Index file kept next to chroma.sqlite3, like the collection version counters
+METADATA_INDEX_FILENAME = "metadata_index.sqlite3"
+
+
+def chunk_id(file_id: str, chunk_index: int) -> str:
+    """Chroma id of a chunk, as written by save_to_chroma."""
+    return f"{file_id}_{chunk_index}"
+
+
+def _parse_missing(value: str) -> set:
+    return {int(i) for i in value.split(",")} if value else set()
+
+
+class MetadataIndex:
+    """
+    Compact sidecar index of what each Chroma collection contains.
+
+    One row per (collection, file_id) records the file's class, topic, filename
+    and chunk count. Chunk ids are always file_id_0 .. file_id_{n-1}, so the
+    count is the whole id range and a file costs one small row however many
+    chunks it has; the rare indexes missing from Chroma (a batch that failed
+    to write) are listed on the row. This answers class/topic listings and
+    "which ids belong to file X" without scanning Chroma's metadata.
+
+    Files are indexed as they are written, so a collection holding chunks
+    written before the index existed is only partly covered. Such a
+    collection is reconciled once by backfill(); is_complete() tells readers
+    whether the index can stand in for a metadata filter.
+
+    Near-duplicate removal also keeps its state here: the MinHash signature of
+    each kept chunk, so a later run can dedup against the whole collection,
+    and each dropped chunk with the chunk it duplicated, so the dropped chunk
+    can be re-admitted when that chunk's file is removed.
+    """
+
+    def __init__(self, path: Optional[str | Path] = None):
+        """
+        Initialize the metadata index.
+
+        Args:
+            path: SQLite file (created if missing); None keeps the index in memory
+        """
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path) if path is not None else ":memory:", check_same_thread=False)
+        if path is not None:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS file_chunks (
+                collection TEXT NOT NULL,
+                file_id TEXT NOT NULL,
+                class TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                chunk_count INTEGER NOT NULL,
+                missing TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (collection, file_id)
+            ) WITHOUT ROWID
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(file_chunks)")}
+        if "missing" not in columns:
+            # Index files created before missing chunks were tracked
+            self._conn.execute("ALTER TABLE file_chunks ADD COLUMN missing TEXT NOT NULL DEFAULT ''")
+        # One row per backfilled collection; complete = 1 when every chunk in Chroma is indexed
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS collection_coverage (
+                collection TEXT PRIMARY KEY,
+                complete INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunk_signatures (
+                collection TEXT NOT NULL,
+                file_id TEXT NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                signature BLOB NOT NULL,
+                PRIMARY KEY (collection, file_id, chunk_index)
+            ) WITHOUT ROWID
+        """)
+        # Chunks dropped as near-duplicates; chunk is the dropped chunk (JSON) so it can be re-admitted
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunk_duplicates (
+                collection TEXT NOT NULL,
+                file_id TEXT NOT NULL,
+                char_start INTEGER NOT NULL,
+                char_end INTEGER NOT NULL,
+                representative TEXT NOT NULL,
+                representative_file TEXT NOT NULL,
+                chunk TEXT NOT NULL,
+                PRIMARY KEY (collection, file_id, char_start, char_end)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunk_duplicates_representative "
+                           "ON chunk_duplicates(collection, representative_file)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_file_chunks_class_topic ON file_chunks(collection, class, topic)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_file_chunks_topic ON file_chunks(collection, topic)")
+        self._conn.commit()
+
+    def record_file(self, collection: str, file_id: str, chunk_count: int, class_name: str = "",
+                    topic: str = "", filename: str = "", written: Optional[Iterable[int]] = None) -> int:
+        """
+        Record (or replace) the chunks written for one file.
+
+        Args:
+            written: Chunk indexes actually written to Chroma (None for all of
+                0 .. chunk_count-1); indexes neither written now nor present
+                from the previous version are recorded as missing
+
+        Returns:
+            The file's previous chunk count (0 if it was not indexed), so callers
+            can delete ids left over from a longer earlier version of the file
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT chunk_count, missing FROM file_chunks WHERE collection = ? AND file_id = ?",
+                (collection, file_id)
+            ).fetchone()
+            missing = []
+            if written is not None:
+                present = set(written)
+                if row:
+                    # An index the failed batch did not overwrite still holds the previous version's chunk
+                    present.update(set(range(row[0])) - _parse_missing(row[1]))
+                missing = [i for i in range(chunk_count) if i not in present]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_chunks (collection, file_id, class, topic, filename, chunk_count, missing) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (collection, file_id, class_name or "", topic or "", filename or "", chunk_count,
+                 ",".join(map(str, missing)))
+            )
+            self._conn.commit()
+        return row[0] if row else 0
+
+    def is_complete(self, collection: str) -> bool:
+        """Whether every chunk of the collection is indexed, so chunk_ids() can replace a metadata filter."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT complete FROM collection_coverage WHERE collection = ?", (collection,)
+            ).fetchone()
+        return bool(row and row[0])
+
+    def is_backfilled(self, collection: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM collection_coverage WHERE collection = ?", (collection,)
+            ).fetchone() is not None
+
+    def backfill(self, collection: str, chroma_collection, page_size: int = 1000) -> bool:
+        """
+        Rebuild a collection's rows from the chunks actually in Chroma.
+
+        Reads every chunk's metadata once (ids first, then pages by id) and
+        replaces the collection's rows with what it finds. Chunks whose id is
+        not file_id_<chunk_index> cannot be addressed by id range; they leave
+        the collection marked incomplete, so readers keep using metadata filters.
+
+        Args:
+            collection: Collection name
+            chroma_collection: The Chroma collection to scan
+            page_size: Chunks fetched per get() call
+
+        Returns:
+            Whether the collection is now completely indexed
+        """
+        ids = chroma_collection.get(include=[])["ids"]
+        files: Dict[str, Dict] = {}
+        complete = True
+        for start in range(0, len(ids), page_size):
+            page = chroma_collection.get(ids=ids[start:start + page_size], include=["metadatas"])
+            for row_id, metadata in zip(page["ids"], page["metadatas"]):
+                metadata = metadata or {}
+                file_id, index = metadata.get("file_id"), metadata.get("chunk_index")
+                if file_id is None or index is None or row_id != chunk_id(file_id, int(index)):
+                    complete = False
+                    continue
+                entry = files.setdefault(file_id, {
+                    "class": metadata.get("class", ""), "topic": metadata.get("topic", ""),
+                    "filename": metadata.get("filename", ""), "indexes": set()
+                })
+                entry["indexes"].add(int(index))
+        rows = []
+        for file_id, entry in files.items():
+            chunk_count = max(entry["indexes"]) + 1
+            missing = [i for i in range(chunk_count) if i not in entry["indexes"]]
+            rows.append((collection, file_id, entry["class"] or "", entry["topic"] or "", entry["filename"] or "",
+                         chunk_count, ",".join(map(str, missing))))
+        with self._lock:
+            self._conn.execute("DELETE FROM file_chunks WHERE collection = ?", (collection,))
+            self._conn.executemany(
+                "INSERT INTO file_chunks (collection, file_id, class, topic, filename, chunk_count, missing) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.execute("INSERT OR REPLACE INTO collection_coverage (collection, complete) VALUES (?, ?)",
+                               (collection, int(complete)))
+            self._conn.commit()
+        return complete
+
+    def remove_file(self, collection: str, file_id: str) -> List[str]:
+        """
+        Drop a file from the index and return the chunk ids it had.
+
+        The file's signatures and its own dropped chunks go with it; chunks of
+        other files that duplicated it are kept (see duplicates_of).
+        """
+        ids = self.chunk_ids(collection, file_id=file_id)
+        with self._lock:
+            for table in ("file_chunks", "chunk_signatures", "chunk_duplicates"):
+                self._conn.execute(f"DELETE FROM {table} WHERE collection = ? AND file_id = ?", (collection, file_id))
+            self._conn.commit()
+        return ids
+
+    def record_signatures(self, collection: str, file_id: str, signatures: Dict[int, bytes]):
+        """Replace a file's chunk signatures (chunk_index -> signature bytes); {} leaves the file unsigned."""
+        with self._lock:
+            self._conn.execute("DELETE FROM chunk_signatures WHERE collection = ? AND file_id = ?",
+                               (collection, file_id))
+            self._conn.executemany(
+                "INSERT INTO chunk_signatures (collection, file_id, chunk_index, signature) VALUES (?, ?, ?, ?)",
+                [(collection, file_id, index, signature) for index, signature in signatures.items()]
+            )
+            self._conn.commit()
+
+    def signatures(self, collection: str) -> List[Tuple[str, int, bytes]]:
+        """(file_id, chunk_index, signature) of every signed chunk in the collection."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT file_id, chunk_index, signature FROM chunk_signatures WHERE collection = ?", (collection,)
+            ).fetchall()
+
+    def unsigned_files(self, collection: str) -> List[str]:
+        """Indexed files with no signatures (written before signatures were kept, or without user-scope dedup)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT file_id FROM file_chunks f WHERE collection = ? AND NOT EXISTS "
+                "(SELECT 1 FROM chunk_signatures s WHERE s.collection = f.collection AND s.file_id = f.file_id) "
+                "ORDER BY file_id", (collection,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def replace_duplicates(self, collection: str, file_id: str, links: List[Dict]):
+        """
+        Replace the dropped chunks recorded for one file.
+
+        Args:
+            links: {"chunk", "representative", "representative_file"} per dropped
+                chunk, where chunk is the dropped chunk as built by prepare_chunks
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM chunk_duplicates WHERE collection = ? AND file_id = ?",
+                               (collection, file_id))
+            self._insert_duplicates(collection, links)
+            self._conn.commit()
+
+    def duplicates_of(self, collection: str, file_id: str) -> List[Dict]:
+        """Chunks of other files dropped as near-duplicates of one of this file's chunks."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT representative, representative_file, chunk FROM chunk_duplicates "
+                "WHERE collection = ? AND representative_file = ? AND file_id != ? "
+                "ORDER BY file_id, char_start, char_end", (collection, file_id, file_id)
+            ).fetchall()
+        return [{"representative": row[0], "representative_file": row[1], "chunk": json.loads(row[2])}
+                for row in rows]
+
+    def relink_duplicates(self, collection: str, file_id: str, links: List[Dict]):
+        """Forget the duplicates of file_id's chunks (see duplicates_of) and record links in their place."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM chunk_duplicates WHERE collection = ? AND representative_file = ? AND file_id != ?",
+                (collection, file_id, file_id)
+            )
+            self._insert_duplicates(collection, links)
+            self._conn.commit()
+
+    def _insert_duplicates(self, collection: str, links: List[Dict]):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO chunk_duplicates (collection, file_id, char_start, char_end, representative, "
+            "representative_file, chunk) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(collection, link["chunk"]["file_id"], link["chunk"]["char_start"], link["chunk"]["char_end"],
+              link["representative"], link["representative_file"], json.dumps(link["chunk"]))
+             for link in links]
+        )
+
+    def has_collection(self, collection: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM file_chunks WHERE collection = ? LIMIT 1", (collection,)
+            ).fetchone() is not None
+
+    def files(self, collection: str, class_name: Optional[str] = None, topic: Optional[str] = None,
+              file_id: Optional[str] = None) -> List[Dict]:
+        """Indexed files of a collection, optionally narrowed by class, topic or file id."""
+        query = "SELECT file_id, class, topic, filename, chunk_count, missing FROM file_chunks WHERE collection = ?"
+        params = [collection]
+        for column, value in (("class", class_name), ("topic", topic), ("file_id", file_id)):
+            if value is not None:
+                query += f" AND {column} = ?"
+                params.append(value)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY file_id", params).fetchall()
+        return [
+            {"file_id": row[0], "class": row[1], "topic": row[2], "filename": row[3], "chunk_count": row[4],
+             "missing": sorted(_parse_missing(row[5]))}
+            for row in rows
+        ]
+
+    def chunk_ids(self, collection: str, class_name: Optional[str] = None, topic: Optional[str] = None,
+                  file_id: Optional[str] = None) -> List[str]:
+        """Expand the id ranges of the matching files into Chroma chunk ids."""
+        ids = []
+        for f in self.files(collection, class_name, topic, file_id):
+            missing = set(f["missing"])
+            ids.extend(chunk_id(f["file_id"], i) for i in range(f["chunk_count"]) if i not in missing)
+        return ids
+
+    def iter_chunk_ids(self, collection: str, page_size: int = 1000) -> Iterator[str]:
+        """Stream a collection's chunk ids in file_id then chunk order, reading page_size files at a time."""
+        after = None
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT file_id, chunk_count, missing FROM file_chunks "
+                    "WHERE collection = ? AND (? IS NULL OR file_id > ?) ORDER BY file_id LIMIT ?",
+                    (collection, after, after, page_size)
+                ).fetchall()
+            for file_id, chunk_count, missing in rows:
+                missing = _parse_missing(missing)
+                yield from (chunk_id(file_id, i) for i in range(chunk_count) if i not in missing)
+            if len(rows) < page_size:
+                return
+            # Keyset cursor: the next page starts after the last file seen, however the table changed meanwhile
+            after = rows[-1][0]
+
+    def classes(self, collection: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT class FROM file_chunks WHERE collection = ? ORDER BY class", (collection,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def topics(self, collection: str, class_name: Optional[str] = None) -> List[str]:
+        query = "SELECT DISTINCT topic FROM file_chunks WHERE collection = ?"
+        params = [collection]
+        if class_name is not None:
+            query += " AND class = ?"
+            params.append(class_name)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY topic", params).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,9 @@
+import os
+
+# Repository root, so default locations do not depend on the caller's working directory
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# ChromaDB directory shared by the writers (embed_parser, ingest) and the search worker.
+# The sidecar stores (collection versions, metadata index, BM25 index) live inside it,
+# so every process must resolve the same absolute path.
+CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", os.path.join(PROJECT_ROOT, "backend", "chroma_db"))
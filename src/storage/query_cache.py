@@ -0,0 +1,149 @@
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional
+
+# Version file kept next to chroma.sqlite3 so every process using the same
+# ChromaDB directory sees the same counters
+COLLECTION_VERSIONS_FILENAME = "collection_versions.sqlite3"
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and case so trivially different spellings of a query share cache entries."""
+    return " ".join(query.split()).casefold()
+
+
+def approx_size(value: Any) -> int:
+    """Rough in-memory size of a cached value in bytes (containers are walked one level per element)."""
+    if hasattr(value, "nbytes"):
+        # numpy arrays: data buffer plus the array header
+        return value.nbytes + 112
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(approx_size(item) for item in value)
+    return size
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after a fixed time-to-live.
+
+    Tracks hits, misses and the approximate memory held by cached values.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 300.0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Least recently used entries are evicted beyond this many
+            ttl_seconds: Entries older than this are treated as misses and dropped
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss or an expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl_seconds:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        size = approx_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic(), size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters, entry count and approximate memory use."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self._entries),
+            "bytes": self.bytes
+        }
+
+
+class CollectionVersions:
+    """
+    Per-collection write counters shared between processes through a small SQLite file.
+
+    Writers bump a collection's version after changing it; readers include the
+    current version in their cache keys, so entries cached before the write can
+    no longer be hit and simply age out.
+    """
+
+    def __init__(self, path: Optional[str | Path] = None):
+        """
+        Initialize the version store.
+
+        Args:
+            path: SQLite file (created if missing); None keeps the counters in memory
+        """
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path) if path is not None else ":memory:", check_same_thread=False)
+        if path is not None:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS collection_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, collection_name: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM collection_versions WHERE name = ?", (collection_name,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, collection_name: str) -> int:
+        """Record a write to collection_name and return its new version."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO collection_versions (name, version) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET version = version + 1", (collection_name,)
+            )
+            self._conn.commit()
+        return self.get(collection_name)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
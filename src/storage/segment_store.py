@@ -0,0 +1,314 @@
+import fcntl
+import json
+import mmap
+import sqlite3
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Record header: compressed payload length, CRC32 of the compressed payload
+_HEADER = struct.Struct("<II")
+SEGMENT_SUFFIX = ".seg"
+INDEX_FILENAME = "index.sqlite3"
+LOCK_FILENAME = "segments.lock"
+
+
+class SegmentStore:
+    """
+    Append-only store of processed documents in a few large segment files.
+
+    Each record is a length-prefixed, CRC-checked, zlib-compressed JSON
+    document appended to the active segment; a SQLite index maps
+    file_id -> (segment, offset, length) plus the class, so a class's
+    documents are read straight from their offsets without touching
+    unrelated records. Reads go through a read-only memory map of the
+    segment. Replacing or deleting a document only updates the index; the
+    dead bytes are reclaimed by compact(), which can run on a background
+    thread.
+
+    Several processes may share one directory (embed workers, the ingest
+    pool, server workers): appends and compaction hold an exclusive flock on
+    the directory's lock file, and the active segment is always the newest
+    one on disk rather than per-process state. Readers take no lock; a read
+    that finds its segment compacted away looks the record up again.
+    """
+
+    def __init__(self, directory: str | Path, segment_max_bytes: int = 64 * 1024 ** 2, compress_level: int = 6):
+        """
+        Initialize the segment store.
+
+        Args:
+            directory: Directory holding the segments and index (created if missing)
+            segment_max_bytes: Size at which the active segment is sealed and a new one started
+            compress_level: zlib level for record payloads
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.compress_level = compress_level
+        self._lock = threading.RLock()
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._compactor = None
+        self._stop = threading.Event()
+        self._conn = sqlite3.connect(str(self.directory / INDEX_FILENAME), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                file_id TEXT PRIMARY KEY,
+                class TEXT NOT NULL,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_records_class ON records(class, segment, offset)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_records_segment ON records(segment)")
+        self._conn.commit()
+        self._lock_file = open(self.directory / LOCK_FILENAME, "a+b")
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the thread lock and the cross-process file lock, for writes to segments and the index."""
+        with self._lock:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _segments(self) -> List[int]:
+        return sorted(int(p.stem) for p in self.directory.glob(f"*{SEGMENT_SUFFIX}"))
+
+    def _active_segment(self) -> int:
+        """Newest segment on disk, which every process appends to; caller holds the file lock."""
+        segments = self._segments()
+        return segments[-1] if segments else 1
+
+    def segment_path(self, segment: int) -> Path:
+        return self.directory / f"{segment:06d}{SEGMENT_SUFFIX}"
+
+    def _append(self, payloads: List[bytes]) -> List[Tuple[int, int, int]]:
+        """Append encoded records to the active segment(s); caller holds the file lock."""
+        locations = []
+        active = self._active_segment()
+        f = None
+        try:
+            for payload in payloads:
+                path = self.segment_path(active)
+                if f is None or f.tell() >= self.segment_max_bytes:
+                    if f is not None:
+                        f.close()
+                        active += 1
+                        path = self.segment_path(active)
+                    elif path.exists() and path.stat().st_size >= self.segment_max_bytes:
+                        active += 1
+                        path = self.segment_path(active)
+                    f = open(path, "ab")
+                    # Append mode only positions at the end on the first write; tell() must see it now
+                    f.seek(0, 2)
+                record = _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+                locations.append((active, f.tell(), len(record)))
+                f.write(record)
+        finally:
+            if f is not None:
+                f.close()
+        return locations
+
+    def put(self, file_id: str, content: Dict[str, Any], class_name: str = "") -> Tuple[int, int, int]:
+        """
+        Append a document, replacing any earlier version of file_id.
+
+        Returns:
+            (segment, offset, length) of the new record
+        """
+        return self.put_many([(file_id, content, class_name)])[0]
+
+    def put_many(self, documents: Iterable[Tuple[str, Dict[str, Any], str]]) -> List[Tuple[int, int, int]]:
+        """
+        Append several (file_id, content, class_name) documents with one index transaction.
+
+        Returns:
+            (segment, offset, length) of each new record, in input order
+        """
+        documents = list(documents)
+        payloads = [zlib.compress(json.dumps(content, ensure_ascii=False).encode("utf-8"), self.compress_level)
+                    for _, content, _ in documents]
+        with self._exclusive():
+            locations = self._append(payloads)
+            # Records are on disk before the index points at them; a crash in
+            # between only leaves dead bytes for compaction to drop
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO records (file_id, class, segment, offset, length) VALUES (?, ?, ?, ?, ?)",
+                [(file_id, class_name or "", *location)
+                 for (file_id, _, class_name), location in zip(documents, locations)]
+            )
+            self._conn.commit()
+        return locations
+
+    def _read(self, segment: int, offset: int, length: int) -> bytes:
+        """Copy one record's compressed payload out of the segment's memory map."""
+        with self._lock:
+            mapped = self._maps.get(segment)
+            if mapped is None or mapped.size() < offset + length:
+                # The active segment grows, so its map is refreshed when a read passes its end
+                if mapped is not None:
+                    mapped.close()
+                with open(self.segment_path(segment), "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[segment] = mapped
+            record = mapped[offset:offset + length]
+        size, crc = _HEADER.unpack_from(record)
+        payload = record[_HEADER.size:_HEADER.size + size]
+        if len(payload) != size or zlib.crc32(payload) != crc:
+            raise ValueError(f"Corrupt record in segment {segment} at offset {offset}")
+        return payload
+
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Return the stored document for file_id, or None if it is not stored."""
+        for attempt in range(3):
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT segment, offset, length FROM records WHERE file_id = ?", (file_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                try:
+                    payload = self._read(*row)
+                except FileNotFoundError:
+                    # Another process compacted the segment after the lookup; the index has moved on
+                    if attempt == 2:
+                        raise
+                    continue
+            return json.loads(zlib.decompress(payload))
+
+    def delete(self, file_id: str) -> bool:
+        """Drop file_id from the index; its bytes are reclaimed by the next compaction."""
+        with self._exclusive():
+            cursor = self._conn.execute("DELETE FROM records WHERE file_id = ?", (file_id,))
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def file_ids(self, class_name: Optional[str] = None) -> List[str]:
+        with self._lock:
+            if class_name is None:
+                rows = self._conn.execute("SELECT file_id FROM records ORDER BY segment, offset").fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT file_id FROM records WHERE class = ? ORDER BY segment, offset", (class_name,)
+                ).fetchall()
+        return [row[0] for row in rows]
+
+    def iter_class(self, class_name: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Stream (file_id, document) pairs for one class in on-disk order.
+
+        Only this class's records are read and decompressed.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT file_id, segment, offset, length FROM records WHERE class = ? ORDER BY segment, offset",
+                (class_name,)
+            ).fetchall()
+        for file_id, segment, offset, length in rows:
+            try:
+                payload = self._read(segment, offset, length)
+            except FileNotFoundError:
+                # Compacted away since the listing; read the record's new location
+                document = self.get(file_id)
+                if document is not None:
+                    yield file_id, document
+                continue
+            yield file_id, json.loads(zlib.decompress(payload))
+
+    def classes(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT class FROM records ORDER BY class").fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        """Record count, on-disk bytes and the share of bytes no longer referenced by the index."""
+        with self._exclusive():
+            live = dict(self._conn.execute("SELECT segment, SUM(length) FROM records GROUP BY segment").fetchall())
+            records = self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+            sizes = {segment: self.segment_path(segment).stat().st_size for segment in self._segments()}
+        total = sum(sizes.values())
+        dead = total - sum(live.get(segment, 0) for segment in sizes)
+        return {
+            "records": records,
+            "segments": len(sizes),
+            "bytes": total,
+            "dead_bytes": dead,
+            "dead_ratio": round(dead / total, 4) if total else 0.0
+        }
+
+    def compact(self, min_dead_ratio: float = 0.3) -> int:
+        """
+        Rewrite sealed segments whose dead share is at least min_dead_ratio.
+
+        Live records are appended to the active segment and re-pointed in the
+        index, then the old segment is deleted. The active segment is never
+        compacted, so writers are not disturbed. Each segment is rewritten
+        under the file lock, so no other process appends or re-points records
+        meanwhile; processes that still map the old segment keep valid bytes
+        until they re-read the index.
+
+        Returns:
+            Number of segments reclaimed
+        """
+        reclaimed = 0
+        for segment in self._segments():
+            with self._exclusive():
+                if segment >= self._active_segment():
+                    break
+                if not self.segment_path(segment).exists():
+                    # Already compacted by another process
+                    continue
+                size = self.segment_path(segment).stat().st_size
+                rows = self._conn.execute(
+                    "SELECT file_id, offset, length FROM records WHERE segment = ? ORDER BY offset", (segment,)
+                ).fetchall()
+                live = sum(length for _, _, length in rows)
+                if size and (size - live) / size < min_dead_ratio:
+                    continue
+                payloads = [self._read(segment, offset, length) for _, offset, length in rows]
+                moves = [(*location, file_id) for location, (file_id, _, _) in zip(self._append(payloads), rows)]
+                self._conn.executemany(
+                    "UPDATE records SET segment = ?, offset = ?, length = ? WHERE file_id = ?", moves
+                )
+                self._conn.commit()
+                mapped = self._maps.pop(segment, None)
+                if mapped is not None:
+                    mapped.close()
+                self.segment_path(segment).unlink()
+                reclaimed += 1
+        return reclaimed
+
+    def start_compaction(self, interval_seconds: float = 300.0, min_dead_ratio: float = 0.3):
+        """Run compact() every interval_seconds on a daemon thread until close()."""
+        if self._compactor is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval_seconds):
+                try:
+                    self.compact(min_dead_ratio)
+                except Exception as e:
+                    print(f"[SEGMENT STORE] Compaction failed: {e}")
+
+        self._compactor = threading.Thread(target=run, name="segment-compactor", daemon=True)
+        self._compactor.start()
+
+    def close(self):
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+        with self._lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+            self._conn.close()
+            self._lock_file.close()
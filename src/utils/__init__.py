@@ -1,4 +1,5 @@
 # Utils package initialization
-from .text_utils import clean_text, normalize_text
+from .text_utils import clean_text, clean_document, normalize_text
+from .chunking import chunk_spans
 
-__all__ = ['clean_text', 'normalize_text'] 
\ No newline at end of file
+__all__ = ['clean_text', 'clean_document', 'normalize_text', 'chunk_spans'] 
@@ -1,7 +1,12 @@
 import boto3
 import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -11,14 +16,65 @@ import uuid
 env_path = Path(__file__).parents[2] / '.env'
 load_dotenv(dotenv_path=env_path)
 
+MB = 1024 ** 2
+# DynamoDB and S3 limits per batch request
+BATCH_GET_MAX_KEYS = 100
+S3_DELETE_MAX_KEYS = 1000
+
+
+class UnprocessedKeysError(RuntimeError):
+    """DynamoDB still returned keys as unprocessed after every retry."""
+
+    def __init__(self, file_ids: List[str]):
+        super().__init__(f"{len(file_ids)} keys still unprocessed after retries")
+        self.file_ids = file_ids
+
+
+def make_transfer_config(multipart_threshold_mb: Optional[int] = None, multipart_chunksize_mb: Optional[int] = None,
+                         max_concurrency: Optional[int] = None) -> TransferConfig:
+    """
+    S3 transfer settings for uploads/downloads, defaulting to the S3_* environment variables.
+
+    Lecture recordings and slide decks are large, so files above the threshold
+    are split into parts that are transferred concurrently.
+
+    Args:
+        multipart_threshold_mb: Size above which multipart transfers are used (S3_MULTIPART_THRESHOLD_MB, 16)
+        multipart_chunksize_mb: Part size (S3_MULTIPART_CHUNKSIZE_MB, 16)
+        max_concurrency: Parallel part transfers per file (S3_MAX_CONCURRENCY, 10)
+    """
+    threshold = multipart_threshold_mb or int(os.getenv('S3_MULTIPART_THRESHOLD_MB', '16'))
+    chunksize = multipart_chunksize_mb or int(os.getenv('S3_MULTIPART_CHUNKSIZE_MB', '16'))
+    concurrency = max_concurrency or int(os.getenv('S3_MAX_CONCURRENCY', '10'))
+    return TransferConfig(multipart_threshold=threshold * MB, multipart_chunksize=chunksize * MB,
+                          max_concurrency=concurrency, use_threads=concurrency > 1)
+
+
+def _batches(items: Sequence, size: int) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
 class AWSManager:
-    def __init__(self):
-        self.s3_client = boto3.client('s3')
-        self.dynamodb = boto3.resource('dynamodb')
-        self.bucket_name = os.getenv('AWS_S3_BUCKET')
-        self.table_name = os.getenv('AWS_DYNAMODB_TABLE')
+    def __init__(self, s3_client=None, dynamodb=None, bucket_name: Optional[str] = None,
+                 table_name: Optional[str] = None, transfer_config: Optional[TransferConfig] = None):
+        """
+        Initialize the AWS manager.
+
+        Args:
+            s3_client: boto3 S3 client (created from the environment if omitted)
+            dynamodb: boto3 DynamoDB resource (created from the environment if omitted)
+            bucket_name: S3 bucket (AWS_S3_BUCKET)
+            table_name: DynamoDB metadata table keyed by (user_id, file_id) (AWS_DYNAMODB_TABLE)
+            transfer_config: S3 transfer settings (make_transfer_config() defaults)
+        """
+        self.s3_client = s3_client or boto3.client('s3')
+        self.dynamodb = dynamodb or boto3.resource('dynamodb')
+        self.bucket_name = bucket_name or os.getenv('AWS_S3_BUCKET')
+        self.table_name = table_name or os.getenv('AWS_DYNAMODB_TABLE')
         self.table = self.dynamodb.Table(self.table_name)
-        
+        self.transfer_config = transfer_config or make_transfer_config()
+
         # Log configuration (without sensitive data)
         print('AWS Configuration:')
         print('Region:', os.getenv('AWS_REGION'))
@@ -26,37 +82,69 @@ class AWSManager:
         print('DynamoDB Table:', self.table_name)
 
     def upload_file_to_s3(self, file_path: str, s3_key: str) -> bool:
-        """Upload a file to S3."""
+        """Upload a file to S3 (multipart and concurrent above the transfer threshold)."""
         try:
-            self.s3_client.upload_file(file_path, self.bucket_name, s3_key)
+            self.s3_client.upload_file(file_path, self.bucket_name, s3_key, Config=self.transfer_config)
             return True
         except ClientError as e:
             print(f"Error uploading file to S3: {str(e)}")
             return False
 
     def download_file_from_s3(self, s3_key: str, local_path: str) -> bool:
-        """Download a file from S3."""
+        """Download a file from S3 (ranged and concurrent above the transfer threshold)."""
         try:
-            self.s3_client.download_file(self.bucket_name, s3_key, local_path)
+            self.s3_client.download_file(self.bucket_name, s3_key, local_path, Config=self.transfer_config)
             return True
         except ClientError as e:
             print(f"Error downloading file from S3: {str(e)}")
             return False
 
+    def iter_s3_keys(self, prefix: str = '', page_size: int = 1000) -> Iterator[str]:
+        """Yield every object key under prefix, following list_objects_v2 pagination."""
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        pages = paginator.paginate(Bucket=self.bucket_name, Prefix=prefix, PaginationConfig={'PageSize': page_size})
+        for page in pages:
+            for obj in page.get('Contents', []):
+                yield obj['Key']
+
+    @staticmethod
+    def _with_default_keys(metadata: Dict) -> Dict:
+        # Ensure required fields are present
+        if 'user_id' not in metadata:
+            metadata['user_id'] = 'default_user'
+        if 'file_id' not in metadata:
+            metadata['file_id'] = str(uuid.uuid4())
+        return metadata
+
     def save_metadata_to_dynamodb(self, metadata: Dict) -> bool:
         """Save file metadata to DynamoDB."""
         try:
-            # Ensure required fields are present
-            if 'user_id' not in metadata:
-                metadata['user_id'] = 'default_user'
-            if 'file_id' not in metadata:
-                metadata['file_id'] = str(uuid.uuid4())
-            self.table.put_item(Item=metadata)
+            self.table.put_item(Item=self._with_default_keys(metadata))
             return True
         except ClientError as e:
             print(f"Error saving metadata to DynamoDB: {str(e)}")
             return False
 
+    def save_metadata_batch(self, items: Iterable[Dict]) -> int:
+        """
+        Save many metadata items with batch_writer (25 puts per request, unprocessed items retried).
+
+        Later items for the same (user_id, file_id) replace earlier ones in the batch.
+
+        Returns:
+            Number of items written (0 on error)
+        """
+        count = 0
+        try:
+            with self.table.batch_writer(overwrite_by_pkeys=['user_id', 'file_id']) as batch:
+                for metadata in items:
+                    batch.put_item(Item=self._with_default_keys(metadata))
+                    count += 1
+            return count
+        except ClientError as e:
+            print(f"Error batch saving metadata to DynamoDB: {str(e)}")
+            return 0
+
     def get_metadata_from_dynamodb(self, file_id: str, user_id: str = 'default_user') -> Optional[Dict]:
         """Get file metadata from DynamoDB."""
         try:
@@ -69,21 +157,146 @@ class AWSManager:
             print(f"Error getting metadata from DynamoDB: {str(e)}")
             return None
 
+    def get_metadata_batch(self, file_ids: Iterable[str], user_id: str = 'default_user',
+                           projection: Optional[Sequence[str]] = None, max_retries: int = 5) -> Dict[str, Dict]:
+        """
+        Look up many files with batch_get_item (100 keys per request).
+
+        Args:
+            file_ids: Files to fetch
+            user_id: Owner of the files
+            projection: Attributes to return (all attributes if omitted)
+            max_retries: Attempts for keys DynamoDB returns as unprocessed (with backoff)
+
+        Returns:
+            {file_id: metadata} for the files that exist
+
+        Raises:
+            ClientError: A request failed; no partial result is returned
+            UnprocessedKeysError: Some keys were still unprocessed after max_retries
+        """
+        found = {}
+        unique_ids = list(dict.fromkeys(file_ids))
+        try:
+            for batch in _batches(unique_ids, BATCH_GET_MAX_KEYS):
+                request = {'Keys': [{'user_id': user_id, 'file_id': file_id} for file_id in batch]}
+                if projection:
+                    # Key attributes are always needed to map items back to file_ids
+                    names = list(dict.fromkeys(['user_id', 'file_id', *projection]))
+                    request['ProjectionExpression'] = ', '.join(f'#a{i}' for i in range(len(names)))
+                    request['ExpressionAttributeNames'] = {f'#a{i}': name for i, name in enumerate(names)}
+                pending = {self.table_name: request}
+                for attempt in range(max_retries + 1):
+                    response = self.dynamodb.batch_get_item(RequestItems=pending)
+                    for item in response.get('Responses', {}).get(self.table_name, []):
+                        found[item['file_id']] = item
+                    pending = response.get('UnprocessedKeys') or {}
+                    if not pending:
+                        break
+                    time.sleep(min(2.0, 0.05 * 2 ** attempt))
+                else:
+                    raise UnprocessedKeysError([key['file_id'] for key in pending[self.table_name]['Keys']])
+            return found
+        except ClientError as e:
+            print(f"Error batch getting metadata from DynamoDB: {str(e)}")
+            raise
+
     def check_file_exists(self, file_id: str, user_id: str = 'default_user') -> bool:
         """Check if file exists in DynamoDB."""
         metadata = self.get_metadata_from_dynamodb(file_id, user_id)
         return metadata is not None
 
+    def iter_files(self, user_id: str = 'default_user', page_size: Optional[int] = None,
+                   projection: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+        """
+        Yield every file of a user, following LastEvaluatedKey across 1 MB query pages.
+
+        Args:
+            user_id: Owner of the files
+            page_size: Items per query page (DynamoDB's 1 MB limit if omitted)
+            projection: Attributes to return (all attributes if omitted)
+        """
+        kwargs = {
+            'KeyConditionExpression': 'user_id = :uid',
+            'ExpressionAttributeValues': {':uid': user_id}
+        }
+        if page_size:
+            kwargs['Limit'] = page_size
+        if projection:
+            kwargs['ProjectionExpression'] = ', '.join(f'#a{i}' for i in range(len(projection)))
+            kwargs['ExpressionAttributeNames'] = {f'#a{i}': name for i, name in enumerate(projection)}
+        while True:
+            response = self.table.query(**kwargs)
+            yield from response.get('Items', [])
+            if 'LastEvaluatedKey' not in response:
+                return
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def scan_files(self, total_segments: int = 4, projection: Optional[Sequence[str]] = None,
+                   page_size: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Yield every item in the table with a parallel segmented scan (admin audits only).
+
+        Each segment is scanned on its own thread with the low-level client
+        (clients are thread-safe, resources are not). Items are yielded as
+        pages arrive, so order is not defined.
+
+        Args:
+            total_segments: Scan segments, one thread each
+            projection: Attributes to return (all attributes if omitted)
+            page_size: Items per scan page (DynamoDB's 1 MB limit if omitted)
+        """
+        # The resource's client already converts items to plain Python values
+        client = self.dynamodb.meta.client
+        kwargs = {'TableName': self.table_name, 'TotalSegments': total_segments}
+        if page_size:
+            kwargs['PaginationConfig'] = {'PageSize': page_size}
+        if projection:
+            kwargs['ProjectionExpression'] = ', '.join(f'#a{i}' for i in range(len(projection)))
+            kwargs['ExpressionAttributeNames'] = {f'#a{i}': name for i, name in enumerate(projection)}
+        # Bounded so a slow consumer applies backpressure instead of buffering the table
+        pages = queue.Queue(maxsize=total_segments * 2)
+        done = object()
+        # Set when the consumer stops early so blocked segment threads can exit
+        stop = threading.Event()
+
+        def put(page) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(page, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def scan_segment(segment: int):
+            try:
+                for page in client.get_paginator('scan').paginate(Segment=segment, **kwargs):
+                    if not put(page.get('Items', [])):
+                        return
+            finally:
+                put(done)
+
+        with ThreadPoolExecutor(max_workers=total_segments) as pool:
+            futures = [pool.submit(scan_segment, segment) for segment in range(total_segments)]
+            try:
+                remaining = total_segments
+                while remaining:
+                    page = pages.get()
+                    if page is done:
+                        remaining -= 1
+                        continue
+                    yield from page
+            finally:
+                stop.set()
+            for future in futures:
+                # Surface a failed segment instead of silently returning a partial scan
+                future.result()
+
     def list_all_files(self, user_id: str = 'default_user') -> List[Dict]:
         """List all files in DynamoDB."""
         try:
-            response = self.table.query(
-                KeyConditionExpression='user_id = :uid',
-                ExpressionAttributeValues={
-                    ':uid': user_id
-                }
-            )
-            return response.get('Items', [])
+            return list(self.iter_files(user_id))
         except ClientError as e:
             print(f"Error listing files from DynamoDB: {str(e)}")
             return []
@@ -109,4 +322,54 @@ class AWSManager:
             return True
         except ClientError as e:
             print(f"Error deleting file: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
+
+    def delete_files(self, file_ids: Iterable[str], user_id: str = 'default_user') -> Dict[str, List[str]]:
+        """
+        Delete many files from S3 and DynamoDB in bulk.
+
+        Metadata is fetched with batch_get_item, objects are removed with
+        delete_objects (1000 keys per request) and metadata with batch_writer.
+        A file's metadata is only deleted once its S3 object is gone, so a
+        failed object delete can be retried.
+
+        Returns:
+            {"deleted": [...], "missing": [...], "failed": [...]} file_ids
+        """
+        file_ids = list(dict.fromkeys(file_ids))
+        try:
+            metadata = self.get_metadata_batch(file_ids, user_id, projection=['s3_key'])
+        except (ClientError, UnprocessedKeysError) as e:
+            print(f"Error looking up files to delete: {str(e)}")
+            return {"deleted": [], "missing": [], "failed": file_ids}
+        result = {"deleted": [], "missing": [fid for fid in file_ids if fid not in metadata], "failed": []}
+        by_key = {}
+        for file_id, item in metadata.items():
+            by_key.setdefault(item.get('s3_key'), []).append(file_id)
+        failed_keys = set()
+        try:
+            s3_keys = [key for key in by_key if key]
+            for batch in _batches(s3_keys, S3_DELETE_MAX_KEYS):
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+                )
+                for error in response.get('Errors', []):
+                    print(f"Error deleting {error['Key']} from S3: {error.get('Message')}")
+                    failed_keys.add(error['Key'])
+            queued = []
+            with self.table.batch_writer() as batch:
+                for s3_key, ids in by_key.items():
+                    if s3_key in failed_keys:
+                        result["failed"].extend(ids)
+                        continue
+                    for file_id in ids:
+                        batch.delete_item(Key={'user_id': user_id, 'file_id': file_id})
+                    queued.extend(ids)
+            # Only deleted once the writer has flushed without error
+            result["deleted"].extend(queued)
+        except ClientError as e:
+            print(f"Error bulk deleting files: {str(e)}")
+            done = set(result["deleted"])
+            result["failed"] = [fid for fid in metadata if fid not in done]
+        return result
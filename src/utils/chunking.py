@@ -0,0 +1,189 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+# Position just after a sentence terminator (and any closing quotes/brackets)
+# followed by whitespace, i.e. where the next sentence starts.
+_SENTENCE_END = re.compile(r'[.!?…]["\'\)\]”’]*\s+')
+# Position just after a blank line, i.e. where the next paragraph starts.
+_PARAGRAPH_END = re.compile(r'\n[ \t]*\n\s*')
+# Approximate tokenizer used when no tiktoken encoding is requested
+_TOKEN = re.compile(r'\w+|[^\w\s]')
+
+BOUNDARY_MODES = ("none", "whitespace", "sentence", "paragraph")
+
+Span = Tuple[int, int]
+
+
+def token_offsets(text: str, encoding: Optional[str] = None) -> List[int]:
+    """
+    Start offset of every token in text.
+
+    Args:
+        text: Input text
+        encoding: Optional tiktoken encoding name (e.g. 'cl100k_base'); a fast
+            word/punctuation approximation is used when omitted
+
+    Returns:
+        Sorted list of token start offsets
+    """
+    if encoding is None:
+        return [match.start() for match in _TOKEN.finditer(text)]
+    import tiktoken
+    enc = tiktoken.get_encoding(encoding)
+    _, offsets = enc.decode_with_offsets(enc.encode(text, disallowed_special=()))
+    return offsets
+
+
+def _boundaries(text: str, pattern: re.Pattern) -> List[int]:
+    return [match.end() for match in pattern.finditer(text)]
+
+
+def chunk_spans(text: str, chunk_size: Optional[int] = 1000, overlap: int = 200,
+                boundary: str = "sentence", max_tokens: Optional[int] = None,
+                encoding: Optional[str] = None) -> List[Span]:
+    """
+    Split text into overlapping chunks described by (start, end) offsets.
+
+    No chunk text is copied; callers slice text[start:end] when they need it.
+    Chunk ends prefer the strongest boundary available (paragraph > sentence >
+    whitespace) that still fills at least half the budget, and each overlap
+    starts at a boundary too, so words and sentences are not cut in half.
+    Runs in linear time in len(text).
+
+    Args:
+        text: Input text
+        chunk_size: Character budget per chunk (None to use only max_tokens)
+        overlap: Characters shared between consecutive chunks
+        boundary: 'none' (fixed windows, as the old chunk_text), 'whitespace',
+            'sentence' or 'paragraph'
+        max_tokens: Optional token budget per chunk, applied in addition to chunk_size
+        encoding: tiktoken encoding name used for max_tokens (approximate tokens if omitted)
+
+    Returns:
+        List of (start, end) offsets into text
+    """
+    if boundary not in BOUNDARY_MODES:
+        raise ValueError(f"Unsupported boundary mode: {boundary}")
+    if chunk_size is None and max_tokens is None:
+        raise ValueError("Either chunk_size or max_tokens must be set")
+    if chunk_size is not None and overlap >= chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
+
+    text_length = len(text)
+    if boundary == "none" and max_tokens is None:
+        # Fixed windows, identical to the original chunk_text behaviour
+        step = max(1, chunk_size - overlap)
+        return [(start, min(start + chunk_size, text_length)) for start in range(0, text_length, step)]
+
+    levels = []
+    if boundary == "paragraph":
+        levels.append(_boundaries(text, _PARAGRAPH_END))
+    if boundary in ("paragraph", "sentence"):
+        levels.append(_boundaries(text, _SENTENCE_END))
+    # Exact tiktoken offsets are precomputed; the approximate tokenizer is run
+    # lazily over each window instead of materialising every token offset
+    tokens = token_offsets(text, encoding) if max_tokens and encoding else None
+
+    spans = []
+    start = _skip_space(text, 0)
+    while start < text_length:
+        limit = text_length if chunk_size is None else min(text_length, start + chunk_size)
+        if tokens is not None:
+            first = bisect_left(tokens, start)
+            if first + max_tokens < len(tokens):
+                limit = min(limit, tokens[first + max_tokens])
+        elif max_tokens:
+            limit = _approx_token_limit(text, start, limit, max_tokens)
+
+        end = limit
+        if limit < text_length and boundary != "none":
+            end = _best_break(text, levels, start + (limit - start) // 2, limit)
+
+        trimmed = end
+        while trimmed > start and text[trimmed - 1].isspace():
+            trimmed -= 1
+        if trimmed > start:
+            spans.append((start, trimmed))
+        if end >= text_length:
+            break
+
+        next_start = end
+        if overlap > 0:
+            next_start = _overlap_start(text, levels, boundary, max(start + 1, end - overlap), end)
+        start = _skip_space(text, next_start)
+    return spans
+
+
+def _approx_token_limit(text: str, start: int, limit: int, max_tokens: int) -> int:
+    """Offset of the first approximate token past the budget, or limit if it fits."""
+    for count, match in enumerate(_TOKEN.finditer(text, start, limit)):
+        if count == max_tokens:
+            return match.start()
+    return limit
+
+
+def _skip_space(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos].isspace():
+        pos += 1
+    return pos
+
+
+def _best_break(text: str, levels: List[List[int]], lo: int, limit: int) -> int:
+    """Furthest boundary in (lo, limit] from the strongest level that has one."""
+    for positions in levels:
+        i = bisect_right(positions, limit) - 1
+        if i >= 0 and positions[i] > lo:
+            return positions[i]
+    space = max(text.rfind(' ', lo, limit), text.rfind('\n', lo, limit))
+    if space > lo:
+        return space + 1
+    return limit
+
+
+def _overlap_start(text: str, levels: List[List[int]], boundary: str, lo: int, end: int) -> int:
+    """Earliest boundary in [lo, end) so the overlap begins on a sentence/word start."""
+    if boundary == "none":
+        return lo
+    for positions in levels:
+        i = bisect_left(positions, lo)
+        if i < len(positions) and positions[i] < end:
+            return positions[i]
+    space = text.find(' ', lo, end)
+    if space != -1 and space + 1 < end:
+        return space + 1
+    return end
+
+
+def section_spans(text: str, section_offsets: List[int], chunk_size: Optional[int] = 1000,
+                  overlap: int = 200, **kwargs) -> List[Span]:
+    """
+    chunk_spans that treats section starts (slides, headings) as hard boundaries.
+
+    Neighbouring sections are packed into one window while they fit in
+    chunk_size, so short slides do not each become a tiny chunk, but no chunk
+    ever continues past the end of a window into the next one.
+
+    Args:
+        text: Input text
+        section_offsets: Start offset of every section in text
+        chunk_size: Character budget per chunk (also the packing budget)
+        overlap: Characters shared between consecutive chunks within a window
+        **kwargs: boundary/max_tokens/encoding, as for chunk_spans
+
+    Returns:
+        List of (start, end) offsets into text
+    """
+    starts = sorted({offset for offset in section_offsets if 0 < offset < len(text)})
+    windows = []
+    for start, end in zip([0] + starts, starts + [len(text)]):
+        if windows and chunk_size is not None and end - windows[-1][0] <= chunk_size:
+            windows[-1] = (windows[-1][0], end)
+        else:
+            windows.append((start, end))
+    spans = []
+    for window_start, window_end in windows:
+        window = text[window_start:window_end]
+        spans.extend((window_start + start, window_start + end)
+                     for start, end in chunk_spans(window, chunk_size, overlap, **kwargs))
+    return spans
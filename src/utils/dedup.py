@@ -0,0 +1,173 @@
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Universal hashing (a * x + b) mod p over 31-bit shingle hashes; products stay below 2**62
+_PRIME = (1 << 31) - 1
+_WORD = re.compile(r'\w+')
+
+
+def shingles(text: str, size: int = 3) -> np.ndarray:
+    """Hashes of the distinct lowercase word size-grams of text (the words themselves for very short texts)."""
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        grams = words or [text.strip().lower()]
+    else:
+        grams = [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(g.encode('utf-8')) & _PRIME for g in grams),
+                                 dtype=np.uint64, count=len(grams)))
+
+
+def choose_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) with bands * rows == num_perm for banded LSH.
+
+    Two texts become candidates with probability 1 - (1 - s**rows)**bands at
+    Jaccard similarity s; the curve's midpoint is about (1/bands)**(1/rows).
+    The layout whose midpoint is highest without exceeding threshold is used,
+    favouring recall; candidates are verified against the threshold anyway.
+    """
+    best = (num_perm, 1)
+    best_mid = 0.0
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        mid = (1 / bands) ** (1 / rows)
+        if best_mid < mid <= threshold:
+            best, best_mid = (bands, rows), mid
+    return best
+
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures in a banded LSH table for near-duplicate text detection.
+
+    add() compares a text only against the texts sharing at least one band
+    bucket with it, so checking n texts is roughly linear rather than the
+    n**2 pairwise comparisons of exact Jaccard. A candidate is a duplicate
+    when the estimated Jaccard similarity of their word shingles reaches
+    threshold. Thread-safe; one index can be shared across files to dedup a
+    whole collection.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, bands: Optional[int] = None,
+                 shingle_size: int = 3, seed: int = 1):
+        """
+        Initialize the index.
+
+        Args:
+            threshold: Minimum estimated Jaccard similarity to call two texts duplicates
+            num_perm: MinHash permutations per signature
+            bands: LSH bands (must divide num_perm; chosen from threshold if omitted)
+            shingle_size: Words per shingle
+            seed: Seed for the hash permutations (signatures are only comparable under the same seed)
+        """
+        if bands is None:
+            bands, _ = choose_bands(threshold, num_perm)
+        if num_perm % bands:
+            raise ValueError(f"bands ({bands}) must divide num_perm ({num_perm})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._groups: Dict[str, List[str]] = {}
+        self._owners: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = shingles(text, self.shingle_size)
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+    def _bands(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(i, signature[i * self.rows:(i + 1) * self.rows].tobytes()) for i in range(self.bands)]
+
+    def query(self, text: str) -> Optional[str]:
+        """Key of the most similar indexed text at or above threshold, or None."""
+        return self._query(self.signature(text))
+
+    def _query(self, signature: np.ndarray) -> Optional[str]:
+        best, best_similarity = None, self.threshold
+        seen = set()
+        for band in self._bands(signature):
+            for key in self._buckets.get(band, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                similarity = float(np.mean(self._signatures[key] == signature))
+                if similarity >= best_similarity:
+                    best, best_similarity = key, similarity
+        return best
+
+    def add(self, key: str, text: str, group: Optional[str] = None) -> Optional[str]:
+        """
+        Index text under key unless it near-duplicates an indexed text.
+
+        Args:
+            key: Identifier returned to later near-duplicates of text
+            text: Text to check and index
+            group: Optional owner (e.g. a file_id) whose keys discard_group() removes together
+
+        Returns:
+            The representative's key when text is a near-duplicate (text is then
+            not indexed), otherwise None
+        """
+        signature = self.signature(text)
+        with self._lock:
+            representative = self._query(signature)
+            if representative is not None:
+                return representative
+            self._insert(key, signature, group)
+        return None
+
+    def add_signature(self, key: str, signature: np.ndarray, group: Optional[str] = None):
+        """Index a signature computed earlier (e.g. persisted with its chunk) without checking it."""
+        if len(signature) != self.num_perm:
+            raise ValueError(f"signature has {len(signature)} values, expected {self.num_perm}")
+        with self._lock:
+            self._insert(key, signature, group)
+
+    def _insert(self, key: str, signature: np.ndarray, group: Optional[str]):
+        self._signatures[key] = signature
+        for band in self._bands(signature):
+            self._buckets.setdefault(band, []).append(key)
+        if group is not None:
+            self._groups.setdefault(group, []).append(key)
+            self._owners[key] = group
+
+    def signature_of(self, key: str) -> Optional[np.ndarray]:
+        """Signature indexed under key, or None."""
+        return self._signatures.get(key)
+
+    def group_of(self, key: str) -> Optional[str]:
+        """Group key was added under, or None."""
+        return self._owners.get(key)
+
+    def discard_group(self, group: str) -> int:
+        """Remove every key added under group (e.g. before re-indexing a changed file); returns the count."""
+        with self._lock:
+            keys = self._groups.pop(group, [])
+            for key in keys:
+                self._owners.pop(key, None)
+                signature = self._signatures.pop(key, None)
+                if signature is None:
+                    continue
+                for band in self._bands(signature):
+                    bucket = self._buckets.get(band)
+                    if bucket is not None:
+                        bucket.remove(key)
+                        if not bucket:
+                            del self._buckets[band]
+        return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
@@ -0,0 +1,312 @@
+import hashlib
+import os
+import re
+import shutil
+import tarfile
+import tempfile
+import threading
+import urllib.request
+import zlib
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from chromadb import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+
+# Identity of Chroma's default embedding model (all-MiniLM-L6-v2 on ONNX Runtime);
+# also the embedding cache key of everything embedded before embedders were configurable
+DEFAULT_EMBEDDING_MODEL_ID = "chroma-default/all-MiniLM-L6-v2"
+# Collection metadata key holding the identity of the embedder that wrote it
+EMBEDDER_METADATA_KEY = "embedder"
+
+EMBEDDER = os.getenv("EMBEDDER", "onnx")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# 0 lets ONNX Runtime use one thread per core
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+EMBEDDING_QUANTIZE = os.getenv("EMBEDDING_QUANTIZE", "").lower() in ("1", "true", "yes", "int8")
+
+# all-MiniLM-L6-v2 exported to ONNX, as published for Chroma's default embedding function;
+# the default directory is the one Chroma downloads it to, so both share one copy
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", str(Path.home() / ".cache" / "chroma" / "onnx_models" /
+                                                 "all-MiniLM-L6-v2" / "onnx"))
+ONNX_MODEL_URL = "https://chroma-onnx-models.s3.amazonaws.com/all-MiniLM-L6-v2/onnx.tar.gz"
+ONNX_MODEL_SHA256 = "913d7300ceae3b2dbc2c50d1de4baacab4be7b9380491c27fab7418616a16ec3"
+# Sequence length the model was exported with
+ONNX_MAX_TOKENS = 256
+
+_WORD = re.compile(r'\w+')
+
+
+class EmbedderMismatchError(ValueError):
+    """A collection was written by a different embedder than the one in use."""
+
+
+class OnnxEmbedder(EmbeddingFunction[Documents]):
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime with explicit inference settings.
+
+    Runs the same model files, tokenization (WordPiece, padded and truncated
+    to 256 tokens), mean pooling and L2 normalization as Chroma's default
+    embedding function, so existing collections and cache entries stay
+    valid; only the public EmbeddingFunction interface is relied on. The
+    batch size and ONNX Runtime thread counts are set by us rather than left
+    to defaults, and the model can optionally run with int8 dynamically
+    quantized weights. Quantized vectors differ slightly, so they get their
+    own identity.
+    """
+
+    def __init__(self, batch_size: int = EMBEDDING_BATCH_SIZE, threads: int = EMBEDDING_THREADS,
+                 quantize: bool = EMBEDDING_QUANTIZE, preferred_providers: Optional[List[str]] = None,
+                 model_dir: str = ONNX_MODEL_DIR):
+        """
+        Args:
+            batch_size: Documents per forward pass
+            threads: ONNX Runtime intra-op threads (0 = one per core)
+            quantize: Run an int8 dynamically quantized copy of the model (built on first use)
+            preferred_providers: ONNX Runtime execution providers (CPU by default)
+            model_dir: Directory holding model.onnx and tokenizer.json (downloaded there if missing)
+        """
+        self.batch_size = batch_size
+        self.threads = threads
+        self.quantize = quantize
+        self.preferred_providers = preferred_providers or ["CPUExecutionProvider"]
+        self.model_dir = model_dir
+        self._load_lock = threading.Lock()
+
+    @property
+    def identity(self) -> str:
+        return DEFAULT_EMBEDDING_MODEL_ID + ("-int8" if self.quantize else "")
+
+    def _download_model(self):
+        """Fetch and unpack the model archive into model_dir unless the files are already there."""
+        if all(os.path.exists(os.path.join(self.model_dir, name)) for name in ("model.onnx", "tokenizer.json")):
+            return
+        parent = os.path.dirname(self.model_dir)
+        os.makedirs(parent, exist_ok=True)
+        fd, archive = tempfile.mkstemp(dir=parent, suffix=".tar.gz")
+        os.close(fd)
+        try:
+            urllib.request.urlretrieve(ONNX_MODEL_URL, archive)
+            digest = hashlib.sha256()
+            with open(archive, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            if digest.hexdigest() != ONNX_MODEL_SHA256:
+                raise ValueError(f"Downloaded model archive {ONNX_MODEL_URL} does not match its SHA256")
+            staging = tempfile.mkdtemp(dir=parent)
+            with tarfile.open(archive, "r:gz") as tar:
+                # filter="data" rejects absolute paths and links out of staging where supported
+                tar.extractall(staging, **({"filter": "data"} if hasattr(tarfile, "data_filter") else {}))
+            # The archive holds a single "onnx" directory; move its files in one by one
+            os.makedirs(self.model_dir, exist_ok=True)
+            extracted = os.path.join(staging, "onnx")
+            for name in os.listdir(extracted):
+                os.replace(os.path.join(extracted, name), os.path.join(self.model_dir, name))
+            shutil.rmtree(staging)
+        finally:
+            os.remove(archive)
+
+    def _model_path(self) -> str:
+        path = os.path.join(self.model_dir, "model.onnx")
+        if not self.quantize:
+            return path
+        quantized = os.path.join(self.model_dir, "model_int8.onnx")
+        if not os.path.exists(quantized):
+            try:
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+            except ImportError as e:
+                raise ImportError("int8 quantization needs the 'onnx' package: pip install onnx") from e
+            tmp = quantized + ".tmp"
+            quantize_dynamic(path, tmp, weight_type=QuantType.QInt8)
+            os.replace(tmp, quantized)
+        return quantized
+
+    @cached_property
+    def tokenizer(self) -> Any:
+        from tokenizers import Tokenizer
+        with self._load_lock:
+            self._download_model()
+        tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, "tokenizer.json"))
+        tokenizer.enable_truncation(max_length=ONNX_MAX_TOKENS)
+        tokenizer.enable_padding(pad_id=0, pad_token="[PAD]", length=ONNX_MAX_TOKENS)
+        return tokenizer
+
+    @cached_property
+    def session(self) -> Any:
+        import onnxruntime as ort
+        with self._load_lock:
+            self._download_model()
+            path = self._model_path()
+        so = ort.SessionOptions()
+        so.log_severity_level = 3
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        so.intra_op_num_threads = self.threads
+        # One model call at a time per session; parallelism comes from intra-op threads
+        so.inter_op_num_threads = 1
+        so.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        return ort.InferenceSession(path, providers=self.preferred_providers, sess_options=so)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        embeddings = []
+        for start in range(0, len(input), self.batch_size):
+            encoded = self.tokenizer.encode_batch(list(input[start:start + self.batch_size]))
+            input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+            last_hidden_state = self.session.run(None, {
+                "input_ids": input_ids,
+                "attention_mask": attention_mask,
+                "token_type_ids": np.zeros_like(input_ids)
+            })[0]
+            # Mean over the real tokens only, then unit length
+            mask = attention_mask[:, :, None].astype(np.float32)
+            pooled = (last_hidden_state * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            norms[norms == 0] = 1e-12
+            embeddings.extend((pooled / norms).astype(np.float32))
+        return embeddings
+
+    def warm_up(self):
+        """Load the model and run one full batch so the first real request pays no start-up cost."""
+        self(["warm up"] * self.batch_size)
+
+    @staticmethod
+    def name() -> str:
+        # Chroma's name for this model, so collections record (and rebuild) an equivalent function
+        return "onnx_mini_lm_l6_v2"
+
+    def get_config(self) -> Dict[str, Any]:
+        return {"preferred_providers": self.preferred_providers}
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "OnnxEmbedder":
+        return OnnxEmbedder(preferred_providers=config.get("preferred_providers"))
+
+
+class HashEmbedder(EmbeddingFunction[Documents]):
+    """
+    Deterministic feature-hashing embedder for offline tests and benchmarks.
+
+    Words and word bigrams are hashed (CRC32) into dim signed buckets and the
+    vector is L2-normalized, so texts sharing words score as similar. It needs
+    no model download and gives identical vectors on every machine; it is not
+    a semantic model.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    @property
+    def identity(self) -> str:
+        return f"hash/{self.dim}"
+
+    def __call__(self, input: Documents) -> Embeddings:
+        vectors = np.zeros((len(input), self.dim), dtype=np.float32)
+        for row, text in enumerate(input):
+            tokens = _WORD.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            if not features:
+                continue
+            hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint32, count=len(features))
+            signs = np.where(hashes & 0x80000000, 1.0, -1.0).astype(np.float32)
+            np.add.at(vectors[row], hashes % self.dim, signs)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return list(vectors / norms)
+
+    def warm_up(self):
+        pass
+
+    @staticmethod
+    def name() -> str:
+        return "hash_embedder"
+
+    def get_config(self) -> Dict[str, Any]:
+        return {"dim": self.dim}
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "HashEmbedder":
+        return HashEmbedder(dim=config.get("dim", 384))
+
+
+def embedder_identity(embedding_function) -> str:
+    """Identity of an embedding function, for cache keys and collection metadata."""
+    identity = getattr(embedding_function, "identity", None)
+    if identity:
+        return identity
+    if isinstance(embedding_function, ONNXMiniLM_L6_V2):
+        return DEFAULT_EMBEDDING_MODEL_ID
+    model = getattr(embedding_function, "model_name", None) or getattr(embedding_function, "MODEL_NAME", None)
+    name = type(embedding_function).__name__
+    return f"{name}/{model}" if model else name
+
+
+def get_embedder(name: Optional[str] = None, batch_size: Optional[int] = None, threads: Optional[int] = None,
+                 quantize: Optional[bool] = None, warm_up: bool = False):
+    """
+    Build the configured embedder; unset arguments fall back to the EMBEDDER,
+    EMBEDDING_BATCH_SIZE, EMBEDDING_THREADS and EMBEDDING_QUANTIZE environment variables.
+
+    Args:
+        name: "onnx" (all-MiniLM-L6-v2, Chroma's default model) or "hash" (HashEmbedder)
+        batch_size: Documents per forward pass (onnx)
+        threads: Intra-op threads (onnx)
+        quantize: Use int8 weights (onnx)
+        warm_up: Load the model and run one batch before returning
+    """
+    name = name or EMBEDDER
+    if name == "onnx":
+        embedder = OnnxEmbedder(batch_size=batch_size or EMBEDDING_BATCH_SIZE,
+                                threads=EMBEDDING_THREADS if threads is None else threads,
+                                quantize=EMBEDDING_QUANTIZE if quantize is None else quantize)
+    elif name == "hash":
+        embedder = HashEmbedder()
+    else:
+        raise ValueError(f"Unknown embedder '{name}' (expected 'onnx' or 'hash')")
+    if warm_up:
+        embedder.warm_up()
+    return embedder
+
+
+def add_embedder_arguments(parser):
+    """Add --embedder/--embedding-batch-size/--embedding-threads/--quantize to an argparse parser."""
+    parser.add_argument('--embedder', default=EMBEDDER, choices=['onnx', 'hash'], help='Embedding model')
+    parser.add_argument('--embedding-batch-size', type=int, default=EMBEDDING_BATCH_SIZE,
+                        help='Documents per model forward pass')
+    parser.add_argument('--embedding-threads', type=int, default=EMBEDDING_THREADS,
+                        help='ONNX Runtime intra-op threads (0 = one per core)')
+    parser.add_argument('--quantize', action='store_true', default=EMBEDDING_QUANTIZE,
+                        help='Run the model with int8 dynamically quantized weights')
+
+
+def embedder_from_args(args, warm_up: bool = False):
+    return get_embedder(args.embedder, args.embedding_batch_size, args.embedding_threads, args.quantize, warm_up)
+
+
+def check_collection_embedder(collection, identity: str, record: bool = True):
+    """
+    Make sure collection's vectors come from the embedder with this identity.
+
+    A collection records its embedder in metadata on first write. Collections
+    written before identities were recorded carry none and are adopted by the
+    next writer, since nothing says which model produced their vectors.
+
+    Args:
+        collection: Chroma collection
+        identity: Identity of the embedder about to write or query it
+        record: Store identity on collections that have none (writers)
+
+    Raises:
+        EmbedderMismatchError: The collection was written by another embedder
+    """
+    metadata = dict(collection.metadata or {})
+    recorded = metadata.get(EMBEDDER_METADATA_KEY)
+    if recorded is not None and recorded != identity:
+        raise EmbedderMismatchError(
+            f"Collection '{collection.name}' was embedded with '{recorded}' but the active embedder is "
+            f"'{identity}'; re-index it or switch embedders"
+        )
+    if record and recorded is None:
+        metadata[EMBEDDER_METADATA_KEY] = identity
+        collection.modify(metadata=metadata)
@@ -0,0 +1,125 @@
+import json
+import os
+import socketserver
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TextIO
+
+# A handler receives one decoded request and returns a JSON-serialisable dict.
+Handler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+def handle_line(handler: Handler, line: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode one NDJSON request line, run the handler and build the response.
+
+    Args:
+        handler: Request handler
+        line: Raw request line
+
+    Returns:
+        Response dict (echoing the request "id" if one was given), or None for blank lines
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        request = json.loads(line)
+    except json.JSONDecodeError as e:
+        return {"error": "Invalid JSON request", "details": str(e)}
+    if not isinstance(request, dict):
+        return {"error": "Request must be a JSON object"}
+
+    try:
+        response = handler(request)
+    except Exception as e:
+        response = {
+            "error": "Request failed",
+            "details": str(e),
+            "traceback": traceback.format_exc()
+        }
+    if "id" in request:
+        response = {"id": request["id"], **response}
+    return response
+
+
+def serve_stdio(handler: Handler, max_workers: int = 4,
+                stdin: Optional[TextIO] = None, stdout: Optional[TextIO] = None) -> None:
+    """
+    Serve newline-delimited JSON requests from stdin, writing one response line per request.
+
+    Requests are handled concurrently, so responses may be written out of order;
+    callers should correlate them using the "id" field.
+
+    Args:
+        handler: Request handler
+        max_workers: Maximum number of requests handled at once
+        stdin: Input stream (defaults to sys.stdin)
+        stdout: Output stream (defaults to sys.stdout)
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    write_lock = threading.Lock()
+
+    def process(line: str):
+        response = handle_line(handler, line)
+        if response is None:
+            return
+        payload = json.dumps(response, default=str)
+        with write_lock:
+            stdout.write(payload + "\n")
+            stdout.flush()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for line in stdin:
+            pool.submit(process, line)
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_unix_socket_server(handler: Handler, socket_path: str, max_workers: int = 4):
+    """
+    Build a Unix domain socket server speaking the same NDJSON protocol as serve_stdio.
+
+    Each connection gets its own reader thread; the handler itself runs on a shared,
+    bounded thread pool so concurrency is capped across all connections.
+
+    Args:
+        handler: Request handler
+        socket_path: Filesystem path of the socket (replaced if it already exists)
+        max_workers: Maximum number of requests handled at once
+
+    Returns:
+        A socketserver instance; call serve_forever() to start it
+    """
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            write_lock = threading.Lock()
+            pending = []
+
+            def process(line: str):
+                response = handle_line(handler, line)
+                if response is None:
+                    return
+                payload = (json.dumps(response, default=str) + "\n").encode("utf-8")
+                with write_lock:
+                    self.wfile.write(payload)
+                    self.wfile.flush()
+
+            for raw in self.rfile:
+                pending.append(pool.submit(process, raw.decode("utf-8")))
+            # Keep the connection open until every response has been written
+            for future in pending:
+                future.result()
+
+    server = _ThreadingUnixServer(socket_path, RequestHandler)
+    server.request_pool = pool
+    return server
@@ -1,8 +1,23 @@
 import re
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Set
+
+# One pattern so clean_text makes a single pass: any run of whitespace, slide/page
+# counters and "©..." lines (up to the line end) becomes one space, or one blank
+# line if the run spanned a blank line (so paragraph boundaries survive)
+_CLEAN_PATTERN = re.compile(r'(?:\s+|Slide\s+\d+\s+of\s+\d+|Page\s+\d+|©[^\n]*)+')
+_BLANK_LINE = re.compile(r'\n[ \t\r\f\v]*\n')
+_DIGITS = re.compile(r'\d+')
+_SPACES = re.compile(r'\s+')
+
 
 def clean_text(text: str) -> str:
     """
     Clean and normalize text content.
+
+    Whitespace runs collapse to one space; runs that contain a blank line
+    collapse to one blank line, so paragraph chunking still finds its breaks.
     
     Args:
         text: Input text to clean
@@ -10,17 +25,118 @@ def clean_text(text: str) -> str:
     Returns:
         Cleaned text
     """
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Remove common slide artifacts
-    text = re.sub(r'Slide \d+ of \d+', '', text)
-    text = re.sub(r'Page \d+', '', text)
-    
-    # Remove headers/footers (basic pattern)
-    text = re.sub(r'©.*?$', '', text, flags=re.MULTILINE)
-    
-    return text.strip()
+    return _CLEAN_PATTERN.sub(_clean_replacement, text).strip()
+
+
+def _clean_replacement(match: re.Match) -> str:
+    run = match.group()
+    return '\n\n' if '\n' in run and _BLANK_LINE.search(run) else ' '
+
+
+def _line_key(line: str) -> str:
+    """Comparison key for header/footer lines: page numbers and spacing don't matter."""
+    return _SPACES.sub(' ', _DIGITS.sub('#', line)).strip().lower()
+
+
+def _edge_count(lines: int, edge_lines: int) -> int:
+    # At most a third of a page at each end, so a short page keeps its body
+    return min(edge_lines, lines // 3)
+
+
+def _edge_lines(page: str, edge_lines: int) -> List[str]:
+    lines = [line for line in page.splitlines() if line.strip()]
+    k = _edge_count(len(lines), edge_lines)
+    return lines[:k] + lines[len(lines) - k:] if k else []
+
+
+def find_repeated_lines(pages: List[str], edge_lines: int = 3, min_ratio: float = 0.6,
+                        min_pages: int = 3) -> Set[str]:
+    """
+    Find header/footer lines: lines near the top or bottom of most pages.
+
+    Args:
+        pages: Page texts with their line breaks intact
+        edge_lines: Non-empty lines at each end of a page that may be a header or footer
+        min_ratio: Share of pages a line must appear on
+        min_pages: Documents with fewer pages are left alone
+
+    Returns:
+        Keys (see _line_key) of the repeated lines
+    """
+    if len(pages) < min_pages:
+        return set()
+    counts = Counter()
+    for page in pages:
+        counts.update({_line_key(line) for line in _edge_lines(page, edge_lines)})
+    threshold = max(2, min_ratio * len(pages))
+    return {key for key, count in counts.items() if key and count >= threshold}
+
+
+def strip_repeated_lines(page: str, repeated: Set[str], edge_lines: int = 3) -> str:
+    """Drop lines of repeated from the edges of one page; the body is never touched."""
+    if not repeated:
+        return page
+    lines = page.splitlines()
+    content = [i for i, line in enumerate(lines) if line.strip()]
+    k = _edge_count(len(content), edge_lines)
+    edges = set(content[:k] + content[len(content) - k:]) if k else set()
+    return '\n'.join(line for i, line in enumerate(lines) if i not in edges or _line_key(line) not in repeated)
+
+
+def iter_clean_pages(pages: Iterable[str], edge_lines: int = 3, min_ratio: float = 0.6,
+                     sample_pages: int = 50) -> Iterator[str]:
+    """
+    Clean a stream of pages: strip repeated headers/footers, then clean_text each page.
+
+    Headers and footers are learned from the first sample_pages pages, so
+    only that many pages are held in memory; later pages are cleaned as
+    they arrive.
+    """
+    pages = iter(pages)
+    sample = list(islice(pages, sample_pages))
+    repeated = find_repeated_lines(sample, edge_lines, min_ratio)
+    for page in sample:
+        yield clean_text(strip_repeated_lines(page, repeated, edge_lines))
+    for page in pages:
+        yield clean_text(strip_repeated_lines(page, repeated, edge_lines))
+
+
+def clean_document(parsed: Dict, edge_lines: int = 3, min_ratio: float = 0.6) -> Dict:
+    """
+    Clean a parser result page by page (or section by section) and remap its offsets.
+
+    Header/footer lines repeated across most pages are removed when the
+    parser reported page_offsets (PDF pages, slides). Each part is cleaned
+    separately and rejoined with blank lines, so page_offsets and
+    section_offsets stay valid for chunking.
+
+    Returns:
+        A copy of parsed with cleaned text and offsets, plus a "cleaning" report
+        {"chars_before", "chars_after", "chars_saved", "repeated_lines"}
+    """
+    text = parsed.get('text') or ''
+    pages, sections = parsed.get('page_offsets') or [], parsed.get('section_offsets') or []
+    bounds = sorted({0, *pages, *sections})
+    parts = [text[start:end] for start, end in zip(bounds, bounds[1:] + [len(text)])]
+    repeated = find_repeated_lines(parts, edge_lines, min_ratio) if pages else set()
+    cleaned = [clean_text(strip_repeated_lines(part, repeated, edge_lines)) for part in parts]
+    new_bounds, offset = {}, 0
+    for bound, part in zip(bounds, cleaned):
+        new_bounds[bound] = offset
+        offset += len(part) + 2
+    result = dict(parsed)
+    result['text'] = '\n\n'.join(cleaned)
+    if pages:
+        result['page_offsets'] = [new_bounds[p] for p in pages]
+    if sections:
+        result['section_offsets'] = [new_bounds[s] for s in sections]
+    result['cleaning'] = {
+        'chars_before': len(text),
+        'chars_after': len(result['text']),
+        'chars_saved': len(text) - len(result['text']),
+        'repeated_lines': len(repeated)
+    }
+    return result
 
 def normalize_text(text: str) -> str:
     """
@@ -1,6 +1,9 @@
+import numpy as np
 import pytest
+import whisper
 from pathlib import Path
-from src.parsers.audio_parser import AudioParser
+from src.parsers import audio_parser
+from src.parsers.audio_parser import AudioParser, SAMPLE_RATE, find_silence_splits
 
 def test_audio_parser_initialization():
     parser = AudioParser(model_size="small")
@@ -11,4 +14,74 @@ def test_unsupported_file_type():
     with pytest.raises(ValueError):
         parser.transcribe("test.txt")
 
+def test_find_silence_splits_cuts_in_quiet_frames():
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-0.5, 0.5, SAMPLE_RATE * 25).astype(np.float32)
+    # Silence around 9-10s and 19-20s; targets are every 10s
+    audio[9 * SAMPLE_RATE:10 * SAMPLE_RATE] = 0
+    audio[19 * SAMPLE_RATE:20 * SAMPLE_RATE] = 0
+    spans = find_silence_splits(audio, target_seconds=10, search_seconds=2)
+    assert spans[0][0] == 0 and spans[-1][1] == len(audio)
+    assert all(a[1] == b[0] for a, b in zip(spans, spans[1:]))
+    for _, end in spans[:-1]:
+        assert audio[end] == 0
+
+def test_long_audio_stitches_absolute_timestamps(monkeypatch):
+    class FakeModel:
+        def transcribe(self, audio):
+            length = len(audio) / SAMPLE_RATE
+            return {"language": "en", "segments": [
+                {"start": 0.0, "end": length, "text": " piece ", "avg_logprob": -0.2, "no_speech_prob": 0.1},
+                {"start": 0.0, "end": 0.5, "text": "", "avg_logprob": -2.0, "no_speech_prob": 0.99}
+            ]}
+
+    audio = np.ones(SAMPLE_RATE * 25, dtype=np.float32)
+    monkeypatch.setattr(audio_parser, "_MODEL_CACHE", {"tiny": FakeModel()})
+    monkeypatch.setattr(whisper, "load_audio", lambda path: audio)
+
+    parser = AudioParser("tiny")
+    segments = list(parser.iter_segments("lecture.wav", chunk_seconds=10, max_workers=1))
+    assert [round(s["start"]) for s in segments] == [0, 10, 20]
+    assert segments[-1]["end"] == pytest.approx(25)
+
+    result = parser.transcribe("lecture.wav", long_audio=True, chunk_seconds=10, max_workers=1)
+    assert result["text"] == "piece piece piece"
+    assert result["duration"] == pytest.approx(25)
+    assert result["language"] == "en"
+
+def test_model_is_loaded_lazily_and_streamed_transcripts_are_cached(monkeypatch, tmp_path):
+    from src.storage.file_store import FileStore
+
+    class FakeModel:
+        def transcribe(self, audio):
+            # Pieces arrive as arrays, whole files as paths
+            text = " piece " if isinstance(audio, np.ndarray) else " whole "
+            return {"language": "en", "segments": [
+                {"start": 0.0, "end": 1.0, "text": text, "avg_logprob": -0.2, "no_speech_prob": 0.1}
+            ]}
+
+    def fail(model_size):
+        raise AssertionError("model loaded on construction")
+
+    monkeypatch.setattr(audio_parser, "_MODEL_CACHE", {})
+    monkeypatch.setattr(whisper, "load_model", fail)
+    parser = AudioParser("tiny", cache=FileStore(tmp_path / "cache"))
+
+    path = tmp_path / "lecture.wav"
+    path.write_bytes(b"RIFF fake audio")
+    monkeypatch.setattr(whisper, "load_model", lambda model_size: FakeModel())
+    monkeypatch.setattr(whisper, "load_audio", lambda p: np.ones(SAMPLE_RATE * 25, dtype=np.float32))
+    first = list(parser.iter_segments(path, chunk_seconds=10, max_workers=1))
+    again = list(parser.iter_segments(path, chunk_seconds=10, max_workers=1))
+    assert len(first) == 3 and again == first
+    assert parser.decoded == 1
+    assert parser.transcribe(path, long_audio=True, chunk_seconds=10)["text"] == "piece piece piece"
+    assert parser.decoded == 1
+
+    # A different split or the whole-file mode is a different transcript, not a cache hit
+    list(parser.iter_segments(path, chunk_seconds=5, max_workers=1))
+    assert parser.decoded == 2
+    assert parser.transcribe(path)["text"] == "whole"
+    assert parser.decoded == 3
+
 # Add more tests as needed 
\ No newline at end of file
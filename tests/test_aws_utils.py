@@ -0,0 +1,95 @@
+import contextlib
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from src.utils.aws_utils import AWSManager, make_transfer_config
+
+BUCKET = "theta-test-bucket"
+TABLE = "theta-test-files"
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    for var in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_SESSION_TOKEN"):
+        monkeypatch.setenv(var, "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket=BUCKET)
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        dynamodb.create_table(
+            TableName=TABLE,
+            KeySchema=[{"AttributeName": "user_id", "KeyType": "HASH"}, {"AttributeName": "file_id", "KeyType": "RANGE"}],
+            AttributeDefinitions=[{"AttributeName": "user_id", "AttributeType": "S"},
+                                  {"AttributeName": "file_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        yield AWSManager(s3, dynamodb, BUCKET, TABLE, make_transfer_config(5, 5, 4))
+
+
+def test_iter_files_follows_pagination(manager):
+    written = manager.save_metadata_batch(
+        {"user_id": "u1", "file_id": f"f{i:03d}", "s3_key": f"uploads/f{i:03d}", "class": "MATH"} for i in range(130)
+    )
+    manager.save_metadata_to_dynamodb({"user_id": "u2", "file_id": "other", "s3_key": "uploads/other"})
+    assert written == 130
+    files = list(manager.iter_files("u1", page_size=25, projection=["file_id", "class"]))
+    assert len(files) == 130 and set(files[0]) == {"file_id", "class"}
+    assert len(manager.list_all_files("u1")) == 130
+
+
+def test_batch_get_returns_existing_files(manager):
+    manager.save_metadata_batch({"user_id": "u1", "file_id": f"f{i}", "s3_key": f"k{i}"} for i in range(150))
+    found = manager.get_metadata_batch([f"f{i}" for i in range(140)] + ["missing"], "u1")
+    assert len(found) == 140 and found["f7"]["s3_key"] == "k7"
+
+
+def test_delete_files_removes_objects_and_metadata(manager, tmp_path):
+    source = tmp_path / "lecture.bin"
+    source.write_bytes(b"x" * (6 * 1024 ** 2))
+    for i in range(3):
+        assert manager.upload_file_to_s3(str(source), f"uploads/f{i}")
+    manager.save_metadata_batch({"user_id": "u1", "file_id": f"f{i}", "s3_key": f"uploads/f{i}"} for i in range(3))
+
+    result = manager.delete_files(["f0", "f2", "nope"], "u1")
+    assert sorted(result["deleted"]) == ["f0", "f2"] and result["missing"] == ["nope"]
+    assert list(manager.iter_s3_keys("uploads/")) == ["uploads/f1"]
+    assert [item["file_id"] for item in manager.iter_files("u1")] == ["f1"]
+
+
+def test_failures_are_not_reported_as_success(manager, monkeypatch):
+    manager.save_metadata_batch({"user_id": "u1", "file_id": f"f{i}", "s3_key": f"k{i}"} for i in range(3))
+    throttled = ClientError({"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow down"}},
+                            "BatchWriteItem")
+
+    @contextlib.contextmanager
+    def failing_writer():
+        yield type("Writer", (), {"delete_item": lambda self, Key: None})()
+        raise throttled
+
+    monkeypatch.setattr(manager.table, "batch_writer", failing_writer)
+    result = manager.delete_files(["f0", "f1"], "u1")
+    assert result["deleted"] == [] and sorted(result["failed"]) == ["f0", "f1"]
+
+    def failing_get(**kwargs):
+        raise throttled
+
+    monkeypatch.setattr(manager.dynamodb, "batch_get_item", failing_get)
+    with pytest.raises(ClientError):
+        manager.get_metadata_batch(["f0", "f1"], "u1")
+    assert manager.delete_files(["f2"], "u1")["failed"] == ["f2"]
+
+
+def test_parallel_scan_reads_every_user(manager):
+    manager.save_metadata_batch(
+        {"user_id": f"u{i % 7}", "file_id": f"f{i}", "s3_key": f"k{i}", "text_size": i} for i in range(300)
+    )
+    items = list(manager.scan_files(total_segments=4, projection=["user_id", "file_id"], page_size=20))
+    assert len(items) == 300
+    assert {item["user_id"] for item in items} == {f"u{i}" for i in range(7)}
+    assert set(items[0]) == {"user_id", "file_id"}
+    # Stopping early must not leave segment threads blocked
+    assert len(list(zip(range(5), manager.scan_files(total_segments=4, page_size=1)))) == 5
@@ -0,0 +1,94 @@
+import hashlib
+
+import chromadb
+import pytest
+
+from src.parsers.embed_parser import prepare_chunks, save_to_chroma
+from src.parsers.search_service import SearchService
+from src.storage.bm25_index import BM25Index, reciprocal_rank_fusion
+from src.storage.metadata_index import MetadataIndex
+
+
+class HashEmbeddingFunction(chromadb.EmbeddingFunction):
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        return [[b / 255 for b in hashlib.sha256(text.encode()).digest()[:16]] for text in input]
+
+
+def test_bm25_ranks_rare_terms_and_reindexes_in_place():
+    index = BM25Index()
+    index.upsert("user_a", ["c1", "c2", "c3"], [
+        "The lecture covers eigenvalues and eigenvectors.",
+        "CS-229 problem set: the lecture on SVMs.",
+        "The lecture is about the lecture."
+    ])
+    assert index.search("user_a", "cs229 lecture")[0][0] == "c2"
+    assert index.search("user_a", "lecture", ids={"c1"}) == index.search("user_a", "lecture", ids=["c1"])
+
+    index.upsert("user_a", ["c2"], ["Nothing relevant here."])
+    assert [doc_id for doc_id, _ in index.search("user_a", "cs229")] == []
+    index.delete("user_a", ["c1"])
+    assert len(index) == 2 and index.search("user_b", "lecture") == []
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "c"]], k=60)
+    assert [doc_id for doc_id, _ in fused] == ["b", "c", "a", "d"]
+    assert fused[0][1] == 1 / 62 + 1 / 61
+
+
+def test_hybrid_search_surfaces_exact_course_codes():
+    client = chromadb.EphemeralClient()
+    ef = HashEmbeddingFunction()
+    bm25 = BM25Index()
+    filler = [{"text": f"General study advice number {i}. " * 20, "filename": f"f{i}.pdf", "file_id": f"f{i}",
+               "user_id": "bm25_test", "class": "GEN 100", "topic": "advice"} for i in range(30)]
+    target = {"text": "Homework for MATH-221: integrate by parts.", "filename": "hw.pdf", "file_id": "hw",
+              "user_id": "bm25_test", "class": "MATH 221", "topic": "calculus"}
+    save_to_chroma(prepare_chunks(filler + [target]), embedding_function=ef, client=client,
+                   metadata_index=MetadataIndex(), bm25_index=bm25)
+
+    service = SearchService(client=client, embedding_function=ef, bm25_index=bm25)
+    hybrid = service.search_similar_chunks("math221 homework", "bm25_test", n_results=3, mode="hybrid")
+    assert hybrid[0]["filename"] == "hw.pdf" and "fusion_score" in hybrid[0]
+    with pytest.raises(ValueError):
+        service.search_similar_chunks("math221", "bm25_test", mode="bogus")
+
+
+def test_collection_written_without_postings_is_backfilled_for_hybrid_search():
+    client = chromadb.EphemeralClient()
+    ef = HashEmbeddingFunction()
+    parsed = [{"text": f"Reading list entry {i}. " * 10, "filename": f"r{i}.pdf", "file_id": f"r{i}",
+               "user_id": "bm25_legacy"} for i in range(10)]
+    parsed.append({"text": "Lab report for CHEM-310 titration.", "filename": "lab.pdf", "file_id": "lab",
+                   "user_id": "bm25_legacy"})
+    # Written before the BM25 index existed
+    save_to_chroma(prepare_chunks(parsed), embedding_function=ef, client=client, metadata_index=MetadataIndex())
+
+    bm25 = BM25Index()
+    assert not bm25.is_backfilled("user_bm25_legacy")
+    service = SearchService(client=client, embedding_function=ef, bm25_index=bm25)
+    hybrid = service.search_similar_chunks("chem310 titration", "bm25_legacy", n_results=2, mode="hybrid")
+    assert "lab.pdf" in [result["filename"] for result in hybrid]
+    assert bm25.is_backfilled("user_bm25_legacy") and len(bm25) == 11
+    assert bm25.search("user_bm25_legacy", "titration")[0][0] == "lab_0"
+
+
+def test_bm25_failure_does_not_fail_the_stored_batch():
+    class BrokenBM25(BM25Index):
+        def upsert(self, collection, ids, texts):
+            raise OSError("disk full")
+
+    client = chromadb.EphemeralClient()
+    index, bm25 = MetadataIndex(), BrokenBM25()
+    parsed = [{"text": "Orbital mechanics notes. " * 5, "filename": "o.pdf", "file_id": "o",
+               "user_id": "bm25_broken"}]
+    summary = save_to_chroma(prepare_chunks(parsed), embedding_function=HashEmbeddingFunction(), client=client,
+                             metadata_index=index, bm25_index=bm25)
+
+    assert summary["chunks"] == 1 and summary["failed_chunks"] == 0
+    assert index.files("user_bm25_broken")[0]["missing"] == []
+    # The next writer or hybrid query rebuilds the postings
+    assert not bm25.is_backfilled("user_bm25_broken")
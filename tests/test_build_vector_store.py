@@ -0,0 +1,76 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend', 'src')))
+
+import build_vector_store
+from build_vector_store import (INDEX_TYPES, FakeEmbeddingClient, append_to_index, build_faiss_index,
+                                embed_texts, load_index, save_index)
+from src.storage.embedding_cache import EmbeddingCache
+
+
+def test_batches_keep_order_and_dedupe_repeats():
+    client = FakeEmbeddingClient(dim=8)
+    chunks = [f"chunk {i}" for i in range(10)] + ["chunk 3"]
+    vectors = embed_texts(chunks, client=client, batch_size=4, max_concurrency=3)
+
+    assert vectors.shape == (11, 8) and vectors.dtype == np.float32
+    assert client.requests == 3 and client.inputs == 10
+    assert np.allclose(vectors[3], vectors[10])
+    single = embed_texts(["chunk 7"], client=FakeEmbeddingClient(dim=8))
+    assert np.allclose(vectors[7], single[0])
+    assert build_faiss_index(vectors).search(vectors[:1], 1)[1][0][0] == 0
+
+
+def test_cache_skips_requests_on_rerun(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite3")
+    chunks = ["alpha", "beta", "gamma"]
+    first = embed_texts(chunks, client=FakeEmbeddingClient(dim=8), cache=cache)
+
+    client = FakeEmbeddingClient(dim=8)
+    second = embed_texts(chunks + ["delta"], client=client, cache=cache)
+    assert client.inputs == 1
+    assert np.allclose(first, second[:3])
+
+
+def test_fake_vectors_are_cached_apart_from_real_ones(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite3")
+    embed_texts(["alpha"], client=FakeEmbeddingClient(dim=8), cache=cache)
+    assert cache.get_many(["alpha"], "openai/text-embedding-3-small") == [None]
+
+    client = FakeEmbeddingClient(dim=16)
+    assert embed_texts(["alpha"], client=client, cache=cache).shape == (1, 16)
+    assert client.inputs == 1
+
+
+def test_rate_limits_are_retried(monkeypatch):
+    monkeypatch.setattr(build_vector_store.time, "sleep", lambda seconds: None)
+    client = FakeEmbeddingClient(dim=8, fail_first=2)
+    vectors = embed_texts(["a", "b"], client=client, max_retries=3)
+    assert vectors.shape == (2, 8) and client.requests == 3
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_index_types_round_trip_memory_mapped(tmp_path, index_type):
+    chunks = [f"chunk {i}" for i in range(600)]
+    vectors = embed_texts(chunks, client=FakeEmbeddingClient(dim=16))
+    save_index(build_faiss_index(vectors, index_type=index_type, nprobe=64), chunks, tmp_path / "rag")
+
+    index, loaded = load_index(tmp_path / "rag", mmap=True)
+    assert loaded == chunks and index.ntotal == 600
+    assert (index.search(vectors[:20], 1)[1][:, 0] == np.arange(20)).mean() >= 0.9
+
+
+def test_append_adds_without_rebuild(tmp_path):
+    client = FakeEmbeddingClient(dim=16)
+    chunks = [f"chunk {i}" for i in range(400)]
+    save_index(build_faiss_index(embed_texts(chunks, client=client), index_type="ivf"), chunks, tmp_path / "rag")
+
+    new_vectors = embed_texts(["late chunk"], client=client)
+    assert append_to_index(["late chunk"], new_vectors, tmp_path / "rag") == 401
+    index, loaded = load_index(tmp_path / "rag")
+    assert loaded[-1] == "late chunk"
+    assert index.search(new_vectors, 1)[1][0][0] == 400
@@ -0,0 +1,62 @@
+import pytest
+
+from src.utils.chunking import chunk_spans, token_offsets
+
+
+def old_chunk_text(text, chunk_size=1000, overlap=200):
+    chunks = []
+    start = 0
+    while start < len(text):
+        chunks.append(text[start:start + chunk_size])
+        start = start + chunk_size - overlap
+    return chunks
+
+
+SENTENCES = " ".join(f"Sentence number {i} explains concept {i * 3} in detail." for i in range(200))
+
+
+def test_none_mode_matches_original_fixed_windows():
+    text = "abcdefghij" * 257
+    spans = chunk_spans(text, 1000, 200, boundary="none")
+    assert [text[s:e] for s, e in spans] == old_chunk_text(text)
+
+
+def test_sentence_mode_ends_on_sentence_boundaries():
+    spans = chunk_spans(SENTENCES, 300, 60, boundary="sentence")
+    assert spans[0][0] == 0 and spans[-1][1] == len(SENTENCES)
+    for start, end in spans:
+        assert end - start <= 300
+        assert SENTENCES[start:end].startswith("Sentence")
+        assert SENTENCES[start:end].endswith(".")
+    # Consecutive chunks overlap but always make progress
+    assert all(b[0] < a[1] and b[0] > a[0] for a, b in zip(spans, spans[1:]))
+
+
+def test_paragraph_mode_prefers_blank_lines():
+    text = "\n\n".join("Short paragraph line one. Line two follows." for _ in range(30))
+    for start, end in chunk_spans(text, 200, 0, boundary="paragraph"):
+        assert text[start:end].endswith("follows.")
+
+
+def test_token_budget_caps_chunks():
+    spans = chunk_spans(SENTENCES, None, 0, boundary="sentence", max_tokens=40)
+    offsets = token_offsets(SENTENCES)
+    for start, end in spans:
+        assert sum(1 for o in offsets if start <= o < end) <= 40
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        chunk_spans("text", 100, 100)
+    with pytest.raises(ValueError):
+        chunk_spans("text", 100, 10, boundary="words")
+
+
+def test_section_spans_pack_short_sections_and_respect_long_ones():
+    from src.utils.chunking import section_spans
+    sections = ["Short intro.", "Tiny.", SENTENCES[:900]]
+    text = "\n\n".join(sections)
+    offsets = [0, len(sections[0]) + 2, len(sections[0]) + len(sections[1]) + 4]
+    spans = section_spans(text, offsets, 300, 60)
+    assert text[spans[0][0]:spans[0][1]] == "Short intro.\n\nTiny."
+    assert all(start >= offsets[2] for start, _ in spans[1:])
@@ -0,0 +1,207 @@
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src.parsers import conversion_pool
+from src.parsers.conversion_pool import ConversionPool, OfficeInstance
+from src.storage.conversion_cache import ConversionCache
+
+
+class FakeOfficeInstance:
+    """Stands in for LibreOffice: 'converts' by copying the source bytes into <stem>.pdf."""
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, index, base_dir, timeout):
+        self.profile = base_dir / f"profile_{index}"
+        self.conversions = 0
+        self.restarts = 0
+        self.fail_next = False
+
+    def start(self):
+        pass
+
+    def convert(self, input_path, output_dir):
+        with FakeOfficeInstance.lock:
+            FakeOfficeInstance.active += 1
+            FakeOfficeInstance.peak = max(FakeOfficeInstance.peak, FakeOfficeInstance.active)
+        try:
+            time.sleep(0.05)
+            if self.fail_next:
+                self.fail_next = False
+                raise RuntimeError("office crashed")
+            output = output_dir / (input_path.stem + ".pdf")
+            output.write_bytes(b"%PDF-fake " + input_path.read_bytes())
+            self.conversions += 1
+            return output
+        finally:
+            with FakeOfficeInstance.lock:
+                FakeOfficeInstance.active -= 1
+
+    def restart(self):
+        self.restarts += 1
+
+    def stop(self):
+        pass
+
+
+def write_sources(tmp_path, contents):
+    paths = []
+    for i, content in enumerate(contents):
+        path = tmp_path / f"handout_{i}.pptx"
+        path.write_bytes(content)
+        paths.append(path)
+    return paths
+
+
+def test_same_content_is_converted_once(tmp_path):
+    cache = ConversionCache(tmp_path / "cache")
+    sources = write_sources(tmp_path, [b"slides A", b"slides A", b"slides B", b"slides A"])
+    with ConversionPool(size=2, cache=cache, instance_factory=FakeOfficeInstance, work_dir=tmp_path / "work") as pool:
+        results = pool.convert_many(sources, tmp_path / "out")
+        metrics = pool.metrics()
+
+    assert metrics["conversions"] == 2 and metrics["cache_hits"] == 2
+    assert sum(result["cached"] for result in results) == 2
+    assert (tmp_path / "out" / "handout_3.pdf").read_bytes() == b"%PDF-fake slides A"
+
+
+def test_instances_run_in_parallel_and_restart_on_failure(tmp_path):
+    FakeOfficeInstance.peak = 0
+    sources = write_sources(tmp_path, [f"deck {i}".encode() for i in range(6)])
+    with ConversionPool(size=3, instance_factory=FakeOfficeInstance, work_dir=tmp_path / "work") as pool:
+        pool._instances[0].fail_next = True
+        response = pool.handle_request({"op": "convert", "files": [str(p) for p in sources],
+                                        "output_dir": str(tmp_path / "out")})
+        metrics = pool.metrics()
+
+    assert all("error" not in result for result in response["results"])
+    assert FakeOfficeInstance.peak == 3
+    assert metrics["restarts"] == 1 and metrics["failures"] == 0
+    assert len({instance.profile for instance in pool._instances}) == 3
+
+
+def test_inflight_locks_are_released(tmp_path):
+    cache = ConversionCache(tmp_path / "cache")
+    sources = write_sources(tmp_path, [b"slides A", b"slides B", b"slides A"])
+    with ConversionPool(size=2, cache=cache, instance_factory=FakeOfficeInstance, work_dir=tmp_path / "work") as pool:
+        pool.convert_many(sources, tmp_path / "out")
+        assert pool._inflight == {}
+
+
+def test_eviction_tolerates_files_removed_by_another_process(tmp_path, monkeypatch):
+    cache = ConversionCache(tmp_path / "cache", max_bytes=1)
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"%PDF-fake")
+    cache.put("a" * 64, pdf)
+    vanished = cache.path_for("b" * 64)
+    vanished.write_bytes(b"%PDF-fake")
+    real_glob = type(cache.directory).glob
+
+    def glob_then_delete(self, pattern):
+        paths = list(real_glob(self, pattern))
+        vanished.unlink(missing_ok=True)
+        return paths
+
+    monkeypatch.setattr(type(cache.directory), "glob", glob_then_delete)
+    cache._evict()
+    assert cache.get("b" * 64) is None
+
+
+def test_office_start_waits_for_the_listener(tmp_path, monkeypatch):
+    script = tmp_path / "fake_soffice"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import re, socket, sys, time\n"
+        "port = int(re.search(r'port=(\\d+)', ' '.join(sys.argv)).group(1))\n"
+        "time.sleep(0.5)\n"
+        "server = socket.socket()\n"
+        "server.bind(('127.0.0.1', port))\n"
+        "server.listen()\n"
+        "time.sleep(30)\n"
+    )
+    script.chmod(0o755)
+    monkeypatch.setattr(conversion_pool, "SOFFICE", str(script))
+    instance = OfficeInstance(0, tmp_path, startup_timeout=10)
+    instance.client = "unoconv"
+    try:
+        instance.start()
+        socket.create_connection(("127.0.0.1", instance.port), timeout=1).close()
+    finally:
+        instance.stop()
+
+
+class FakeOfficeProcess:
+    def __init__(self):
+        self.returncode = None
+        self.killed = threading.Event()
+
+    def poll(self):
+        return self.returncode
+
+    def kill(self):
+        self.returncode = -9
+        self.killed.set()
+
+    def terminate(self):
+        self.kill()
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+
+class FakeDocument:
+    def supportsService(self, service):
+        return False
+
+    def storeToURL(self, url, properties):
+        Path(url.replace("file://", "")).write_bytes(b"%PDF-fake")
+
+    def close(self, deliver):
+        pass
+
+
+class FakeDesktop:
+    def __init__(self, process=None):
+        self.process = process
+
+    def loadComponentFromURL(self, url, frame, flags, properties):
+        if self.process is not None:
+            # A document that wedges the office: the call only returns once the office dies
+            self.process.killed.wait()
+            raise RuntimeError("Binary URP bridge disposed during call")
+        return FakeDocument()
+
+
+def test_uno_conversion_deadline_kills_and_restarts_the_office(tmp_path, monkeypatch):
+    monkeypatch.setattr(conversion_pool, "_uno_property", lambda name, value: (name, value))
+    instance = OfficeInstance(0, tmp_path, timeout=0.2)
+    instance.client = "uno"
+    hung = FakeOfficeProcess()
+    instance.process, instance._desktop = hung, FakeDesktop(hung)
+
+    def start():
+        instance.process, instance._desktop = FakeOfficeProcess(), FakeDesktop()
+    monkeypatch.setattr(instance, "start", start)
+
+    [source] = write_sources(tmp_path, [b"slides"])
+    with pytest.raises(TimeoutError):
+        instance.convert(source, tmp_path)
+    assert hung.killed.is_set()
+
+    output = instance.convert(source, tmp_path)
+    assert output.read_bytes() == b"%PDF-fake"
+    assert instance.restarts == 1 and instance.process is not hung
+
+
+def test_pool_warns_when_instances_cannot_stay_resident(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(conversion_pool, "uno", None)
+    monkeypatch.setattr(conversion_pool, "UNOCONV", None)
+    with ConversionPool(1, instance_factory=FakeOfficeInstance, work_dir=str(tmp_path / "work")) as pool:
+        assert pool.metrics()["persistent_office"] is False
+    assert "cold soffice start" in capsys.readouterr().err
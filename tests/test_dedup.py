@@ -0,0 +1,106 @@
+import hashlib
+import random
+
+import chromadb
+
+from src.parsers.embed_parser import delete_file_chunks, load_dedup_indexes, prepare_chunks, save_to_chroma
+from src.storage.metadata_index import MetadataIndex
+from src.utils.dedup import NearDuplicateIndex, choose_bands
+
+WORDS = "matrix vector gradient kernel entropy prior sample tensor margin loss bias basis".split()
+
+
+class HashEmbeddingFunction(chromadb.EmbeddingFunction):
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        return [[b / 255 for b in hashlib.sha256(text.encode()).digest()[:16]] for text in input]
+
+
+def sentence_block(seed, words=120):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) + str(rng.randrange(50)) for _ in range(words)) + "."
+
+
+def test_near_duplicates_found_and_distinct_texts_kept():
+    index = NearDuplicateIndex(threshold=0.8)
+    base = sentence_block(1)
+    assert index.add("a", base) is None
+    assert index.add("b", sentence_block(2)) is None
+    edited = base.replace(base.split()[10], "changed", 1)
+    assert index.add("c", edited) == "a"
+    assert len(index) == 2
+    bands, rows = choose_bands(0.8, 128)
+    assert bands * rows == 128 and (1 / bands) ** (1 / rows) <= 0.8
+
+
+def test_prepare_chunks_drops_repeated_slides_and_maps_them():
+    slide = sentence_block(3, words=60)
+    sections = [slide, sentence_block(4, words=60), slide, slide + " Build step."]
+    text, offsets = "", []
+    for section in sections:
+        offsets.append(len(text))
+        text += section + "\n\n"
+    parsed = {"text": text, "section_offsets": offsets, "filename": "deck.pptx", "file_id": "deck", "user_id": "u1"}
+
+    duplicates = {}
+    chunks = prepare_chunks([parsed], chunk_size=600, overlap=0, dedup_threshold=0.85, duplicates=duplicates)["u1"]
+    assert [c["chunk_index"] for c in chunks] == [0, 1]
+    assert all(c["total_chunks"] == 2 for c in chunks)
+    assert sorted(duplicates.values()) == ["deck_0", "deck_0"]
+
+
+def test_user_scope_dedups_across_files_but_not_against_a_files_old_version():
+    shared = sentence_block(5, words=60)
+    files = [{"text": shared, "filename": f"{name}.pdf", "file_id": name, "user_id": "u1"} for name in ("f1", "f2")]
+    indexes, duplicates = {}, {}
+    chunks = prepare_chunks(files, dedup_threshold=0.9, dedup_scope="user", dedup_indexes=indexes,
+                            duplicates=duplicates)["u1"]
+    assert [c["file_id"] for c in chunks] == ["f1"]
+    assert list(duplicates.values()) == ["f1_0"]
+
+    # Re-indexing f1 with the same long-lived index keeps its chunk
+    again = prepare_chunks(files[:1], dedup_threshold=0.9, dedup_scope="user", dedup_indexes=indexes)["u1"]
+    assert [c["file_id"] for c in again] == ["f1"]
+
+
+def save_with_user_dedup(client, index, files, user_id):
+    indexes = load_dedup_indexes(client, [user_id], index, 0.9)
+    dropped = []
+    chunks = prepare_chunks(files, dedup_threshold=0.9, dedup_scope="user", dedup_indexes=indexes, dropped=dropped)
+    save_to_chroma(chunks, embedding_function=HashEmbeddingFunction(), client=client, metadata_index=index,
+                   dropped=dropped, dedup_indexes=indexes)
+    return dropped
+
+
+def test_user_scope_dedups_against_earlier_runs_and_readmits_on_delete():
+    client, index, user_id = chromadb.EphemeralClient(), MetadataIndex(), "dedup_runs"
+    shared = sentence_block(6, words=60)
+    file = lambda name, text: {"text": text, "filename": f"{name}.pdf", "file_id": name, "user_id": user_id}
+    save_with_user_dedup(client, index, [file("f1", shared)], user_id)
+
+    # A later run sees f1 through the stored signatures
+    dropped = save_with_user_dedup(client, index, [file("f2", shared), file("f3", shared)], user_id)
+    assert [(link["chunk"]["file_id"], link["representative"]) for link in dropped] == [("f2", "f1_0"), ("f3", "f1_0")]
+    collection = client.get_collection(f"user_{user_id}")
+    assert collection.get(include=[])["ids"] == ["f1_0"]
+
+    # Deleting f1 brings back one copy; the other now points at it
+    delete_file_chunks(user_id, "f1", client=client, metadata_index=index, embedding_function=HashEmbeddingFunction())
+    assert collection.get(include=["documents"])["documents"] == [shared]
+    assert index.chunk_ids(f"user_{user_id}") == ["f2_0"]
+    assert [link["chunk"]["file_id"] for link in index.duplicates_of(f"user_{user_id}", "f2")] == ["f3"]
+
+
+def test_collection_written_without_signatures_is_signed_from_chroma():
+    client, index, user_id = chromadb.EphemeralClient(), MetadataIndex(), "dedup_legacy"
+    shared = sentence_block(7, words=60)
+    save_to_chroma(prepare_chunks([{"text": shared, "filename": "old.pdf", "file_id": "old", "user_id": user_id}]),
+                   embedding_function=HashEmbeddingFunction(), client=client, metadata_index=index)
+    assert index.unsigned_files(f"user_{user_id}") == ["old"]
+
+    dropped = save_with_user_dedup(client, index, [{"text": shared, "filename": "new.pdf", "file_id": "new",
+                                                    "user_id": user_id}], user_id)
+    assert [link["representative"] for link in dropped] == ["old_0"]
+    assert index.unsigned_files(f"user_{user_id}") == []
@@ -0,0 +1,106 @@
+import io
+import json
+
+import chromadb
+import pytest
+
+from src.parsers.dump_collection import dump, iter_rows
+from src.storage.metadata_index import MetadataIndex
+
+
+@pytest.fixture(scope="module")
+def collection():
+    collection = chromadb.EphemeralClient().get_or_create_collection("dump_collection_test")
+    collection.upsert(
+        ids=[f"f{i % 2}_{i}" for i in range(25)],
+        documents=[f"chunk {i}" for i in range(25)],
+        embeddings=[[float(i), 1.0] for i in range(25)],
+        metadatas=[{"file_id": f"f{i % 2}", "chunk_index": i} for i in range(25)]
+    )
+    return collection
+
+
+@pytest.fixture(scope="module")
+def metadata_index(collection):
+    index = MetadataIndex()
+    assert index.backfill(collection.name, collection)
+    return index
+
+
+@pytest.mark.parametrize("indexed", [True, False])
+def test_pages_cover_every_row_once(collection, metadata_index, indexed):
+    index = metadata_index if indexed else None
+    rows = list(iter_rows(collection, page_size=4, metadata_index=index))
+    assert len(rows) == 25 and len({row["id"] for row in rows}) == 25
+
+    window = list(iter_rows(collection, offset=20, limit=10, page_size=4, metadata_index=index))
+    assert [row["id"] for row in window] == [row["id"] for row in rows[20:]]
+
+    filtered = list(iter_rows(collection, where={"file_id": "f1"}, offset=3, limit=4, page_size=4,
+                              metadata_index=index))
+    every_f1 = [row["id"] for row in rows if row["metadata"]["file_id"] == "f1"]
+    assert [row["id"] for row in filtered] == every_f1[3:7]
+
+
+@pytest.mark.parametrize("indexed", [True, False])
+def test_ndjson_projection_and_filter(collection, metadata_index, indexed):
+    out = io.StringIO()
+    count = dump(collection, out, "ndjson", fields=["metadata"], where={"file_id": "f1"}, page_size=5,
+                 metadata_index=metadata_index if indexed else None)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert count == len(lines) == 12
+    assert all(set(row) == {"id", "metadata"} and row["metadata"]["file_id"] == "f1" for row in lines)
+
+
+def test_json_output_keeps_the_chunks_shape(collection):
+    out = io.StringIO()
+    dump(collection, out, "json", limit=10, page_size=3)
+    document = json.loads(out.getvalue())
+    assert len(document["chunks"]) == 10 and document["next_offset"] == 10
+    assert set(document["chunks"][0]) == {"id", "text", "metadata"}
+
+
+def test_indexed_pages_are_fetched_by_id_and_errors_are_not_written(collection, metadata_index):
+    class Recorder:
+        name = collection.name
+
+        def __init__(self, fail_after=None):
+            self.calls = []
+            self.fail_after = fail_after
+
+        def get(self, **kwargs):
+            self.calls.append(kwargs)
+            if self.fail_after is not None and len(self.calls) > self.fail_after:
+                raise RuntimeError("connection lost")
+            return collection.get(**kwargs)
+
+    recorder = Recorder()
+    rows = list(iter_rows(recorder, page_size=10, metadata_index=metadata_index))
+    # File by file, chunks in order, and no call ever lists the whole collection
+    assert [row["id"] for row in rows] == [f"f0_{i}" for i in range(0, 25, 2)] + [f"f1_{i}" for i in range(1, 25, 2)]
+    assert all("offset" not in call for call in recorder.calls)
+    assert [len(call["ids"]) for call in recorder.calls] == [10, 10, 5]
+
+    recorder = Recorder()
+    list(iter_rows(recorder, offset=12, limit=3, page_size=10, metadata_index=metadata_index))
+    assert [call["ids"] for call in recorder.calls] == [["f0_24", "f1_1", "f1_3"]]
+
+    out = io.StringIO()
+    with pytest.raises(RuntimeError):
+        dump(Recorder(fail_after=2), out, "json", page_size=10, metadata_index=metadata_index)
+    assert "error" not in out.getvalue()
+
+
+def test_unindexed_collection_is_paged_with_a_bounded_limit(collection):
+    calls = []
+
+    class Recorder:
+        name = collection.name
+
+        def get(self, **kwargs):
+            calls.append(kwargs)
+            return collection.get(**kwargs)
+
+    rows = list(iter_rows(Recorder(), page_size=10, metadata_index=MetadataIndex()))
+    assert len(rows) == 25
+    assert [(call["limit"], call["offset"]) for call in calls] == [(10, 0), (10, 10), (10, 20)]
@@ -0,0 +1,72 @@
+import threading
+
+from src.parsers import embed_parser
+from src.parsers.embed_parser import prepare_chunks, save_to_chroma
+
+
+class FakeCollection:
+    def __init__(self, fail_batches=()):
+        self.upserts = []
+        self.fail_batches = set(fail_batches)
+        self.calls = 0
+        self.metadata = None
+
+    def modify(self, metadata):
+        self.metadata = metadata
+
+    def upsert(self, documents, embeddings, ids, metadatas):
+        self.calls += 1
+        if self.calls in self.fail_batches:
+            raise RuntimeError("transient write error")
+        self.upserts.append(ids)
+
+
+class FakeClient:
+    def __init__(self, collection_factory=FakeCollection, max_batch_size=1000):
+        self.collections = {}
+        self.max_batch_size = max_batch_size
+        self.factory = collection_factory
+        self.lock = threading.Lock()
+
+    def get_max_batch_size(self):
+        return self.max_batch_size
+
+    def get_or_create_collection(self, name, metadata=None, embedding_function=None):
+        with self.lock:
+            return self.collections.setdefault(name, self.factory())
+
+
+def embed(texts):
+    return [[float(len(text)), 1.0] for text in texts]
+
+
+def parsed(user_id, file_id, sentences=200):
+    return {"text": "A sentence about gradients. " * sentences, "filename": f"{file_id}.pdf",
+            "file_id": file_id, "user_id": user_id}
+
+
+def test_batches_are_capped_and_users_written_concurrently():
+    client = FakeClient(max_batch_size=7)
+    user_chunks = prepare_chunks([parsed("u1", "f1"), parsed("u2", "f2"), parsed("u3", "f3")])
+    summary = save_to_chroma(user_chunks, embedding_function=embed, client=client,
+                             model_id="fake", batch_size=50, max_workers=3)
+
+    total = sum(len(chunks) for chunks in user_chunks.values())
+    assert summary["chunks"] == total
+    assert summary["failed_batches"] == 0
+    assert summary["chunks_per_sec"] > 0
+    for collection in client.collections.values():
+        assert all(len(ids) <= 7 for ids in collection.upserts)
+
+
+def test_failed_batch_is_retried_without_aborting(monkeypatch):
+    monkeypatch.setattr(embed_parser.time, "sleep", lambda seconds: None)
+    client = FakeClient(collection_factory=lambda: FakeCollection(fail_batches={1, 3, 4, 5, 6}))
+    user_chunks = prepare_chunks([parsed("u1", "f1", sentences=400)])
+    summary = save_to_chroma(user_chunks, embedding_function=embed, client=client,
+                             model_id="fake", batch_size=5, max_retries=2)
+
+    # Batch 0 succeeds after one retry; batch 1 exhausts its retries; the rest succeed
+    assert summary["failed_batches"] == 1
+    assert summary["failed_chunks"] == 5
+    assert summary["chunks"] == len(user_chunks["u1"]) - 5
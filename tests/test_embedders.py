@@ -0,0 +1,73 @@
+import chromadb
+import numpy as np
+import pytest
+
+from src.parsers.embed_parser import prepare_chunks, save_to_chroma
+from src.parsers.search_service import SearchService
+from src.storage.metadata_index import MetadataIndex
+from src.utils.embedders import (
+    DEFAULT_EMBEDDING_MODEL_ID, EmbedderMismatchError, HashEmbedder, OnnxEmbedder, get_embedder
+)
+
+
+def test_hash_embedder_is_deterministic_and_normalized():
+    embedder = HashEmbedder(dim=64)
+    first, again = embedder(["eigenvalues of a symmetric matrix"]), embedder(["eigenvalues of a symmetric matrix"])
+    assert np.array_equal(first[0], again[0])
+    assert np.isclose(np.linalg.norm(first[0]), 1.0)
+    related, unrelated = embedder(["symmetric matrix eigenvalues", "photosynthesis in plant cells"])
+    assert float(first[0] @ related) > float(first[0] @ unrelated)
+
+
+def test_get_embedder_applies_settings_without_loading_the_model():
+    embedder = get_embedder("onnx", batch_size=8, threads=2, quantize=True)
+    assert isinstance(embedder, OnnxEmbedder)
+    assert (embedder.batch_size, embedder.threads) == (8, 2)
+    assert embedder.identity == DEFAULT_EMBEDDING_MODEL_ID + "-int8"
+    assert get_embedder("onnx", quantize=False).identity == DEFAULT_EMBEDDING_MODEL_ID
+    with pytest.raises(ValueError):
+        get_embedder("word2vec")
+
+
+def test_onnx_embedder_pools_real_tokens_in_batches(tmp_path):
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    vocab = {"[PAD]": 0, "[UNK]": 1, "gradient": 2, "descent": 3, "matrix": 4}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.save(str(tmp_path / "tokenizer.json"))
+    (tmp_path / "model.onnx").write_bytes(b"")
+
+    class OneHotSession:
+        calls = []
+
+        def run(self, outputs, feed):
+            self.calls.append(feed["input_ids"].shape)
+            assert feed["input_ids"].dtype == np.int64 and not feed["token_type_ids"].any()
+            return [np.eye(len(vocab), dtype=np.float32)[feed["input_ids"]]]
+
+    embedder = OnnxEmbedder(batch_size=2, model_dir=str(tmp_path))
+    embedder.session = OneHotSession()
+    vectors = embedder(["gradient descent", "matrix", "gradient gradient matrix"])
+
+    assert OneHotSession.calls == [(2, 256), (1, 256)]
+    # Padding ([PAD] = id 0) is excluded from the mean, and every vector has unit length
+    assert np.allclose(vectors[0], [0, 0, 2 ** -0.5, 2 ** -0.5, 0])
+    assert np.allclose(vectors[1], [0, 0, 0, 0, 1])
+    assert np.allclose(vectors[2], np.array([0, 0, 2, 0, 1]) / 5 ** 0.5)
+
+
+def test_collection_records_its_embedder_and_rejects_another():
+    client = chromadb.EphemeralClient()
+    parsed = [{"text": "Gradient descent minimises the loss.", "filename": "a.pdf", "file_id": "a",
+               "user_id": "embedder_test"}]
+    save_to_chroma(prepare_chunks(parsed), embedding_function=HashEmbedder(), client=client,
+                   metadata_index=MetadataIndex())
+    assert client.get_collection("user_embedder_test").metadata["embedder"] == "hash/384"
+
+    results = SearchService(client=client, embedding_function=HashEmbedder()).search_similar_chunks(
+        "gradient descent", "embedder_test", n_results=1)
+    assert results[0]["filename"] == "a.pdf"
+    with pytest.raises(EmbedderMismatchError):
+        SearchService(client=client, embedding_function=HashEmbedder(dim=128)).get_collection("embedder_test")
+    summary = save_to_chroma(prepare_chunks(parsed), embedding_function=HashEmbedder(dim=128), client=client)
+    assert summary["chunks"] == 0 and summary["failed_chunks"] == 1
@@ -0,0 +1,50 @@
+import hashlib
+
+import chromadb
+import pytest
+
+from src.parsers.embed_parser import prepare_chunks, save_to_chroma
+from src.storage.embedding_cache import EmbeddingCache, embedding_key
+
+
+class CountingEmbeddingFunction(chromadb.EmbeddingFunction):
+    def __init__(self):
+        self.embedded = 0
+
+    def __call__(self, input):
+        self.embedded += len(input)
+        return [[b / 255 for b in hashlib.sha256(text.encode()).digest()[:8]] for text in input]
+
+
+def test_key_ignores_whitespace_but_not_model():
+    assert embedding_key("a  b\n c", "m") == embedding_key("a b c", "m")
+    assert embedding_key("a b c", "m") != embedding_key("a b c", "other")
+
+
+def test_hits_misses_and_lru_eviction(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite3", max_entries=2)
+    cache.put_many(["one", "two"], "m", [[1.0, 2.0], [3.0, 4.0]])
+    assert cache.get_many(["one", "three"], "m") == [[1.0, 2.0], None]
+    cache.put_many(["three"], "m", [[5.0, 6.0]])
+    # "two" was the least recently used entry
+    assert cache.get_many(["one", "two", "three"], "m") == [[1.0, 2.0], None, [5.0, 6.0]]
+    assert len(cache) == 2
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 2
+
+
+def test_save_to_chroma_only_embeds_misses(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite3")
+    embedder = CountingEmbeddingFunction()
+    client = chromadb.EphemeralClient()
+    parsed = [{"text": "Shared handout text. " * 80, "filename": "h.pdf", "file_id": "h1", "user_id": "cache_a"},
+              {"text": "Shared handout text. " * 80, "filename": "h.pdf", "file_id": "h2", "user_id": "cache_b"}]
+
+    # One writer at a time so the second user deterministically sees the first user's entries
+    save_to_chroma(prepare_chunks(parsed), embedding_function=embedder, cache=cache, client=client, max_workers=1)
+    first_run = embedder.embedded
+    assert cache.stats()["misses"] == first_run
+    assert cache.stats()["hits"] > 0  # the second user's copy hits the cache
+
+    save_to_chroma(prepare_chunks(parsed), embedding_function=embedder, cache=cache, client=client)
+    assert embedder.embedded == first_run
+    assert client.get_collection("user_cache_b").count() == client.get_collection("user_cache_a").count()
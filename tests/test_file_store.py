@@ -0,0 +1,66 @@
+import os
+import time
+
+from src.parsers.text_parser import TextParser
+from src.storage.file_store import FileStore
+
+
+def test_get_or_parse_keys_on_content_not_name(tmp_path):
+    store = FileStore(tmp_path / "store")
+    first, second = tmp_path / "a.txt", tmp_path / "renamed.txt"
+    first.write_text("same bytes")
+    second.write_text("same bytes")
+    calls = []
+
+    def parse():
+        calls.append(1)
+        return {"text": "parsed", "filename": "a.txt"}
+
+    store.get_or_parse(first, "TextParser", "1", parse)
+    result = store.get_or_parse(second, "TextParser", "1", parse)
+    assert len(calls) == 1
+    assert result["filename"] == "renamed.txt"
+    # A new parser version must not reuse the old output
+    store.get_or_parse(first, "TextParser", "2", parse)
+    assert len(calls) == 2
+    assert store.stats()["hits"] == 1
+    assert store._inflight == {}
+
+
+def test_overwriting_an_entry_does_not_grow_the_size_estimate(tmp_path):
+    store = FileStore(tmp_path / "store")
+    key = "ab" + "0" * 62
+    for _ in range(5):
+        store.put(key, {"text": "x" * 1000})
+    assert store.stats()["bytes"] == store._path_for(key).stat().st_size
+
+
+def test_opening_the_store_does_not_scan_it(tmp_path, monkeypatch):
+    first = FileStore(tmp_path / "store")
+    first.put("ab" + "0" * 62, {"text": "x" * 1000})
+    size = first.stats()["bytes"]
+
+    reopened = FileStore(tmp_path / "store")
+    assert reopened._total_bytes is None
+    assert reopened.get("ab" + "0" * 62) is not None
+    assert reopened._total_bytes is None
+    reopened.put("cd" + "0" * 62, {"text": "x" * 1000})
+    assert reopened.stats()["bytes"] == 2 * size
+
+
+def test_evicts_least_recently_used(tmp_path):
+    store = FileStore(tmp_path / "store", max_bytes=2500)
+    keys = [f"{i:02d}" + "0" * 62 for i in range(3)]
+    for i, key in enumerate(keys):
+        store.put(key, {"text": "x" * 1000})
+        os.utime(store._path_for(key), (time.time() - 100 + i, time.time() - 100 + i))
+    assert store.get(keys[0]) is None
+    assert store.get(keys[2]) is not None
+
+
+def test_parser_reads_through_cache(tmp_path):
+    path = tmp_path / "notes.md"
+    path.write_text("# Week 1\nVectors.\n")
+    store = FileStore(tmp_path / "store")
+    assert TextParser(store).extract_text(path) == TextParser(store).extract_text(path) == TextParser().extract_text(path)
+    assert store.stats()["hits"] == 1 and store.stats()["misses"] == 1
@@ -0,0 +1,104 @@
+import threading
+import time
+
+from src.parsers import ingest
+from src.parsers.ingest import Ingestor, Pipeline, Stage, discover, parse_file
+
+
+class FakeCollection:
+    def __init__(self):
+        self.ids = set()
+        self.metadata = None
+
+    def modify(self, metadata):
+        self.metadata = metadata
+
+    def upsert(self, ids, documents, embeddings, metadatas):
+        assert len(ids) == len(documents) == len(embeddings) == len(metadatas)
+        self.ids.update(ids)
+
+
+class FakeClient:
+    def __init__(self):
+        self.collections = {}
+        self.lock = threading.Lock()
+
+    def get_max_batch_size(self):
+        return 5
+
+    def get_or_create_collection(self, name, metadata=None, embedding_function=None):
+        with self.lock:
+            return self.collections.setdefault(name, FakeCollection())
+
+
+def embed(texts):
+    return [[float(len(text)), 1.0] for text in texts]
+
+
+def test_directory_is_ingested_through_every_stage(tmp_path):
+    (tmp_path / "notes").mkdir()
+    (tmp_path / "notes" / "week1.md").write_text("# Gradients\n\n" + "Descent steps downhill. " * 100)
+    (tmp_path / "intro.txt").write_text("Backpropagation applies the chain rule. " * 60)
+    (tmp_path / "ignored.bin").write_bytes(b"\x00")
+    records = discover(tmp_path, user_id="u1", class_name="CS229")
+    assert sorted(r["file_id"] for r in records) == ["u1_intro.txt", "u1_notes/week1.md"]
+
+    client = FakeClient()
+    ingestor = Ingestor(client=client, embedding_function=embed, model_id="fake", chunk_size=300, overlap=50)
+    report = ingestor.ingest(records, parse_workers=1, queue_size=1)
+
+    assert report["errors"] == []
+    assert sorted(f["file_id"] for f in report["files"]) == ["u1_intro.txt", "u1_notes/week1.md"]
+    stages = {s["stage"]: s for s in report["metrics"]["stages"]}
+    assert list(stages) == ["convert", "parse", "chunk", "embed", "upsert"]
+    assert all(s["items_in"] == 2 and s["items_out"] == 2 for s in stages.values())
+    assert stages["parse"]["processes"]
+    written = client.collections["user_u1"].ids
+    assert len(written) == sum(f["chunks"] for f in report["files"])
+
+
+def test_failing_file_is_reported_without_stopping_the_batch(tmp_path):
+    (tmp_path / "broken.docx").write_bytes(b"not a zip archive")
+    (tmp_path / "fine.txt").write_text("Convex functions have one minimum. " * 20)
+    ingestor = Ingestor(client=FakeClient(), embedding_function=embed, model_id="fake")
+    report = ingestor.ingest(discover(tmp_path, user_id="u1"), parse_processes=False)
+
+    assert [f["file_id"] for f in report["files"]] == ["u1_fine.txt"]
+    assert len(report["errors"]) == 1
+    assert report["errors"][0]["stage"] == "parse"
+    assert report["errors"][0]["item"].endswith("broken.docx")
+
+
+def test_parse_cache_is_opened_once_per_process(tmp_path, monkeypatch):
+    opened = []
+    original = ingest.FileStore
+
+    def counting_store(path):
+        opened.append(path)
+        return original(path)
+
+    monkeypatch.setattr(ingest, "FileStore", counting_store)
+    monkeypatch.setattr(ingest, "_PARSE_CACHES", {})
+    cache_path = str(tmp_path / "cache")
+    for name in ("a.txt", "b.txt"):
+        (tmp_path / name).write_text("Lagrange multipliers handle constraints. " * 5)
+        parse_file({"path": str(tmp_path / name), "file_id": name, "user_id": "u1", "class": "",
+                    "topic": "", "s3_key": ""}, cache_path=cache_path)
+
+    assert opened == [cache_path]
+
+
+def test_bounded_queues_apply_backpressure():
+    def slow(item):
+        time.sleep(0.01)
+        return item
+
+    pipeline = Pipeline([Stage("fast", lambda item: item, queue_size=1), Stage("slow", slow, queue_size=1)])
+    results = pipeline.run(range(20))
+
+    assert sorted(results) == list(range(20))
+    fast, slow_stage = pipeline.metrics()["stages"]
+    # The fast stage spends its time waiting for room in the slow stage's queue
+    assert fast["blocked_seconds"] > fast["busy_seconds"]
+    assert slow_stage["utilization"] > 0.5
+
@@ -0,0 +1,95 @@
+import hashlib
+
+import chromadb
+
+from src.parsers.embed_parser import delete_file_chunks, prepare_chunks, save_to_chroma
+from src.parsers.search_service import SearchService
+from src.storage.metadata_index import MetadataIndex
+
+
+class HashEmbeddingFunction(chromadb.EmbeddingFunction):
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        return [[b / 255 for b in hashlib.sha256(text.encode()).digest()[:16]] for text in input]
+
+
+def parsed(file_id, sentences, topic, class_name="MATH 101"):
+    return {"text": f"Notes on {topic}. " * sentences, "filename": f"{file_id}.pdf", "file_id": file_id,
+            "user_id": "metadata_index_test", "class": class_name, "topic": topic}
+
+
+def test_listings_and_id_ranges():
+    index = MetadataIndex()
+    assert index.record_file("user_a", "f1", 3, "MATH 101", "limits", "f1.pdf") == 0
+    index.record_file("user_a", "f2", 2, "MATH 101", "series", "f2.pdf")
+    index.record_file("user_a", "f3", 1, "BIO 101", "cells", "f3.pdf")
+
+    assert index.classes("user_a") == ["BIO 101", "MATH 101"]
+    assert index.topics("user_a", "MATH 101") == ["limits", "series"]
+    assert index.chunk_ids("user_a", file_id="f1") == ["f1_0", "f1_1", "f1_2"]
+    assert index.record_file("user_a", "f1", 1, "MATH 101", "limits", "f1.pdf") == 3
+    assert index.remove_file("user_a", "f1") == ["f1_0"]
+    assert not index.has_collection("user_b")
+
+    # Chunk 1 of the new version failed to write, chunk 2 never existed: both are missing
+    index.record_file("user_a", "f2", 3, "MATH 101", "series", "f2.pdf", written=[0])
+    assert index.chunk_ids("user_a", file_id="f2") == ["f2_0", "f2_1"]
+    index.record_file("user_a", "f4", 3, "MATH 101", "series", "f4.pdf", written=[0, 2])
+    assert index.chunk_ids("user_a", file_id="f4") == ["f4_0", "f4_2"]
+
+    # The keyset cursor crosses file pages without skipping or repeating a file (even an empty file_id)
+    index.record_file("user_a", "", 1)
+    for page_size in (1, 2, 10):
+        assert list(index.iter_chunk_ids("user_a", page_size=page_size)) == index.chunk_ids("user_a")
+
+
+def test_save_reindex_delete_and_filtered_search():
+    client = chromadb.EphemeralClient()
+    ef = HashEmbeddingFunction()
+    index = MetadataIndex()
+    save_to_chroma(prepare_chunks([parsed("m1", 200, "limits"), parsed("m2", 60, "series")]),
+                   embedding_function=ef, client=client, metadata_index=index)
+    collection = client.get_collection("user_metadata_index_test")
+    long_count = index.files("user_metadata_index_test", file_id="m1")[0]["chunk_count"]
+
+    # Re-indexing a shorter version of m1 removes the chunks past its new end
+    save_to_chroma(prepare_chunks([parsed("m1", 40, "limits")]), embedding_function=ef, client=client,
+                   metadata_index=index)
+    short_count = index.files("user_metadata_index_test", file_id="m1")[0]["chunk_count"]
+    assert short_count < long_count
+    assert len(collection.get(where={"file_id": "m1"})["ids"]) == short_count
+
+    service = SearchService(client=client, embedding_function=ef, metadata_index=index)
+    results = service.search_similar_chunks("notes on series.", "metadata_index_test", n_results=50, topic="series")
+    assert results and {r["topic"] for r in results} == {"series"}
+    assert service.handle_request({"op": "topics", "collection": "metadata_index_test"}) == {"topics": ["limits", "series"]}
+
+    assert delete_file_chunks("metadata_index_test", "m2", client=client, metadata_index=index) > 0
+    assert collection.get(where={"file_id": "m2"})["ids"] == []
+    assert index.topics("user_metadata_index_test") == ["limits"]
+
+
+def test_topic_filter_covers_chunks_written_before_the_index():
+    client = chromadb.EphemeralClient()
+    ef = HashEmbeddingFunction()
+    index = MetadataIndex()
+    legacy = client.get_or_create_collection("user_metadata_backfill_test", embedding_function=ef)
+    legacy.upsert(ids=["old_0", "older_0"], documents=["Old notes on series.", "Old notes on limits."],
+                  metadatas=[{"file_id": f, "chunk_index": 0, "topic": t, "filename": f"{f}.pdf"}
+                             for f, t in (("old", "series"), ("older", "limits"))])
+    index.record_file("user_metadata_backfill_test", "new", 1, "MATH 101", "series", "new.pdf")
+    service = SearchService(client=client, embedding_function=ef, metadata_index=index)
+
+    # Not backfilled yet: the partial index must not stand in for the topic filter
+    results = service.search_similar_chunks("notes on series", "metadata_backfill_test", n_results=10, topic="series")
+    assert [r["filename"] for r in results] == ["old.pdf"]
+
+    new = {**parsed("new", 3, "series"), "user_id": "metadata_backfill_test"}
+    save_to_chroma(prepare_chunks([new]), embedding_function=ef, client=client, metadata_index=index,
+                   versions=service.versions)
+    assert index.is_complete("user_metadata_backfill_test")
+    assert index.chunk_ids("user_metadata_backfill_test", topic="series")[0] == "new_0"
+    results = service.search_similar_chunks("notes on series", "metadata_backfill_test", n_results=10, topic="series")
+    assert sorted(r["filename"] for r in results) == ["new.pdf", "old.pdf"]
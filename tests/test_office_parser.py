@@ -0,0 +1,76 @@
+import zipfile
+
+import pytest
+
+from src.parsers.embed_parser import prepare_chunks
+from src.parsers.office_parser import DocxParser, PptxParser
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+A = 'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+P = 'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"'
+R = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+
+
+def paragraph(text, style=None):
+    props = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ''
+    return f'<w:p>{props}<w:r><w:t>{text}</w:t></w:r></w:p>'
+
+
+@pytest.fixture
+def sample_docx(tmp_path):
+    path = tmp_path / "notes.docx"
+    body = (paragraph("Course overview") + paragraph("Eigenvalues", "Heading1")
+            + paragraph("An eigenvector keeps its direction.") + paragraph("Diagonalization", "Heading1")
+            + paragraph("A = PDP^-1 when P is invertible."))
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("word/document.xml", f'<w:document {W}><w:body>{body}</w:body></w:document>')
+    return path
+
+
+@pytest.fixture
+def sample_pptx(tmp_path):
+    path = tmp_path / "slides.pptx"
+    with zipfile.ZipFile(path, "w") as z:
+        # Presentation order (3, 1, 2) differs from the part numbering
+        z.writestr("ppt/presentation.xml", f'<p:presentation {P} {R}><p:sldIdLst>'
+                   '<p:sldId id="256" r:id="rId3"/><p:sldId id="257" r:id="rId1"/><p:sldId id="258" r:id="rId2"/>'
+                   '</p:sldIdLst></p:presentation>')
+        z.writestr("ppt/_rels/presentation.xml.rels",
+                   '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                   + "".join(f'<Relationship Id="rId{i}" Target="slides/slide{i}.xml"/>' for i in (1, 2, 3))
+                   + '</Relationships>')
+        for i in (1, 2, 3):
+            z.writestr(f"ppt/slides/slide{i}.xml", f'<p:sld {P} {A}><p:cSld><p:spTree>'
+                       f'<a:p><a:r><a:t>Slide part {i}</a:t></a:r></a:p>'
+                       f'<a:p><a:r><a:t>Bullet </a:t></a:r><a:r><a:t>{i * 10}</a:t></a:r></a:p>'
+                       '</p:spTree></p:cSld></p:sld>')
+    return path
+
+
+def test_docx_sections_split_on_headings(sample_docx):
+    sections = list(DocxParser().iter_sections(sample_docx))
+    assert [heading for heading, _ in sections] == ["", "Eigenvalues", "Diagonalization"]
+    result = DocxParser().extract_text(sample_docx)
+    assert result["file_type"] == "docx"
+    assert result["text"][result["section_offsets"][2]:].startswith("Diagonalization")
+
+
+def test_pptx_slides_follow_presentation_order(sample_pptx):
+    slides = list(PptxParser().iter_slides(sample_pptx))
+    assert [number for number, _ in slides] == [1, 2, 3]
+    assert slides[0][1] == "Slide part 3\nBullet 30"
+    result = PptxParser().extract_text(sample_pptx)
+    assert result["num_pages"] == 3
+
+
+def test_chunks_do_not_straddle_slides(sample_pptx):
+    parsed = PptxParser().extract_text(sample_pptx)
+    parsed.update({"file_id": "f1", "user_id": "u1"})
+    chunks = prepare_chunks([parsed], chunk_size=30, overlap=5)["u1"]
+    assert [chunk["page"] for chunk in chunks] == [1, 2, 3]
+    assert all(chunk["text"].count("Slide part") == 1 for chunk in chunks)
+
+
+def test_unsupported_file_type():
+    with pytest.raises(ValueError):
+        DocxParser().extract_text("notes.doc")
@@ -1,6 +1,18 @@
+import pymupdf
 import pytest
 from pathlib import Path
-from src.parsers.pdf_parser import PDFParser
+from src.parsers.pdf_parser import PDFParser, page_for_offset
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    path = tmp_path / "lecture.pdf"
+    doc = pymupdf.open()
+    for i in range(40):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {i + 1} covers topic {i * 7}")
+    doc.save(path)
+    doc.close()
+    return path
 
 def test_pdf_parser_initialization():
     parser = PDFParser()
@@ -11,4 +23,24 @@ def test_unsupported_file_type():
     with pytest.raises(ValueError):
         parser.extract_text("test.txt")
 
+def test_iter_pages_streams_numbered_pages(sample_pdf):
+    pages = list(PDFParser().iter_pages(sample_pdf))
+    assert len(pages) == 40
+    assert pages[0][0] == 1
+    assert "Page 1 covers" in pages[0][1]
+
+def test_page_offsets_map_back_to_pages(sample_pdf):
+    result = PDFParser().extract_text(sample_pdf)
+    offsets = result["page_offsets"]
+    assert len(offsets) == result["num_pages"] == 40
+    position = result["text"].index("Page 17 covers")
+    assert page_for_offset(offsets, position) == 17
+
+def test_parallel_extraction_matches_serial(sample_pdf):
+    parser = PDFParser()
+    serial = parser.extract_text(sample_pdf)
+    parallel = parser.extract_text(sample_pdf, parallel=True, max_workers=2)
+    assert parallel["text"] == serial["text"]
+    assert parallel["page_offsets"] == serial["page_offsets"]
+
 # Add more tests as needed 
\ No newline at end of file
@@ -0,0 +1,26 @@
+from src.storage import query_cache
+from src.storage.query_cache import CollectionVersions, TTLCache
+
+
+def test_lru_eviction_and_ttl_expiry(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(query_cache.time, "monotonic", lambda: now[0])
+    cache = TTLCache(max_entries=2, ttl_seconds=10)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert cache.get("a") == [1.0]
+    cache.put("c", [3.0])  # "b" was the least recently used entry
+    assert cache.get("b") is None
+
+    now[0] = 11.0
+    assert cache.get("a") is None and len(cache) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_versions_are_shared_through_the_file(tmp_path):
+    writer = CollectionVersions(tmp_path / "versions.sqlite3")
+    reader = CollectionVersions(tmp_path / "versions.sqlite3")
+    assert reader.get("user_a") == 0
+    writer.bump("user_a")
+    assert writer.bump("user_a") == 2
+    assert reader.get("user_a") == 2 and reader.get("user_b") == 0
@@ -0,0 +1,135 @@
+import hashlib
+import io
+import json
+
+import chromadb
+import pytest
+
+from src.parsers.search_service import SearchService
+from src.utils.ndjson_server import serve_stdio
+
+
+class HashEmbeddingFunction(chromadb.EmbeddingFunction):
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        return [[b / 255 for b in hashlib.sha256(text.encode()).digest()[:16]] for text in input]
+
+
+@pytest.fixture
+def service():
+    service = SearchService(client=chromadb.EphemeralClient(), embedding_function=HashEmbeddingFunction())
+    collection = service.get_collection("search_service_test")
+    collection.upsert(
+        ids=["f1_0", "f1_1"],
+        documents=["eigenvalues of a matrix", "mitochondria is the powerhouse"],
+        metadatas=[
+            {"filename": "a.pdf", "class": "MATH 101", "topic": "linear algebra"},
+            {"filename": "b.pdf", "class": "BIO 101", "topic": "cells"}
+        ]
+    )
+    return service
+
+
+def test_search_reuses_collection_handles(service):
+    results = service.search_similar_chunks("eigenvalues of a matrix", "search_service_test", n_results=1)
+    assert results[0]["filename"] == "a.pdf"
+    assert results[0]["similarity_score"] == pytest.approx(1.0)
+    assert service.get_collection("search_service_test") is service.get_collection("user_search_service_test")
+
+
+def test_health_reports_readiness(service):
+    assert service.health()["ready"] is False
+    service.warm_up()
+    assert service.health()["status"] == "ok"
+
+
+def test_serve_stdio_round_trip(service):
+    requests = [
+        {"id": 1, "op": "search", "query": "mitochondria is the powerhouse",
+         "collection": "search_service_test", "n_results": 1, "topic": "cells"},
+        {"id": 2, "op": "health"},
+        {"id": 3, "op": "bogus"}
+    ]
+    stdin = io.StringIO("".join(json.dumps(r) + "\n" for r in requests) + "not json\n")
+    stdout = io.StringIO()
+    serve_stdio(service.handle_request, max_workers=2, stdin=stdin, stdout=stdout)
+
+    responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    by_id = {r.get("id"): r for r in responses}
+    assert by_id[1]["results"][0]["topic"] == "cells"
+    assert "ready" in by_id[2]
+    assert "error" in by_id[3]
+    assert "error" in by_id[None]
+
+
+def test_result_cache_is_invalidated_by_save_to_chroma(service):
+    from src.parsers.embed_parser import prepare_chunks, save_to_chroma
+
+    first = service.search_similar_chunks("Eigenvalues  of a matrix", "search_service_test", n_results=5)
+    again = service.search_similar_chunks("eigenvalues of a MATRIX", "search_service_test", n_results=5)
+    assert again == first
+    stats = service.cache_stats()
+    assert stats["result_cache"]["hits"] == 1 and stats["query_cache"]["misses"] == 1
+    assert stats["result_cache"]["bytes"] > 0
+
+    parsed = [{"text": "eigenvalues of a matrix", "filename": "new.pdf", "file_id": "f2",
+               "user_id": "search_service_test"}]
+    save_to_chroma(prepare_chunks(parsed), embedding_function=service.embedding_function,
+                   client=service.client, versions=service.versions)
+    fresh = service.search_similar_chunks("eigenvalues of a matrix", "search_service_test", n_results=5)
+    assert len(fresh) == 3 and "new.pdf" in {r["filename"] for r in fresh}
+    assert service.cache_stats()["query_cache"]["hits"] == 1
+
+
+class CountingHashEmbeddingFunction(HashEmbeddingFunction):
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, input):
+        self.calls += 1
+        return super().__call__(input)
+
+
+def test_batch_search_embeds_once_and_unions_results():
+    ef = CountingHashEmbeddingFunction()
+    # No query cache, so a second embedding of the same query would show up as a model call
+    service = SearchService(client=chromadb.EphemeralClient(), embedding_function=ef, query_cache_size=0)
+    for name, topic in (("batch_a", "algebra"), ("batch_b", "biology")):
+        service.get_collection(name).upsert(
+            ids=[f"{name}_{i}" for i in range(4)],
+            documents=[f"{topic} fact {i}" for i in range(4)],
+            metadatas=[{"filename": f"{name}.pdf", "topic": topic} for _ in range(4)]
+        )
+    queries = ["algebra fact 1", "algebra fact 2", {"query": "biology fact 3", "collection": "batch_b", "n_results": 1},
+               {"query": "algebra fact 1", "topic": "algebra"}, {"query": "algebra fact 0", "mode": "hybrid"}]
+    calls_before = ef.calls
+    response = service.batch_search(queries, collection_name="batch_a", n_results=2)
+
+    # Hybrid entries reuse the batched embedding too
+    assert ef.calls == calls_before + 1
+    assert [len(r) for r in response["results"]][:4] == [2, 2, 1, 2]
+    assert response["results"][4][0]["text"] == "algebra fact 0"
+    assert response["results"][0][0]["text"] == "algebra fact 1"
+    assert response["results"][2][0]["text"] == "biology fact 3"
+    texts = [entry["text"] for entry in response["union"]]
+    assert len(texts) == len(set(texts))
+    fact_1 = next(entry for entry in response["union"] if entry["text"] == "algebra fact 1")
+    assert fact_1["id"] == "batch_a_1" and {0, 3} <= set(fact_1["queries"])
+
+
+def test_writer_and_search_worker_share_one_chroma_directory(tmp_path, monkeypatch):
+    import os
+    import subprocess
+    import sys
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    monkeypatch.delenv("CHROMA_DB_PATH", raising=False)
+    script = ("from src.parsers.embed_parser import CHROMA_DB_PATH; "
+              "from src.parsers.search_service import DEFAULT_CHROMA_DB_PATH; "
+              "print(CHROMA_DB_PATH); print(DEFAULT_CHROMA_DB_PATH)")
+    # Run from an unrelated cwd, as server.js does
+    out = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, capture_output=True, text=True,
+                         env={**os.environ, "PYTHONPATH": root}, check=True).stdout.split()
+    assert out == [os.path.join(root, "backend", "chroma_db")] * 2
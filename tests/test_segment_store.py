@@ -0,0 +1,75 @@
+import multiprocessing
+
+from src.storage.file_store import FileStore
+from src.storage.segment_store import SegmentStore
+
+
+def test_put_get_and_iterate_one_class(tmp_path):
+    store = SegmentStore(tmp_path)
+    store.put("f1", {"text": "eigenvalues " * 100}, "MATH")
+    store.put("f2", {"text": "mitosis"}, "BIO")
+    store.put("f3", {"text": "determinants"}, "MATH")
+    store.put("f1", {"text": "eigenvalues, revised"}, "MATH")
+    assert store.get("f1") == {"text": "eigenvalues, revised"}
+    assert store.get("missing") is None
+    assert [file_id for file_id, _ in store.iter_class("MATH")] == ["f3", "f1"]
+    assert store.classes() == ["BIO", "MATH"]
+    store.close()
+    # The index and segments survive a reopen
+    assert SegmentStore(tmp_path).get("f2") == {"text": "mitosis"}
+
+
+def test_compaction_reclaims_dead_records(tmp_path):
+    store = SegmentStore(tmp_path, segment_max_bytes=200)
+    for i in range(20):
+        store.put(f"f{i % 4}", {"text": f"version {i} " * 20}, "MATH")
+    before = store.stats()
+    assert before["segments"] > 2 and before["dead_ratio"] > 0.5
+    assert store.compact() > 0
+    after = store.stats()
+    assert after["bytes"] < before["bytes"] and after["records"] == 4
+    assert store.get("f3") == {"text": "version 19 " * 20}
+    store.close()
+
+
+def _write_records(directory, writer):
+    store = SegmentStore(directory, segment_max_bytes=2000)
+    for i in range(60):
+        store.put(f"w{writer}_{i}", {"text": f"writer {writer} record {i} " * 5}, "MATH")
+        if i % 20 == 19:
+            store.compact(min_dead_ratio=0.0)
+    store.close()
+
+
+def test_processes_share_one_directory(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    writers = [context.Process(target=_write_records, args=(tmp_path, w)) for w in range(3)]
+    for process in writers:
+        process.start()
+    for process in writers:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+    store = SegmentStore(tmp_path)
+    assert len(store.file_ids()) == 180
+    assert all(store.get(f"w{w}_{i}") == {"text": f"writer {w} record {i} " * 5} for w in range(3) for i in range(60))
+    store.close()
+
+
+def test_file_store_keeps_save_processed_content(tmp_path):
+    store = FileStore(tmp_path)
+    path = store.save_processed_content({"filename": "notes.pdf", "file_id": "u1_notes", "text": "hi"}, "MATH")
+    assert path.exists() and path.parent == tmp_path / "segments"
+    assert store.load_processed_content("u1_notes")["text"] == "hi"
+    assert [file_id for file_id, _ in store.iter_processed_content("MATH")] == ["u1_notes"]
+    store.close()
+
+
+def test_migrates_legacy_json_files(tmp_path):
+    legacy = tmp_path / "MATH"
+    legacy.mkdir()
+    (legacy / "notes.pdf_20240101_120000.json").write_text('{"filename": "notes.pdf", "text": "old"}')
+    store = FileStore(tmp_path)
+    assert store.migrate_json_files(remove=True) == 1
+    assert store.load_processed_content("notes.pdf_20240101_120000")["text"] == "old"
+    assert not list(legacy.glob("*.json"))
+    store.close()
@@ -0,0 +1,18 @@
+from src.parsers.text_parser import TextParser
+
+
+def test_markdown_sections_ignore_fenced_code(tmp_path):
+    path = tmp_path / "notes.md"
+    path.write_text("Intro line\n# Week 1\nVectors.\n```\n# not a heading\n```\n## Week 2\nMatrices.\n")
+    sections = list(TextParser().iter_sections(path))
+    assert [heading for heading, _ in sections] == ["", "Week 1", "Week 2"]
+    assert "# not a heading" in sections[1][1]
+
+
+def test_plain_text_keeps_form_feed_pages_and_bom(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes("﻿page one\fpage two\n".encode("utf-8"))
+    result = TextParser().extract_text(path)
+    assert result["text"] == "page one\n\npage two"
+    assert result["section_offsets"] == [0, 10]
+    assert result["file_type"] == "txt"
@@ -0,0 +1,57 @@
+import pymupdf
+
+from src.parsers.embed_parser import clean_parsed, prepare_chunks
+from src.parsers.pdf_parser import PDFParser
+from src.utils.text_utils import clean_document, clean_text, iter_clean_pages
+
+
+def test_clean_text_removes_artifacts_in_one_pass():
+    text = "Intro\n\n  Slide 3 of 12  gradients\tdescend Page 4\n© 2024 University\nNext line"
+    assert clean_text(text) == "Intro\n\ngradients descend Next line"
+
+
+def test_clean_text_keeps_paragraph_breaks():
+    text = "First paragraph\nwraps here.\n \n\n  Second\t paragraph.\nPage 2\n\nThird."
+    assert clean_text(text) == "First paragraph wraps here.\n\nSecond paragraph.\n\nThird."
+
+
+def test_repeated_headers_and_footers_are_stripped_per_page():
+    pages = [f"CS229 Machine Learning\nLecture body {i} about kernels.\nStanford University - {i}" for i in range(1, 6)]
+    cleaned = list(iter_clean_pages(iter(pages), sample_pages=3))
+    assert cleaned == [f"Lecture body {i} about kernels." for i in range(1, 6)]
+
+
+def test_cleaning_keeps_page_offsets_aligned():
+    parsed = {"text": "Page 1\n  Alpha   beta.\n\nPage 2\n  Gamma\tdelta.", "page_offsets": [0, 24]}
+    cleaned = clean_document(parsed)
+    second = cleaned["page_offsets"][1]
+    assert cleaned["text"][second:].startswith("Gamma delta.")
+    assert cleaned["cleaning"]["chars_saved"] == len(parsed["text"]) - len(cleaned["text"])
+
+
+def test_pdf_banner_is_removed_and_savings_reported(tmp_path):
+    path = tmp_path / "lecture.pdf"
+    doc = pymupdf.open()
+    for i in range(8):
+        page = doc.new_page()
+        page.insert_text((72, 60), "MATH 221 - Linear Algebra - Spring Term")
+        page.insert_text((72, 120), f"Eigenvalue example {i}: the matrix has a repeated root.")
+        page.insert_text((72, 780), f"Department of Mathematics | page {i + 1}")
+    doc.save(path)
+    doc.close()
+
+    parsed = PDFParser().extract_text(path)
+    [cleaned] = clean_parsed([parsed], chunk_size=100, overlap=0, report_chunks=True)
+    assert "Linear Algebra" not in cleaned["text"] and "Department" not in cleaned["text"]
+    assert "Eigenvalue example 7" in cleaned["text"]
+    report = cleaned["cleaning"]
+    assert report["repeated_lines"] == 2
+    assert report["chunks_saved"] > 0 and report["chars_saved"] > 0
+
+    # Default path: no extra chunking in clean_parsed; prepare_chunks fills in the counts from its own spans
+    [default] = clean_parsed([parsed])
+    assert "chunks_saved" not in default["cleaning"]
+    chunks = prepare_chunks([default], chunk_size=100, overlap=0)["default_user"]
+    estimate = default["cleaning"]
+    assert estimate["chunks_estimated"] and estimate["chunks_after"] == len(chunks) == report["chunks_after"]
+    assert estimate["chunks_saved"] > 0
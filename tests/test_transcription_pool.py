@@ -0,0 +1,67 @@
+import pytest
+import whisper
+
+from src.parsers import audio_parser
+from src.parsers.transcription_pool import TranscriptionPool, default_pool_size
+
+
+class FakeModel:
+    def transcribe(self, path):
+        return {
+            "language": "en",
+            "duration": 2.0,
+            "segments": [
+                {"start": 0.0, "end": 1.0, "text": " hello ", "avg_logprob": -0.1, "no_speech_prob": 0.1},
+                {"start": 1.0, "end": 2.0, "text": " ", "avg_logprob": -1.0, "no_speech_prob": 0.99}
+            ]
+        }
+
+
+@pytest.fixture
+def fake_whisper(monkeypatch):
+    loads = []
+    monkeypatch.setattr(whisper, "load_model", lambda size: loads.append(size) or FakeModel())
+    monkeypatch.setattr(audio_parser, "_MODEL_CACHE", {})
+    monkeypatch.setattr(audio_parser, "_MODEL_LOAD_SECONDS", {})
+    return loads
+
+
+def test_default_pool_size_partitions_cores(monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 8)
+    assert default_pool_size() == (2, 4)
+    assert default_pool_size(max_workers=4) == (4, 2)
+    assert default_pool_size(max_workers=2, threads_per_worker=16) == (2, 4)
+
+
+def test_pool_loads_each_model_once(fake_whisper):
+    with TranscriptionPool("tiny", max_workers=2, threads_per_worker=1, use_processes=False) as pool:
+        results = pool.transcribe_many(["a.wav", "b.mp3", "c.wav"])
+        pool.transcribe("d.wav", model_size="base")
+        metrics = pool.metrics()
+
+    assert fake_whisper == ["tiny", "base"]
+    assert results[0]["text"] == "hello"
+    assert results[1]["filename"] == "b.mp3"
+    assert len(results[0]["segments"]) == 1
+    assert metrics["jobs_completed"] == 4
+    assert metrics["decode_seconds_total"] >= 0
+
+
+def test_failed_jobs_are_counted(fake_whisper):
+    with TranscriptionPool("tiny", max_workers=1, threads_per_worker=1, use_processes=False) as pool:
+        with pytest.raises(ValueError):
+            pool.transcribe("notes.txt")
+        assert pool.metrics()["jobs_failed"] == 1
+
+
+def test_pool_serves_repeated_uploads_from_parse_cache(fake_whisper, tmp_path):
+    first, copy = tmp_path / "lecture.wav", tmp_path / "lecture_again.wav"
+    first.write_bytes(b"RIFF fake audio")
+    copy.write_bytes(b"RIFF fake audio")
+    with TranscriptionPool("tiny", max_workers=1, threads_per_worker=1, use_processes=False,
+                           cache_path=tmp_path / "cache") as pool:
+        pool.transcribe(first)
+        result = pool.transcribe(copy)
+        metrics = pool.metrics()
+    assert result["filename"] == "lecture_again.wav"
+    assert (metrics["cache_hits"], metrics["cache_misses"]) == (1, 1)